@@ -54,3 +54,57 @@ class TestKeystoneAuth(base.TestBase):
         req = self.auth.authenticate(1, req)
         self.assertIn('X-Auth-Token', req.headers)
         self.assertIn(req.headers['X-Auth-Token'], 'test-token')
+
+    def test_session_and_endpoint_are_cached(self):
+        ks_session = mock.Mock(auth=None)
+        ks_session.get_token.return_value = 'fake-token'
+
+        with mock.patch.object(self.auth, '_get_endpoint') as get_endpoint:
+            with mock.patch.object(self.auth,
+                                   '_get_keystone_session') as get_session:
+                get_endpoint.return_value = 'http://example.org:8888'
+                get_session.return_value = ks_session
+
+                for _ in range(3):
+                    req = self.auth.authenticate(2, request.Request())
+                    self.assertEqual('fake-token',
+                                     req.headers['X-Auth-Token'])
+
+                self.assertEqual(1, get_session.call_count)
+                self.assertEqual(1, get_endpoint.call_count)
+
+                self.auth.invalidate()
+                ks_session.invalidate.assert_called_once_with()
+                self.auth.authenticate(2, request.Request())
+                self.assertEqual(2, get_endpoint.call_count)
+
+    def test_token_refreshed_before_expiry(self):
+        ks_session = mock.Mock()
+        auth_ref = ks_session.auth.get_access.return_value
+        auth_ref.will_expire_soon.return_value = True
+        self.auth.conf['token_refresh_window'] = 300
+
+        req = request.Request(endpoint='http://example.org:8888',
+                              session=ks_session)
+        self.auth.authenticate(2, req)
+
+        auth_ref.will_expire_soon.assert_called_once_with(300)
+        ks_session.invalidate.assert_called_once_with()
+        ks_session.get_token.assert_called_once_with()
+
+    def test_get_endpoints_from_catalog(self):
+        urls = ['http://zaqar-1:8888', 'http://zaqar-2:8888']
+        ks_session = mock.Mock()
+        ks_session.get_endpoint.return_value = urls[0]
+        catalog = ks_session.auth.get_access.return_value.service_catalog
+        catalog.get_urls.return_value = tuple(urls)
+
+        self.assertEqual([], self.auth.get_endpoints())
+        self.assertEqual(urls[0], self.auth._get_endpoint(ks_session))
+        self.assertEqual(urls, self.auth.get_endpoints())
+        catalog.get_urls.assert_called_once_with(service_type='messaging',
+                                                 interface='publicURL',
+                                                 region_name=None)
+
+        self.auth.invalidate()
+        self.assertEqual([], self.auth.get_endpoints())
@@ -0,0 +1,40 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from zaqarclient import auth
+from zaqarclient.tests import base
+from zaqarclient.transport import request
+
+
+class TestSignedURLAuth(base.TestBase):
+
+    def setUp(self):
+        super().setUp()
+        options = {'expires': '2026-10-18T00:00:00',
+                   'methods': ['GET', 'POST'],
+                   'paths': ['/v2/queues/q/messages'],
+                   'signature': 'fake-signature'}
+        self.auth = auth.get_backend('signed-url', options)
+
+    def test_authenticate(self):
+        req = self.auth.authenticate(2, request.Request())
+        self.assertEqual({'URL-Expires': '2026-10-18T00:00:00',
+                          'URL-Methods': 'GET,POST',
+                          'URL-Paths': '/v2/queues/q/messages',
+                          'URL-Signature': 'fake-signature'},
+                         req.headers)
+
+    def test_headers_are_not_shared(self):
+        req = self.auth.authenticate(2, request.Request())
+        req.headers['URL-Methods'] = 'DELETE'
+        req = self.auth.authenticate(2, request.Request())
+        self.assertEqual('GET,POST', req.headers['URL-Methods'])
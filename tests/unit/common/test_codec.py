@@ -0,0 +1,75 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from unittest import mock
+
+import ddt
+
+from zaqarclient.common import codec
+from zaqarclient.tests import base
+from zaqarclient.tests.transport import dummy
+
+
+@ddt.ddt
+class TestCodec(base.TestBase):
+
+    @ddt.data('json', 'orjson')
+    def test_round_trip(self, name):
+        if name == 'orjson' and not codec.orjson:
+            self.skipTest('orjson is not installed')
+
+        json_codec = codec.get_codec(name)
+        data = {'messages': [{'body': {'ü': [1, 2.5, None]}, 'ttl': 60}]}
+
+        encoded = json_codec.dumps(data)
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(data, json_codec.loads(encoded))
+        self.assertEqual(data, json_codec.loads(encoded.decode('utf-8')))
+
+    def test_default(self):
+        self.assertIsInstance(codec.get_codec(), codec.JsonCodec)
+        self.assertIs(codec.get_codec('json'), codec.get_codec())
+
+    def test_auto(self):
+        with mock.patch.object(codec, 'orjson', None):
+            self.assertIsInstance(codec.get_codec('auto'), codec.JsonCodec)
+
+    def test_custom(self):
+        custom = mock.Mock()
+        self.assertIs(custom, codec.get_codec(custom))
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, codec.get_codec, 'yaml')
+
+    def test_orjson_missing(self):
+        with mock.patch.object(codec, 'orjson', None):
+            self.assertRaises(RuntimeError, codec.OrjsonCodec)
+
+    def test_msgpack(self):
+        if not codec.msgpack:
+            self.skipTest('msgpack is not installed')
+
+        msgpack_codec = codec.MsgpackCodec()
+        data = {'action': 'message_post', 'body': {'ü': [1, 2.5, None]}}
+        encoded = msgpack_codec.dumps(data)
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(data, msgpack_codec.loads(encoded))
+        self.assertRaises(ValueError, codec.get_codec, 'msgpack')
+
+    def test_msgpack_missing(self):
+        with mock.patch.object(codec, 'msgpack', None):
+            self.assertRaises(RuntimeError, codec.MsgpackCodec)
+
+    def test_transport_codec(self):
+        self.conf['json_codec'] = 'json'
+        transport = dummy.DummyTransport(self.conf)
+        self.assertIs(codec.get_codec('json'), transport.codec)
@@ -0,0 +1,52 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import threading
+
+from zaqarclient.common import executor
+from zaqarclient.tests import base
+
+
+class TestBoundedExecutor(base.TestBase):
+
+    def test_submit(self):
+        pool = executor.BoundedExecutor(max_workers=2)
+        self.addCleanup(pool.shutdown)
+        future = pool.submit(sum, [1, 2, 3])
+        self.assertEqual(6, future.result())
+
+    def test_submit_blocks_when_full(self):
+        pool = executor.BoundedExecutor(max_workers=1, max_pending=1)
+        self.addCleanup(pool.shutdown)
+        release = threading.Event()
+        pool.submit(release.wait)
+
+        submitted = threading.Event()
+
+        def submit_second():
+            pool.submit(lambda: None)
+            submitted.set()
+
+        thread = threading.Thread(target=submit_second)
+        thread.start()
+        self.assertFalse(submitted.wait(0.1))
+
+        release.set()
+        self.assertTrue(submitted.wait(5))
+        thread.join()
+
+    def test_failed_task_releases_slot(self):
+        pool = executor.BoundedExecutor(max_workers=1, max_pending=1)
+        self.addCleanup(pool.shutdown)
+        future = pool.submit(int, 'nan')
+        self.assertRaises(ValueError, future.result)
+        self.assertEqual(1, pool.submit(int, '1').result())
@@ -36,3 +36,17 @@ class TestCommonHttp(base.TestBase):
                 request_method.return_value = True
                 getattr(self.client, method)("url", data=data)
                 request_method.assert_called_with('url', data=json.dumps(data))
+
+    def test_pool_options(self):
+        client = http.Client(pool_connections=4, pool_maxsize=32,
+                             pool_block=True)
+        adapter = client.session.get_adapter('https://example.org')
+        self.assertIs(client.adapter, adapter)
+        self.assertIs(adapter, client.session.get_adapter('http://foo'))
+        self.assertEqual(32, adapter._pool_maxsize)
+        self.assertTrue(adapter._pool_block)
+        self.assertEqual('keep-alive', client.session.headers['Connection'])
+
+    def test_no_keep_alive(self):
+        client = http.Client(keep_alive=False)
+        self.assertEqual('close', client.session.headers['Connection'])
@@ -0,0 +1,70 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+
+import ddt
+
+from zaqarclient.common import jsonstream
+from zaqarclient.tests import base
+
+
+def _chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@ddt.ddt
+class TestJsonStream(base.TestBase):
+
+    doc = {
+        'links': [{'rel': 'next', 'href': '/v2/queues/q/messages?marker=2'}],
+        'messages': [
+            {'id': '1', 'ttl': 60, 'age': 1.5, 'body': {'ü': [1, None]}},
+            {'id': '2', 'ttl': 120, 'age': 0, 'body': 'ñ " ]}'},
+        ],
+        'count': 2,
+    }
+
+    @ddt.data(1, 2, 3, 7, 4096)
+    def test_iter_items(self, size):
+        data = json.dumps(self.doc, ensure_ascii=False).encode('utf-8')
+        extra = {}
+        items = list(jsonstream.iter_items(_chunked(data, size),
+                                           'messages', extra))
+        self.assertEqual(self.doc['messages'], items)
+        self.assertEqual(self.doc['links'], extra['links'])
+        self.assertEqual(2, extra['count'])
+
+    def test_iter_items_str_chunks(self):
+        data = json.dumps(self.doc, indent=4)
+        items = list(jsonstream.iter_items(_chunked(data, 5), 'messages'))
+        self.assertEqual(self.doc['messages'], items)
+
+    def test_iter_items_is_lazy(self):
+        def chunks():
+            yield b'{"messages": [{"id": 1}, '
+            raise AssertionError('Read past the first record')
+
+        items = jsonstream.iter_items(chunks(), 'messages')
+        self.assertEqual({'id': 1}, next(items))
+
+    @ddt.data(b'', b'  ', b'{}', b'{"messages": []}', b'{"links": []}')
+    def test_iter_items_empty(self, data):
+        self.assertEqual([], list(jsonstream.iter_items([data],
+                                                        'messages')))
+
+    @ddt.data(b'[]', b'{"messages": [1 2]}', b'{"messages": [1',
+              b'{"messages": [1]')
+    def test_iter_items_invalid(self, data):
+        self.assertRaises(ValueError, list,
+                          jsonstream.iter_items(_chunked(data, 3),
+                                                'messages'))
@@ -0,0 +1,128 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import json
+import threading
+from unittest import mock
+
+from zaqarclient.common import codec
+from zaqarclient.queues.v2 import async_client
+from zaqarclient.tests import base
+from zaqarclient.transport import errors
+from zaqarclient.transport import response
+
+
+class TestAsyncClient(base.TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = async_client.AsyncClient('http://example.org', 2,
+                                               self.conf)
+        self.transport = mock.Mock()
+        self.transport.send = mock.AsyncMock()
+        self.transport.close = mock.AsyncMock()
+        self.transport.codec = codec.get_codec()
+        self.client._transport = self.transport
+        self.queue = self.client.queue('test')
+
+    def _respond(self, body):
+        self.transport.send.return_value = response.Response(
+            None, json.dumps(body))
+
+    def test_post(self):
+        result = {'resources': ['/v2/queues/test/messages/1']}
+        self._respond(result)
+        ret = asyncio.run(self.queue.post({'body': 'x', 'ttl': 60}))
+        self.assertEqual(result, ret)
+
+        req = self.transport.send.call_args[0][0]
+        self.assertEqual('message_post', req.operation)
+        self.assertEqual('test', req.params['queue_name'])
+        self.assertEqual({'messages': [{'body': 'x', 'ttl': 60}]},
+                         json.loads(req.content))
+
+    def test_concurrent_posts(self):
+        self._respond({'resources': []})
+
+        async def post_many():
+            await asyncio.gather(*[self.queue.post({'body': i})
+                                   for i in range(10)])
+
+        asyncio.run(post_many())
+        self.assertEqual(10, self.transport.send.await_count)
+
+    def test_messages(self):
+        self._respond({'links': [],
+                       'messages': [{'href': '/v2/queues/test/messages/1',
+                                     'ttl': 60, 'age': 1, 'body': {}}]})
+        msgs = asyncio.run(self.queue.messages(limit=1))
+        self.assertEqual(1, len(msgs))
+        self.assertEqual('1', msgs[0].id)
+
+        self._respond(None)
+        asyncio.run(msgs[0].delete())
+        req = self.transport.send.call_args[0][0]
+        self.assertEqual('message_delete', req.operation)
+
+    def test_exists(self):
+        self.transport.send.side_effect = errors.ResourceNotFound()
+        self.assertFalse(asyncio.run(self.queue.exists()))
+
+    def test_claim(self):
+        href = '/v2/queues/test/messages/1?claim_id=abc'
+        self._respond({'messages': [{'href': href, 'ttl': 60,
+                                     'age': 1, 'body': {}}]})
+        claim = asyncio.run(self.queue.claim(ttl=60, grace=60))
+        self.assertEqual('abc', claim.id)
+        self.assertEqual(1, len(list(claim)))
+
+        self._respond(None)
+        asyncio.run(claim.update(ttl=120))
+        self.assertEqual(120, claim.ttl)
+        req = self.transport.send.call_args[0][0]
+        self.assertEqual('claim_update', req.operation)
+        self.assertEqual('abc', req.params['claim_id'])
+
+    def test_queues(self):
+        self._respond({'links': [], 'queues': [{'name': 'a'},
+                                               {'name': 'b'}]})
+        qs, count = asyncio.run(self.client.queues())
+        self.assertEqual(['a', 'b'], [q.name for q in qs])
+        self.assertIsNone(count)
+
+    def test_context_manager(self):
+        async def use_client():
+            async with self.client as cli:
+                self._respond(None)
+                return await cli.ping()
+
+        self.assertTrue(asyncio.run(use_client()))
+        self.transport.close.assert_awaited_once_with()
+
+    def test_blocking_auth(self):
+        threads = []
+
+        def authenticate(api_version, req):
+            threads.append(threading.current_thread())
+            return req
+
+        self.client._auth_backend = mock.Mock(blocking=True,
+                                              authenticate=authenticate)
+        self._respond(None)
+        asyncio.run(self.client.ping())
+        self.assertEqual(1, len(threads))
+        self.assertIsNot(threading.current_thread(), threads[0])
+
+        self.client._auth_backend.blocking = False
+        asyncio.run(self.client.ping())
+        self.assertIs(threading.current_thread(), threads[1])
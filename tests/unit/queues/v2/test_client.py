@@ -13,12 +13,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
 from unittest import mock
 
 import ddt
+import requests
 
 from zaqarclient.queues import client
+from zaqarclient.queues.v2 import core
 from zaqarclient.tests.queues import base
+from zaqarclient.transport import balancer
 from zaqarclient.transport import errors
 from zaqarclient.transport import http
 
@@ -53,3 +57,97 @@ class TestClient(base.QueuesTestBase):
                                autospec=True) as send_method:
             send_method.side_effect = raise_error
             self.assertFalse(self.client.ping())
+
+    def test_transport_is_cached(self):
+        cli = client.Client('http://example.com',
+                            self.version,
+                            {"auth_opts": {'backend': 'noauth'}})
+        _, trans = cli._request_and_transport()
+        _, trans2 = cli._request_and_transport()
+        self.assertIs(trans, trans2)
+
+    def test_transport_kept_on_new_token(self):
+        cli = client.Client('http://example.com',
+                            self.version,
+                            {"auth_opts": {'backend': 'noauth'}})
+        req, trans = cli._request_and_transport()
+
+        req.headers['X-Auth-Token'] = 'new-token'
+        self.assertIs(trans, cli._get_transport(req))
+
+    def test_invalidate_transports(self):
+        cli = client.Client('http://example.com',
+                            self.version,
+                            {"auth_opts": {'backend': 'noauth'}})
+        _, trans = cli._request_and_transport()
+        with mock.patch.object(trans.client.session, 'close') as close:
+            cli.invalidate_transports()
+        close.assert_called_once_with()
+        _, trans2 = cli._request_and_transport()
+        self.assertIsNot(trans, trans2)
+
+    def test_circuit_breakers(self):
+        cli = client.Client('http://example.com',
+                            self.version,
+                            {'auth_opts': {'backend': 'noauth'},
+                             'circuit_breaker_opts': {'enabled': True,
+                                                      'minimum_calls': 1}})
+        req, trans = cli._request_and_transport()
+
+        with mock.patch.object(trans.client, 'request',
+                               side_effect=requests.ConnectionError):
+            self.assertFalse(cli.ping())
+
+        stats = cli.circuit_breakers()
+        self.assertEqual('open', stats['http://example.com']['state'])
+
+        # The breakers outlive the transports.
+        cli.invalidate_transports()
+        trans2 = cli._get_transport(req)
+        self.assertIsNot(trans, trans2)
+        self.assertIs(trans.circuit_breakers, trans2.circuit_breakers)
+
+    def test_multiple_endpoints(self):
+        urls = ['http://zaqar-1:8888', 'http://zaqar-2:8888']
+        cli = client.Client(urls, self.version,
+                            {'auth_opts': {'backend': 'noauth'}})
+        self.assertEqual(urls[0], cli.api_url)
+        self.assertEqual(set(urls), set(cli.endpoints()))
+
+        endpoints = set()
+        for _ in range(20):
+            req, trans = cli._request_and_transport()
+            endpoints.add(req.endpoint)
+            self.assertIsInstance(trans, balancer.BalancedTransport)
+
+            with mock.patch.object(trans._transport.client, 'request',
+                                   autospec=True) as request_method:
+                resp = requests.Response()
+                resp.raw = io.BytesIO(b'')
+                resp.status_code = 204
+                request_method.return_value = resp
+                self.assertTrue(core.ping(trans, req))
+
+        # Both endpoints got requests
+        # and all of them are done.
+        self.assertEqual(set(urls), endpoints)
+        for stats in cli.endpoints().values():
+            self.assertEqual(0, stats['outstanding'])
+
+    def test_endpoints_from_auth_backend(self):
+        urls = ['http://zaqar-1:8888', 'http://zaqar-2:8888']
+        cli = client.Client(None, self.version,
+                            {'auth_opts': {'backend': 'noauth'}})
+        self.assertEqual({}, cli.endpoints())
+
+        def authenticate(api_version, req):
+            req.endpoint = urls[0]
+            return req
+
+        backend = cli._get_auth_backend()
+        with mock.patch.object(backend, 'get_endpoints', return_value=urls), \
+                mock.patch.object(backend, 'authenticate', authenticate):
+            req, trans = cli._request_and_transport()
+        self.assertIn(req.endpoint, urls)
+        self.assertIsInstance(trans, balancer.BalancedTransport)
+        self.assertEqual(set(urls), set(cli.endpoints()))
@@ -139,6 +139,33 @@ class TestV2Core(base.TestBase):
             core.message_list(self.transport, req, 'test')
             self.assertIn('queue_name', req.params)
 
+    def test_message_list_stream(self):
+        with mock.patch.object(self.transport, 'send',
+                               autospec=True) as send_method:
+            chunks = [b'{"messages": [{"id": "a"}', b', {"id": "b"}]}']
+            send_method.return_value = response.StreamingResponse(None,
+                                                                  chunks)
+
+            req = request.Request()
+
+            records = core.message_list_stream(self.transport, req,
+                                               'test', limit=2)
+            self.assertTrue(req.stream)
+            self.assertEqual(2, req.params['limit'])
+            self.assertEqual(['a', 'b'], [m['id'] for m in records])
+
+    def test_claim_create_stream_no_content(self):
+        with mock.patch.object(self.transport, 'send',
+                               autospec=True) as send_method:
+            send_method.return_value = response.StreamingResponse(None, [])
+
+            req = request.Request()
+
+            records = core.claim_create_stream(self.transport, req,
+                                               'test', ttl=60, limit=2)
+            self.assertEqual({'ttl': 60}, json.loads(req.content))
+            self.assertEqual([], list(records))
+
     def test_message_list_kwargs(self):
         with mock.patch.object(self.transport, 'send',
                                autospec=True) as send_method:
@@ -246,3 +273,49 @@ class TestV2Core(base.TestBase):
 
             req = request.Request()
             core.health(self.transport, req)
+
+    def test_message_post_with_callback(self):
+        results = []
+        with mock.patch.object(self.transport, 'send',
+                               autospec=True) as send_method:
+            resp = response.Response(None, '{"resources": ["/v2/1"]}')
+            send_method.return_value = resp
+
+            req = request.Request()
+            future = core.message_post(self.transport, req, 'test',
+                                       {'messages': []},
+                                       callback=results.append)
+            self.assertEqual({'resources': ['/v2/1']}, future.result())
+
+        self.transport.executor.shutdown()
+        self.assertEqual([future], results)
+
+    def test_queue_get_callback_gets_exception(self):
+        results = []
+        with mock.patch.object(self.transport, 'send',
+                               autospec=True) as send_method:
+            send_method.side_effect = errors.ResourceNotFound()
+
+            req = request.Request()
+            future = core.queue_get(self.transport, req, 'test',
+                                    results.append)
+            self.assertRaises(errors.ResourceNotFound, future.result)
+
+        self.transport.executor.shutdown()
+        self.assertEqual([future], results)
+        self.assertIsInstance(results[0].exception(),
+                              errors.ResourceNotFound)
+
+    def test_queue_exists_with_callback(self):
+        results = []
+        with mock.patch.object(self.transport, 'send',
+                               autospec=True) as send_method:
+            send_method.side_effect = errors.ResourceNotFound()
+
+            req = request.Request()
+            future = core.queue_exists(self.transport, req, 'test',
+                                       callback=results.append)
+            self.assertFalse(future.result())
+
+        self.transport.executor.shutdown()
+        self.assertFalse(results[0].result())
@@ -0,0 +1,125 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+import threading
+from unittest import mock
+
+from zaqarclient.tests.queues import base
+from zaqarclient.transport import errors
+from zaqarclient.transport import response
+
+
+class TestBatchingProducer(base.QueuesTestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.batches = []
+        patcher = mock.patch.object(self.transport, 'send', autospec=True,
+                                    side_effect=self._post)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _post(self, req):
+        messages = json.loads(req.content)['messages']
+        start = sum(len(batch) for batch in self.batches)
+        self.batches.append(messages)
+        hrefs = ['/v2/queues/1/messages/%d' % (start + i)
+                 for i in range(len(messages))]
+        return response.Response(req, json.dumps({'resources': hrefs}))
+
+    def test_flush_on_max_messages(self):
+        producer = self.queue.producer(max_messages=2, linger=60)
+        self.addCleanup(producer.close)
+
+        first = producer.post({'body': 1, 'ttl': 60})
+        second = producer.post({'body': 2, 'ttl': 60})
+
+        self.assertEqual([[{'body': 1, 'ttl': 60},
+                           {'body': 2, 'ttl': 60}]], self.batches)
+        self.assertEqual('0', first.result(0))
+        self.assertEqual('1', second.result(0))
+
+    def test_flush_on_max_bytes(self):
+        message = {'body': 'x' * 100, 'ttl': 60}
+        size = len(json.dumps(message)) + 1
+        producer = self.queue.producer(max_messages=10,
+                                       max_bytes=16 + size * 2,
+                                       linger=60)
+        self.addCleanup(producer.close)
+
+        for _ in range(3):
+            producer.post(message)
+        self.assertEqual([2], [len(batch) for batch in self.batches])
+
+    def test_max_bytes_is_body_size(self):
+        message = {'body': 'é' * 10, 'ttl': 60}
+        body = json.dumps({'messages': [message, message]}).encode('utf-8')
+        producer = self.queue.producer(max_messages=10,
+                                       max_bytes=len(body), linger=60)
+        self.addCleanup(producer.close)
+
+        for _ in range(3):
+            producer.post(message)
+        self.assertEqual([2], [len(batch) for batch in self.batches])
+
+    def test_batches_in_order(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        post = self._post
+
+        def slow_post(req):
+            if not self.batches and not release.is_set():
+                release.wait(5)
+            return post(req)
+
+        self.transport.send.side_effect = slow_post
+        producer = self.queue.producer(max_messages=1)
+        first = threading.Thread(target=producer.post, args=({'body': 1},))
+        first.start()
+        while not producer._send_lock.locked():
+            release.wait(0.01)
+
+        second = threading.Thread(target=producer.post, args=({'body': 2},))
+        second.start()
+        second.join(0.1)
+        release.set()
+        first.join(5)
+        second.join(5)
+
+        self.assertEqual([[{'body': 1}], [{'body': 2}]], self.batches)
+
+    def test_message_too_big(self):
+        producer = self.queue.producer(max_bytes=32)
+        self.assertRaises(ValueError, producer.post,
+                          {'body': 'x' * 100, 'ttl': 60})
+
+    def test_flush_on_linger(self):
+        producer = self.queue.producer(max_messages=10, linger=0.01)
+        self.addCleanup(producer.close)
+
+        future = producer.post({'body': 1, 'ttl': 60})
+        self.assertEqual('0', future.result(5))
+        self.assertEqual(1, len(self.batches))
+
+    def test_close_flushes(self):
+        with self.queue.producer(linger=60) as producer:
+            futures = [producer.post({'body': i}) for i in range(3)]
+
+        self.assertEqual(['0', '1', '2'], [f.result(0) for f in futures])
+        self.assertEqual(1, len(self.batches))
+
+    def test_failed_post(self):
+        self.transport.send.side_effect = errors.ServiceUnavailableError()
+        producer = self.queue.producer(max_messages=1)
+        future = producer.post({'body': 1})
+        self.assertRaises(errors.ServiceUnavailableError, future.result, 0)
@@ -0,0 +1,136 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import queue
+import threading
+import time
+from unittest import mock
+
+from zaqarclient.tests.queues import base
+from zaqarclient.tests.transport import ws as fake_ws
+from zaqarclient.transport import ws
+
+WS_URL = 'ws://127.0.0.1:9000'
+
+
+class TestPushConsumer(base.QueuesTestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.conf['auth_opts']['options']['os_auth_token'] = 'FAKE_TOKEN'
+        self.sockets = []
+        patcher = mock.patch.object(ws.WebsocketTransport,
+                                    '_create_connection',
+                                    side_effect=self._connect)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.received = queue.Queue()
+
+    def _connect(self, endpoint, timeout=None):
+        sock = fake_ws.FakeWebsocket(bodies={
+            'subscription_create': {
+                'subscription_id': 'sub-%d' % len(self.sockets)},
+        })
+        self.sockets.append(sock)
+        return sock
+
+    def _subscribe(self, **kwargs):
+        consumer = self.queue.subscribe_ws(self.received.put, url=WS_URL,
+                                           **kwargs)
+        self.addCleanup(consumer.close)
+        return consumer
+
+    def test_subscribe(self):
+        consumer = self._subscribe(ttl=60)
+        self.assertEqual('sub-0', consumer.subscription_id)
+
+        actions = [msg['action'] for msg in self.sockets[0].sent]
+        self.assertEqual(['authenticate', 'subscription_create'], actions)
+        self.assertEqual({'queue_name': 1, 'ttl': 60, 'options': {}},
+                         self.sockets[0].sent[1]['body'])
+
+    def test_dispatch(self):
+        self._subscribe()
+        self.sockets[0].push({'body': {'event': 'BackupStarted'}})
+        self.assertEqual({'body': {'event': 'BackupStarted'}},
+                         self.received.get(timeout=5))
+
+    def test_overflow(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        handled = []
+
+        def callback(message):
+            release.wait(5)
+            handled.append(message)
+
+        consumer = self.queue.subscribe_ws(callback, url=WS_URL,
+                                           max_workers=1, max_pending=1)
+        for i in range(3):
+            self.sockets[0].push({'body': i})
+
+        # The reader isn't blocked by the callback, it drops
+        # the messages the worker can't take.
+        for _ in range(500):
+            if consumer.dropped == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(2, consumer.dropped)
+        self.assertEqual(0, self.sockets[0]._frames.qsize())
+
+        release.set()
+        consumer.close()
+        self.assertEqual([{'body': 0}], handled)
+
+    def test_renew(self):
+        consumer = self._subscribe(ttl=0.2)
+        for _ in range(500):
+            actions = [msg['action'] for msg in self.sockets[0].sent]
+            if actions.count('subscription_create') > 1:
+                break
+            time.sleep(0.01)
+
+        self.assertEqual(['authenticate', 'subscription_create',
+                          'subscription_delete', 'subscription_create'],
+                         actions[:4])
+        self.assertEqual({'queue_name': 1, 'subscription_id': 'sub-0'},
+                         self.sockets[0].sent[2]['body'])
+        consumer.close()
+
+    def test_resubscribe(self):
+        self.conf['ws_opts'] = {'reconnect_backoff': 0.01}
+        consumer = self._subscribe()
+        self.sockets[0].close()
+
+        for _ in range(500):
+            if consumer.subscription_id == 'sub-1':
+                break
+            time.sleep(0.01)
+        self.assertEqual('sub-1', consumer.subscription_id)
+
+        self.sockets[1].push({'body': 'again'})
+        self.assertEqual({'body': 'again'}, self.received.get(timeout=5))
+
+    def test_close(self):
+        consumer = self._subscribe()
+        consumer.close()
+
+        sent = self.sockets[0].sent[-1]
+        self.assertEqual('subscription_delete', sent['action'])
+        self.assertEqual({'queue_name': 1, 'subscription_id': 'sub-0'},
+                         sent['body'])
+        self.assertTrue(self.sockets[0].closed)
+        self.assertEqual(1, len(self.sockets))
+
+    def test_url_required(self):
+        self.assertRaises(ValueError, self.queue.subscribe_ws,
+                          self.received.put)
@@ -14,8 +14,10 @@
 # limitations under the License.
 
 from zaqarclient import errors
+from zaqarclient.queues.v2 import api as api_v2
 from zaqarclient.tests import base
 from zaqarclient.tests.transport import api as tapi
+from zaqarclient.transport import api
 
 
 class TestApi(base.TestBase):
@@ -39,3 +41,69 @@ class TestApi(base.TestBase):
     def test_invalid_operation(self):
         self.assertRaises(errors.InvalidOperation, self.api.validate,
                           'super_secret_op', {})
+
+    def test_get_route(self):
+        route = self.api.get_route('test_operation')
+        self.assertEqual('GET', route.method)
+        self.assertEqual(frozenset(['name']), route.fields)
+        self.assertIs(route, self.api.get_route('test_operation'))
+
+    def test_get_route_invalid_operation(self):
+        self.assertRaises(errors.InvalidOperation, self.api.get_route,
+                          'super_secret_op')
+
+    def test_is_idempotent(self):
+        self.assertTrue(self.api.is_idempotent('test_operation'))
+
+    def test_is_idempotent_v2(self):
+        v2 = api_v2.V2()
+        self.assertTrue(v2.is_idempotent('queue_create'))
+        self.assertTrue(v2.is_idempotent('message_delete_many'))
+        self.assertFalse(v2.is_idempotent('message_post'))
+        self.assertFalse(v2.is_idempotent('claim_create'))
+        self.assertFalse(v2.is_idempotent('message_pop'))
+
+    def test_is_safe(self):
+        v2 = api_v2.V2()
+        self.assertTrue(v2.is_safe('message_get'))
+        self.assertFalse(v2.is_safe('message_delete'))
+        self.assertFalse(v2.is_safe('super_secret_op'))
+
+    def test_get_ws_format(self):
+        v2 = api_v2.V2()
+        self.assertEqual({'params': {'ids': 'message_ids'}},
+                         v2.get_ws_format('message_get_many'))
+        self.assertEqual({}, v2.get_ws_format('message_list'))
+        self.assertEqual({}, v2.get_ws_format('super_secret_op'))
+
+
+class TestRoute(base.TestBase):
+
+    def test_build(self):
+        route = api.Route('queues/{queue_name}/messages/{message_id}')
+        params = {'queue_name': 'q', 'message_id': 'm', 'limit': 1}
+        self.assertEqual('queues/q/messages/m', route.build(params))
+        self.assertEqual({'limit': 1}, params)
+
+    def test_build_sequence(self):
+        route = api.Route('queues/{queue_name}/messages/{ids}')
+        params = {'queue_name': 'q', 'ids': ['1', '2']}
+        self.assertEqual('queues/q/messages/1,2', route.build(params))
+
+    def test_build_static(self):
+        route = api.Route('queues')
+        params = {'limit': 1}
+        self.assertEqual('queues', route.build(params))
+        self.assertEqual({'limit': 1}, params)
+
+    def test_compile_ref_strips_label_prefix(self):
+        route = api.compile_ref('/v2/queues?marker=v2', 'v2')
+        self.assertEqual('queues?marker=v2', route.template)
+
+        # Only the prefix must go away,
+        # characters of the label in the path must stay.
+        route = api.compile_ref('/v2/2v-queue/messages', 'v2')
+        self.assertEqual('2v-queue/messages', route.template)
+
+        route = api.compile_ref('v2queues', 'v2')
+        self.assertEqual('v2queues', route.template)
@@ -0,0 +1,123 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import threading
+from unittest import mock
+
+import aiohttp
+
+from zaqarclient.tests import base
+from zaqarclient.tests.transport import api
+from zaqarclient.transport import async_http
+from zaqarclient.transport import errors
+from zaqarclient.transport import request
+
+
+class FakeResponse:
+
+    def __init__(self, status=200, text='', headers=None):
+        self.status = status
+        self._text = text
+        self.headers = headers or {}
+
+    async def read(self):
+        return self._text.encode('utf-8')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+class TestAsyncHttpTransport(base.TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.api = api.FakeApi()
+        self.transport = async_http.AsyncHttpTransport(self.conf)
+        self.session = mock.Mock()
+        self.transport._get_session = mock.Mock(return_value=self.session)
+
+    def test_basic_send(self):
+        params = {'name': 'Test',
+                  'address': 'Outer space',
+                  'detailed': True}
+        req = request.Request('http://example.org/',
+                              operation='test_operation',
+                              params=params)
+        req._api = self.api
+        self.session.request.return_value = FakeResponse(text='{"a": 1}')
+
+        resp = asyncio.run(self.transport.send(req))
+
+        self.assertEqual({'a': 1}, resp.deserialized_content)
+        self.session.request.assert_called_with(
+            'GET', 'http://example.org/v2/test/Test',
+            params=[('address', 'Outer space'), ('detailed', 'True')],
+            headers={'content-type': 'application/json'},
+            data=None,
+            ssl=True,
+            timeout=aiohttp.ClientTimeout(connect=None, sock_read=None))
+
+    def test_error_handling(self):
+        for status, exception in self.transport.http_to_zaqar.items():
+            req = request.Request('http://example.org/',
+                                  operation='test_operation',
+                                  params={'name': 'Opportunity'})
+            req._api = self.api
+            self.session.request.return_value = FakeResponse(status=status)
+            self.assertRaises(exception, asyncio.run,
+                              self.transport.send(req))
+
+    def test_not_found_description(self):
+        req = request.Request('http://example.org/')
+        self.session.request.return_value = FakeResponse(
+            status=404, text='{"title": "Not Found", "description": "x"}')
+        ex = self.assertRaises(errors.ResourceNotFound, asyncio.run,
+                               self.transport.send(req))
+        self.assertIn('Not Found', str(ex))
+
+    def test_reauthenticate(self):
+        threads = []
+
+        def authenticate(api_version, req):
+            threads.append(threading.current_thread())
+            return req
+
+        req = request.Request('http://example.org/')
+        req.auth_backend = mock.Mock(authenticate=authenticate)
+        self.session.request.side_effect = [FakeResponse(status=401),
+                                            FakeResponse(text='{}')]
+
+        resp = asyncio.run(self.transport.send(req))
+        self.assertEqual({}, resp.deserialized_content)
+        req.auth_backend.invalidate.assert_called_once_with()
+        self.assertEqual(1, len(threads))
+        self.assertIsNot(threading.current_thread(), threads[0])
+
+    def test_cleanup(self):
+        transport = async_http.AsyncHttpTransport({})
+        transport.cleanup()
+
+    def test_close(self):
+        executor = self.transport._lazy_executor = mock.Mock()
+        hedge_policy = self.transport._lazy_hedge_policy = mock.Mock()
+        self.session.close = mock.AsyncMock()
+        self.transport._session = self.session
+
+        asyncio.run(self.transport.close())
+        executor.shutdown.assert_called_once_with(wait=False)
+        hedge_policy.shutdown.assert_called_once_with(wait=False)
+        self.session.close.assert_awaited_once_with()
+        self.assertIsNone(self.transport._session)
@@ -0,0 +1,208 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import threading
+import time
+from unittest import mock
+
+from zaqarclient import errors
+from zaqarclient.tests import base
+from zaqarclient.tests.transport import api
+from zaqarclient.transport import balancer
+from zaqarclient.transport import errors as transport_errors
+from zaqarclient.transport import request
+
+URLS = ['http://zaqar-1:8888', 'http://zaqar-2:8888', 'http://zaqar-3:8888']
+
+
+class TestBalancer(base.TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = 1000.0
+        patcher = mock.patch.object(time, 'monotonic',
+                                    side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, balancer.Balancer, [])
+        self.assertRaises(ValueError, balancer.Balancer, URLS,
+                          strategy='random')
+
+    def test_least_outstanding(self):
+        lb = balancer.Balancer(URLS[:2])
+        lb.start(URLS[0])
+        lb.start(URLS[0])
+        for _ in range(10):
+            self.assertEqual(URLS[1], lb.choose())
+
+    def test_ewma(self):
+        lb = balancer.Balancer(URLS[:2], strategy=balancer.EWMA)
+        for url, latency in ((URLS[0], 1.0), (URLS[1], 0.1)):
+            lb.start(url)
+            lb.finish(url, latency, False)
+        for _ in range(10):
+            self.assertEqual(URLS[1], lb.choose())
+
+        lb.start(URLS[1])
+        lb.finish(URLS[1], 2.0, False)
+        self.assertAlmostEqual(0.67, lb.stats()[URLS[1]]['latency'])
+
+    def test_exclude(self):
+        lb = balancer.Balancer(URLS)
+        for _ in range(10):
+            self.assertEqual(URLS[2], lb.choose(exclude=URLS[:2]))
+        self.assertIsNone(lb.choose(exclude=URLS))
+
+    def test_ejection(self):
+        lb = balancer.Balancer(URLS[:2], max_failures=2, ejection_time=10)
+        for _ in range(2):
+            lb.start(URLS[0])
+            lb.finish(URLS[0], 0.1, True)
+
+        self.assertTrue(lb.stats()[URLS[0]]['ejected'])
+        for _ in range(10):
+            self.assertEqual(URLS[1], lb.choose())
+
+        # Without a probe, endpoints are
+        # reinstated once the ejection time is over.
+        self.now += 10
+        lb.choose()
+        self.assertFalse(lb.stats()[URLS[0]]['ejected'])
+
+    def test_success_resets_failures(self):
+        lb = balancer.Balancer(URLS[:2], max_failures=2)
+        for failed in (True, False, True):
+            lb.start(URLS[0])
+            lb.finish(URLS[0], 0.1, failed)
+        self.assertFalse(lb.stats()[URLS[0]]['ejected'])
+
+    def test_all_ejected(self):
+        lb = balancer.Balancer(URLS[:2], max_failures=1, ejection_time=10)
+        lb.finish(URLS[0], 0.1, True)
+        self.now += 1
+        lb.finish(URLS[1], 0.1, True)
+        self.assertEqual(URLS[0], lb.choose())
+
+    def test_probe(self):
+        probed = threading.Event()
+        healthy = []
+
+        def probe(url):
+            probed.set()
+            return bool(healthy)
+
+        lb = balancer.Balancer(URLS[:2], max_failures=1, ejection_time=10,
+                               probe=probe)
+        lb.finish(URLS[0], 0.1, True)
+        self.now += 10
+
+        lb.choose()
+        self.assertTrue(probed.wait(5))
+        for _ in range(50):
+            if not lb._nodes[URLS[0]].probing:
+                break
+            time.sleep(0.01)
+        self.assertTrue(lb.stats()[URLS[0]]['ejected'])
+
+        probed.clear()
+        healthy.append(True)
+        self.now += 10
+        lb.choose()
+        self.assertTrue(probed.wait(5))
+        for _ in range(50):
+            if not lb.stats()[URLS[0]]['ejected']:
+                break
+            time.sleep(0.01)
+        self.assertFalse(lb.stats()[URLS[0]]['ejected'])
+
+
+class TestBalancedTransport(base.TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.balancer = balancer.Balancer(URLS[:2])
+        self.transports = {url: mock.Mock(connection_errors=(OSError,))
+                           for url in URLS[:2]}
+
+    def _get_transport(self, req):
+        return self.transports[req.endpoint]
+
+    def _send(self, operation='test_operation', failover=1):
+        req = request.Request(URLS[0], operation=operation)
+        req._api = api.FakeApi()
+        trans = balancer.BalancedTransport(self.balancer,
+                                           self._get_transport,
+                                           self.transports[URLS[0]],
+                                           failover=failover)
+        return req, trans.send(req)
+
+    def test_send(self):
+        self.transports[URLS[0]].send.return_value = 'ok'
+        req, resp = self._send()
+        self.assertEqual('ok', resp)
+        self.assertEqual(0, self.balancer.stats()[URLS[0]]['outstanding'])
+        self.assertIsNotNone(self.balancer.stats()[URLS[0]]['latency'])
+
+    def test_failover(self):
+        self.transports[URLS[0]].send.side_effect = OSError
+        self.transports[URLS[1]].send.return_value = 'ok'
+        req, resp = self._send()
+        self.assertEqual('ok', resp)
+        self.assertEqual(URLS[1], req.endpoint)
+        self.assertEqual(1, self.balancer.stats()[URLS[0]]['failures'])
+
+    def test_failover_circuit_open(self):
+        self.transports[URLS[0]].send.side_effect = errors.CircuitOpenError(
+            URLS[0])
+        self.transports[URLS[1]].send.return_value = 'ok'
+        with mock.patch.object(api.FakeApi, 'is_idempotent',
+                               return_value=False):
+            req, resp = self._send()
+        self.assertEqual('ok', resp)
+        self.assertEqual(0, self.balancer.stats()[URLS[0]]['failures'])
+
+    def test_no_failover_not_idempotent(self):
+        self.transports[URLS[0]].send.side_effect = OSError
+        with mock.patch.object(api.FakeApi, 'is_idempotent',
+                               return_value=False):
+            self.assertRaises(OSError, self._send)
+        self.transports[URLS[1]].send.assert_not_called()
+
+    def test_no_failover_client_error(self):
+        self.transports[URLS[0]].send.side_effect = \
+            transport_errors.ResourceNotFound
+        self.assertRaises(transport_errors.ResourceNotFound, self._send)
+        self.transports[URLS[1]].send.assert_not_called()
+
+    def test_failover_limit(self):
+        for trans in self.transports.values():
+            trans.send.side_effect = OSError
+        self.assertRaises(OSError, self._send, failover=5)
+        self.assertEqual(1, self.transports[URLS[1]].send.call_count)
+
+    def test_delegates(self):
+        trans = balancer.BalancedTransport(self.balancer,
+                                           self._get_transport,
+                                           self.transports[URLS[0]])
+        self.assertIs(self.transports[URLS[0]].executor, trans.executor)
+
+    def test_hedge_endpoint(self):
+        self.transports[URLS[0]].send.return_value = 'ok'
+        req, resp = self._send()
+        self.assertEqual(URLS[1], req.hedge_endpoint)
+
+        self.transports[URLS[0]].hedge_policy.should_hedge.return_value = \
+            False
+        req, resp = self._send()
+        self.assertIsNone(req.hedge_endpoint)
@@ -0,0 +1,189 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import time
+from unittest import mock
+
+from zaqarclient import errors
+from zaqarclient.tests import base
+from zaqarclient.transport import circuit
+from zaqarclient.transport import errors as transport_errors
+from zaqarclient.transport import request
+
+
+class TestCircuitBreaker(base.TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = 1000.0
+        patcher = mock.patch.object(time, 'monotonic',
+                                    side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.breaker = circuit.CircuitBreaker('http://zaqar:8888',
+                                              window_size=4,
+                                              minimum_calls=4,
+                                              failure_rate=0.5,
+                                              open_duration=10)
+
+    def _calls(self, *outcomes):
+        for failed in outcomes:
+            self.breaker.acquire()
+            self.breaker.record(failed, 0.1)
+
+    def test_opens_on_failure_rate(self):
+        self._calls(False, True, False)
+        self.assertEqual(circuit.CLOSED, self.breaker.state)
+
+        self._calls(True)
+        self.assertEqual(circuit.OPEN, self.breaker.state)
+        self.assertRaises(errors.CircuitOpenError, self.breaker.acquire)
+
+    def test_window_slides(self):
+        self._calls(True, False, False, False, False, False, True)
+        self.assertEqual(circuit.CLOSED, self.breaker.state)
+
+    def test_half_open_success(self):
+        self._calls(True, True, True, True)
+        self.now += 10
+        self.assertEqual(circuit.HALF_OPEN, self.breaker.state)
+
+        self.breaker.acquire()
+        # Only one trial at a time.
+        self.assertRaises(errors.CircuitOpenError, self.breaker.acquire)
+
+        self.breaker.record(False, 0.1)
+        self.assertEqual(circuit.CLOSED, self.breaker.state)
+        self.assertEqual(0, self.breaker.stats()['calls'])
+
+    def test_half_open_failure(self):
+        self._calls(True, True, True, True)
+        self.now += 10
+        self._calls(True)
+        self.assertEqual(circuit.OPEN, self.breaker.state)
+
+        ex = self.assertRaises(errors.CircuitOpenError,
+                               self.breaker.acquire)
+        self.assertEqual(10, ex.retry_in)
+
+    def test_slow_calls(self):
+        breaker = circuit.CircuitBreaker('http://zaqar:8888',
+                                         minimum_calls=2,
+                                         slow_call_duration=1,
+                                         slow_call_rate=1.0)
+        breaker.record(False, 1.5)
+        breaker.record(False, 0.5)
+        self.assertEqual(circuit.CLOSED, breaker.state)
+        breaker.record(False, 2)
+        breaker.record(False, 2)
+        self.assertEqual(circuit.CLOSED, breaker.state)
+
+        breaker = circuit.CircuitBreaker('http://zaqar:8888',
+                                         minimum_calls=2,
+                                         slow_call_duration=1,
+                                         slow_call_rate=1.0)
+        breaker.record(False, 2)
+        breaker.record(False, 2)
+        self.assertEqual(circuit.OPEN, breaker.state)
+
+
+class TestCircuitBreakers(base.TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.breakers = circuit.CircuitBreakers(enabled=True,
+                                                minimum_calls=2,
+                                                failure_rate=1.0)
+
+    def test_disabled(self):
+        breakers = circuit.CircuitBreakers()
+        func = mock.Mock(side_effect=transport_errors.InternalServerError)
+        req = request.Request('http://zaqar:8888/')
+        for _ in range(20):
+            self.assertRaises(transport_errors.InternalServerError,
+                              breakers.call, func, req)
+        self.assertEqual({}, breakers.stats())
+
+    def test_per_endpoint(self):
+        failing = mock.Mock(side_effect=transport_errors.BadGatewayError)
+        req = request.Request('http://zaqar-1:8888/')
+        for _ in range(2):
+            self.assertRaises(transport_errors.BadGatewayError,
+                              self.breakers.call, failing, req)
+        self.assertRaises(errors.CircuitOpenError,
+                          self.breakers.call, failing, req)
+        self.assertEqual(2, failing.call_count)
+
+        other = request.Request('http://zaqar-2:8888/v2')
+        self.assertEqual('ok', self.breakers.call(mock.Mock(
+            return_value='ok'), other))
+
+        stats = self.breakers.stats()
+        self.assertEqual(circuit.OPEN, stats['http://zaqar-1:8888']['state'])
+        self.assertEqual(circuit.CLOSED,
+                         stats['http://zaqar-2:8888']['state'])
+
+    def test_client_errors_are_not_failures(self):
+        func = mock.Mock(side_effect=transport_errors.ResourceNotFound)
+        req = request.Request('http://zaqar:8888/')
+        for _ in range(5):
+            self.assertRaises(transport_errors.ResourceNotFound,
+                              self.breakers.call, func, req)
+        self.assertEqual(5, func.call_count)
+
+    def test_connection_errors(self):
+        func = mock.Mock(side_effect=ConnectionResetError)
+        req = request.Request('http://zaqar:8888/')
+        for _ in range(2):
+            self.assertRaises(ConnectionResetError, self.breakers.call,
+                              func, req, (ConnectionResetError,))
+        self.assertRaises(errors.CircuitOpenError, self.breakers.call,
+                          func, req, (ConnectionResetError,))
+
+    def test_call_async(self):
+        func = mock.AsyncMock(side_effect=transport_errors.GatewayTimeoutError)
+        req = request.Request('http://zaqar:8888/')
+
+        async def call():
+            return await self.breakers.call_async(func, req)
+
+        for _ in range(2):
+            self.assertRaises(transport_errors.GatewayTimeoutError,
+                              asyncio.run, call())
+        self.assertRaises(errors.CircuitOpenError, asyncio.run, call())
+
+    def test_cancelled_trial(self):
+        breakers = circuit.CircuitBreakers(enabled=True, minimum_calls=1,
+                                           failure_rate=1.0,
+                                           open_duration=0)
+        req = request.Request('http://zaqar:8888/')
+        self.assertRaises(transport_errors.BadGatewayError, breakers.call,
+                          mock.Mock(side_effect=transport_errors.
+                                    BadGatewayError), req)
+
+        async def cancelled(request):
+            raise asyncio.CancelledError()
+
+        async def call():
+            return await breakers.call_async(cancelled, req)
+
+        self.assertRaises(asyncio.CancelledError, asyncio.run, call())
+        self.assertEqual(circuit.HALF_OPEN,
+                         breakers.stats()['http://zaqar:8888']['state'])
+
+        # The cancelled trial gave its slot back.
+        self.assertEqual('ok', breakers.call(mock.Mock(return_value='ok'),
+                                             req))
+        self.assertEqual(circuit.CLOSED,
+                         breakers.stats()['http://zaqar:8888']['state'])
@@ -0,0 +1,112 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import time
+from unittest import mock
+
+from zaqarclient import errors
+from zaqarclient.queues.v2 import api as api_v2
+from zaqarclient.tests import base
+from zaqarclient.transport import deadline
+from zaqarclient.transport import errors as transport_errors
+from zaqarclient.transport import http
+from zaqarclient.transport import request
+from zaqarclient.transport import retry
+
+
+class TestDeadline(base.TestBase):
+
+    def test_no_deadline(self):
+        self.assertIsNone(deadline.current())
+        self.assertFalse(deadline.expired(None))
+
+    def test_deadline(self):
+        with deadline.deadline(10) as when:
+            self.assertEqual(when, deadline.current())
+            self.assertFalse(deadline.expired(when))
+        self.assertIsNone(deadline.current())
+
+    def test_nested_deadline_never_extends(self):
+        with deadline.deadline(1) as outer:
+            with deadline.deadline(10) as inner:
+                self.assertEqual(outer, inner)
+            with deadline.deadline(0.5) as inner:
+                self.assertLess(inner, outer)
+                self.assertEqual(inner, deadline.current())
+            self.assertEqual(outer, deadline.current())
+
+    def test_expired(self):
+        self.assertTrue(deadline.expired(time.monotonic() - 1))
+
+    def test_request_is_stamped(self):
+        with deadline.deadline(10) as when:
+            req = request.prepare_request(self.conf['auth_opts'],
+                                          endpoint='http://example.org')
+        self.assertEqual(when, req.deadline)
+
+
+class TestGetTimeout(base.TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.transport = http.HttpTransport(self.conf)
+        self.request = request.Request('http://example.org',
+                                       operation='queue_delete')
+        self.request._api = api_v2.V2()
+
+    def test_defaults(self):
+        req = request.Request('http://example.org')
+        self.assertEqual((None, None), self.transport.get_timeout(req))
+        self.assertEqual((None, None),
+                         self.transport.get_timeout(self.request))
+
+    def test_schema_timeout(self):
+        self.conf['timeout_opts'] = {'connect': 10, 'read': 60}
+        transport = http.HttpTransport(self.conf)
+        self.assertEqual((10, 300), transport.get_timeout(self.request))
+
+    def test_conf_timeout(self):
+        self.conf['timeout_opts'] = {
+            'connect': 2,
+            'read': 5,
+            'operations': {'queue_delete': {'read': 30}},
+        }
+        transport = http.HttpTransport(self.conf)
+        self.assertEqual((2, 30), transport.get_timeout(self.request))
+
+    def test_clipped_by_deadline(self):
+        self.request.deadline = time.monotonic() + 1
+        connect, read = self.transport.get_timeout(self.request)
+        self.assertLessEqual(connect, 1)
+        self.assertLessEqual(read, 1)
+
+    def test_deadline_exceeded(self):
+        self.request.deadline = time.monotonic() - 1
+        self.assertRaises(errors.DeadlineExceeded,
+                          self.transport.get_timeout, self.request)
+
+
+class TestRetryDeadline(base.TestBase):
+
+    @mock.patch.object(time, 'sleep')
+    def test_no_retry_past_deadline(self, sleep):
+        policy = retry.RetryPolicy(max_retries=3, backoff=10,
+                                   max_backoff=10)
+        req = request.Request(operation='queue_get')
+        req.deadline = time.monotonic() + 0.001
+        func = mock.Mock(side_effect=transport_errors.ServiceUnavailableError)
+
+        with mock.patch('random.uniform', return_value=5):
+            self.assertRaises(transport_errors.ServiceUnavailableError,
+                              policy.call, func, req, True)
+        self.assertEqual(1, func.call_count)
+        self.assertFalse(sleep.called)
@@ -0,0 +1,211 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import threading
+from unittest import mock
+
+from zaqarclient.queues.v2 import api as api_v2
+from zaqarclient.tests import base
+from zaqarclient.transport import errors
+from zaqarclient.transport import hedge
+from zaqarclient.transport import request
+
+SLOW = 'http://slow:8888'
+FAST = 'http://fast:8888'
+
+
+class TestLatencyTracker(base.TestBase):
+
+    def test_percentile(self):
+        tracker = hedge.LatencyTracker(window_size=100)
+        self.assertIsNone(tracker.percentile('message_get', 95))
+        for latency in range(1, 101):
+            tracker.record('message_get', latency / 1000.0)
+        self.assertEqual(0.095, tracker.percentile('message_get', 95))
+        self.assertEqual(0.1, tracker.percentile('message_get', 100))
+        self.assertEqual(0.001, tracker.percentile('message_get', 0))
+
+    def test_window(self):
+        tracker = hedge.LatencyTracker(window_size=10)
+        for latency in range(20):
+            tracker.record('message_get', latency)
+        self.assertEqual(10, tracker.count('message_get'))
+        self.assertEqual(10, tracker.percentile('message_get', 0))
+
+
+class TestHedgePolicy(base.TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.policy = hedge.HedgePolicy(enabled=True, min_samples=5,
+                                        min_delay=0.01)
+        for _ in range(5):
+            self.policy.tracker.record('message_get', 0.01)
+
+        self.request = request.Request(SLOW, operation='message_get')
+        self.request._api = api_v2.V2()
+        self.request.hedge_endpoint = FAST
+
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def _send(self, req):
+        if req.endpoint == SLOW:
+            self.release.wait(5)
+            return mock.Mock(endpoint=SLOW)
+        return mock.Mock(endpoint=FAST)
+
+    def test_should_hedge(self):
+        self.assertTrue(self.policy.should_hedge(self.request))
+
+        self.request.operation = 'message_delete'
+        self.assertFalse(self.policy.should_hedge(self.request))
+
+        self.request.operation = 'message_get'
+        self.policy.enabled = False
+        self.assertFalse(self.policy.should_hedge(self.request))
+
+    def test_not_enough_samples(self):
+        policy = hedge.HedgePolicy(enabled=True, min_samples=10)
+        func = mock.Mock(return_value='ok')
+        self.assertEqual('ok', policy.call(func, self.request))
+        func.assert_called_once_with(self.request)
+        self.assertEqual(1, policy.tracker.count('message_get'))
+
+    def test_fast_answer(self):
+        func = mock.Mock(return_value='ok')
+        self.assertEqual('ok', self.policy.call(func, self.request))
+        func.assert_called_once_with(self.request)
+
+    def test_hedge_wins(self):
+        resp = self.policy.call(self._send, self.request)
+        self.assertEqual(FAST, resp.endpoint)
+        self.assertEqual(SLOW, self.request.endpoint)
+
+        # The slow answer is released once it comes.
+        self.release.set()
+        self.policy._get_executor().shutdown(wait=True)
+
+    def test_single_endpoint(self):
+        self.request.hedge_endpoint = None
+        func = mock.Mock(return_value='ok')
+        self.assertEqual('ok', self.policy.call(func, self.request))
+        func.assert_called_once_with(self.request)
+
+        self.request.hedge_endpoint = SLOW
+        self.assertEqual('ok', self.policy.call(func, self.request))
+        self.assertEqual(2, func.call_count)
+
+    def test_first_attempt_not_pooled(self):
+        policy = hedge.HedgePolicy(enabled=True, min_samples=5,
+                                   min_delay=5, max_workers=1)
+        for _ in range(5):
+            policy.tracker.record('message_get', 5)
+
+        names = []
+
+        def send(req):
+            names.append(threading.current_thread().name)
+            return req.endpoint
+
+        self.assertEqual(SLOW, policy.call(send, self.request))
+        self.assertEqual(1, len(names))
+        self.assertTrue(names[0].startswith('zaqarclient-request'))
+        self.assertIsNone(policy._executor)
+
+    def test_stuck_attempts(self):
+        policy = hedge.HedgePolicy(enabled=True, min_samples=5,
+                                   min_delay=0.01, max_attempts=1)
+        self.addCleanup(policy.shutdown, wait=False)
+        for _ in range(5):
+            policy.tracker.record('message_get', 0.01)
+
+        # The slow endpoint never answers, its attempt
+        # keeps the only attempt thread.
+        resp = policy.call(self._send, self.request)
+        self.assertEqual(FAST, resp.endpoint)
+
+        names = []
+
+        def send(req):
+            names.append(threading.current_thread().name)
+            return req.endpoint
+
+        for _ in range(5):
+            self.assertEqual(SLOW, policy.call(send, self.request))
+        self.assertEqual([threading.current_thread().name] * 5, names)
+        self.assertEqual(1, len(policy._attempt_executor._threads))
+
+    def test_no_hedge_while_busy(self):
+        policy = hedge.HedgePolicy(enabled=True, min_samples=5,
+                                   min_delay=0.01, max_workers=1)
+        for _ in range(5):
+            policy.tracker.record('message_get', 0.01)
+
+        hedged = []
+
+        def send(req):
+            if req.endpoint == FAST:
+                hedged.append(req)
+            self.release.wait(5)
+            return req.endpoint
+
+        busy = threading.Thread(target=policy.call,
+                                args=(send, self.request))
+        busy.start()
+        self.addCleanup(busy.join)
+        while not hedged:
+            self.release.wait(0.01)
+
+        # The only hedging thread is taken, the request
+        # waits for its first attempt.
+        threading.Timer(0.1, self.release.set).start()
+        self.assertEqual(SLOW, policy.call(send, self.request))
+        self.assertEqual(1, len(hedged))
+
+    def test_first_error_is_raised(self):
+        def send(req):
+            if req.endpoint == SLOW:
+                self.release.wait(5)
+                raise errors.ServiceUnavailableError()
+            self.release.set()
+            raise errors.InternalServerError()
+
+        self.assertRaises(errors.ServiceUnavailableError,
+                          self.policy.call, send, self.request)
+
+    def test_hedge_fails(self):
+        def send(req):
+            if req.endpoint == SLOW:
+                self.release.wait(5)
+                return 'slow'
+            self.release.set()
+            raise errors.InternalServerError()
+
+        self.assertEqual('slow', self.policy.call(send, self.request))
+
+    def test_call_async(self):
+        cancelled = []
+
+        async def send(req):
+            if req.endpoint == SLOW:
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    cancelled.append(req.endpoint)
+                    raise
+            return req.endpoint
+
+        resp = asyncio.run(self.policy.call_async(send, self.request))
+        self.assertEqual(FAST, resp)
+        self.assertEqual([SLOW], cancelled)
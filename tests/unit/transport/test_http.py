@@ -13,15 +13,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
+import time
 from unittest import mock
 
 import requests as prequest
 from requests.packages.urllib3 import response
 
+from zaqarclient import errors as zaqar_errors
 from zaqarclient.tests import base
 from zaqarclient.tests.transport import api
+from zaqarclient.transport import errors
 from zaqarclient.transport import http
 from zaqarclient.transport import request
+from zaqarclient.transport import response as response_mod
 
 
 class TestHttpTransport(base.TestBase):
@@ -64,7 +69,9 @@ class TestHttpTransport(base.TestBase):
                                               params=final_params,
                                               headers=final_headers,
                                               data=None,
-                                              verify=True)
+                                              verify=True,
+                                              stream=False,
+                                              timeout=(None, None))
 
     @mock.patch.object(prequest.packages.urllib3.response.HTTPResponse,
                        'stream')
@@ -91,7 +98,9 @@ class TestHttpTransport(base.TestBase):
                                               params=params,
                                               headers=final_headers,
                                               data=None,
-                                              verify=True)
+                                              verify=True,
+                                              stream=False,
+                                              timeout=(None, None))
 
     @mock.patch.object(prequest.packages.urllib3.response.HTTPResponse,
                        'stream')
@@ -115,3 +124,196 @@ class TestHttpTransport(base.TestBase):
                 resp.status_code = response_code
                 request_method.return_value = resp
                 self.assertRaises(exception, lambda: self.transport.send(req))
+
+    def test_cleanup(self):
+        executor = self.transport.executor
+        with mock.patch.object(self.transport.client.session,
+                               'close') as close:
+            self.transport.cleanup()
+        close.assert_called_once_with()
+        self.assertRaises(RuntimeError, executor.submit, print)
+
+    def test_http_opts(self):
+        self.config(http_opts={'pool_maxsize': 64})
+        transport = http.HttpTransport(self.conf)
+        self.assertEqual(64, transport.client.adapter._pool_maxsize)
+
+    @mock.patch.object(prequest.packages.urllib3.response.HTTPResponse,
+                       'stream')
+    def test_send_ref(self, mock_stream):
+        req = request.Request('http://example.org/',
+                              operation='test_operation',
+                              ref='/v2/test/2v?marker=v2')
+
+        with mock.patch.object(self.transport.client, 'request',
+                               autospec=True) as request_method:
+
+            resp = prequest.Response()
+            resp.raw = response.HTTPResponse()
+            request_method.return_value = resp
+
+            req._api = self.api
+            self.transport.send(req)
+
+            final_url = 'http://example.org/v2/test/2v?marker=v2'
+            request_method.assert_called_with(
+                'GET', url=final_url, params={},
+                headers={'content-type': 'application/json'},
+                data=None, verify=True, stream=False,
+                timeout=(None, None))
+
+    @mock.patch.object(prequest.packages.urllib3.response.HTTPResponse,
+                       'stream')
+    def test_reauthenticate_on_unauthorized(self, mock_stream):
+        req = request.Request('http://example.org/',
+                              operation='test_operation',
+                              params={'name': 'Test'})
+        req._api = self.api
+        req.auth_backend = mock.Mock()
+
+        with mock.patch.object(self.transport.client, 'request',
+                               autospec=True) as request_method:
+            unauthorized = prequest.Response()
+            unauthorized.raw = response.HTTPResponse()
+            unauthorized.status_code = 401
+            ok = prequest.Response()
+            ok.raw = response.HTTPResponse()
+            ok.status_code = 200
+            request_method.side_effect = [unauthorized, ok]
+
+            resp = self.transport.send(req)
+
+            self.assertEqual(200, resp.status_code)
+            self.assertEqual(2, request_method.call_count)
+            self.assertEqual('http://example.org/v2/test/Test',
+                             request_method.call_args[1]['url'])
+            req.auth_backend.invalidate.assert_called_once_with()
+            req.auth_backend.authenticate.assert_called_once_with(None, req)
+
+    @mock.patch.object(prequest.packages.urllib3.response.HTTPResponse,
+                       'stream')
+    def test_unauthorized_without_backend(self, mock_stream):
+        req = request.Request('http://example.org/')
+
+        with mock.patch.object(self.transport.client, 'request',
+                               autospec=True) as request_method:
+            unauthorized = prequest.Response()
+            unauthorized.raw = response.HTTPResponse()
+            unauthorized.status_code = 401
+            request_method.return_value = unauthorized
+
+            self.assertRaises(errors.UnauthorizedError,
+                              self.transport.send, req)
+            self.assertEqual(1, request_method.call_count)
+
+    def test_send_stream(self):
+        req = request.Request('http://example.org/',
+                              operation='test_operation',
+                              params={'name': 'Test'},
+                              stream=True)
+        req._api = self.api
+
+        with mock.patch.object(self.transport.client, 'request',
+                               autospec=True) as request_method:
+            resp = prequest.Response()
+            resp.raw = io.BytesIO(b'{"messages": [{"id": 1}, {"id": 2}], '
+                                  b'"links": [{"rel": "next"}]}')
+            resp.status_code = 200
+            request_method.return_value = resp
+
+            self.transport.chunk_size = 4
+            result = self.transport.send(req)
+
+            self.assertIsInstance(result, response_mod.StreamingResponse)
+            self.assertTrue(request_method.call_args[1]['stream'])
+
+            records = result.iter_records('messages')
+            self.assertEqual([{'id': 1}, {'id': 2}], list(records))
+            self.assertEqual([{'rel': 'next'}], records.links)
+
+    def test_send_stream_error(self):
+        req = request.Request('http://example.org/',
+                              operation='test_operation',
+                              params={'name': 'Test'},
+                              stream=True)
+        req._api = self.api
+
+        with mock.patch.object(self.transport.client, 'request',
+                               autospec=True) as request_method:
+            resp = prequest.Response()
+            resp.raw = io.BytesIO(b'{"title": "t", "description": "d"}')
+            resp.status_code = 404
+            request_method.return_value = resp
+
+            self.assertRaises(errors.ResourceNotFound,
+                              self.transport.send, req)
+
+    @mock.patch('time.sleep')
+    def test_retry(self, sleep):
+        self.conf['retry_opts'] = {'max_retries': 2}
+        transport = http.HttpTransport(self.conf)
+        req = request.Request('http://example.org/',
+                              operation='test_operation',
+                              params={'name': 'Test'})
+        req._api = self.api
+
+        with mock.patch.object(transport.client, 'request',
+                               autospec=True) as request_method:
+            unavailable = prequest.Response()
+            unavailable.raw = io.BytesIO(b'')
+            unavailable.status_code = 503
+            unavailable.headers['Retry-After'] = '0'
+            ok = prequest.Response()
+            ok.raw = io.BytesIO(b'{}')
+            ok.status_code = 200
+            request_method.side_effect = [unavailable,
+                                          prequest.ConnectionError, ok]
+
+            resp = transport.send(req)
+
+            self.assertEqual(200, resp.status_code)
+            self.assertEqual(3, request_method.call_count)
+            sleep.assert_any_call(0.0)
+
+    @mock.patch('time.sleep')
+    def test_retry_not_idempotent(self, sleep):
+        self.conf['retry_opts'] = {'max_retries': 2}
+        transport = http.HttpTransport(self.conf)
+        req = request.Request('http://example.org/',
+                              operation='test_operation',
+                              params={'name': 'Test'})
+        req._api = self.api
+
+        with mock.patch.object(self.api, 'is_idempotent',
+                               return_value=False), \
+                mock.patch.object(transport.client, 'request',
+                                  autospec=True) as request_method:
+            request_method.side_effect = prequest.ConnectionError
+            self.assertRaises(prequest.ConnectionError, transport.send, req)
+            self.assertEqual(1, request_method.call_count)
+
+    def test_timeout_past_deadline(self):
+        req = request.Request('http://example.org/',
+                              operation='test_operation',
+                              params={'name': 'Test'})
+        req._api = self.api
+        req.deadline = time.monotonic() + 60
+
+        with mock.patch.object(self.transport.client, 'request',
+                               autospec=True) as request_method, \
+                mock.patch('zaqarclient.transport.deadline.expired',
+                           return_value=True):
+            request_method.side_effect = prequest.Timeout
+            self.assertRaises(zaqar_errors.DeadlineExceeded,
+                              self.transport.send, req)
+
+    def test_timeout_before_deadline(self):
+        req = request.Request('http://example.org/',
+                              operation='test_operation',
+                              params={'name': 'Test'})
+        req._api = self.api
+
+        with mock.patch.object(self.transport.client, 'request',
+                               autospec=True) as request_method:
+            request_method.side_effect = prequest.Timeout
+            self.assertRaises(prequest.Timeout, self.transport.send, req)
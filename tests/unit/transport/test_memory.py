@@ -0,0 +1,274 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import copy
+
+from zaqarclient.queues import client
+from zaqarclient.queues.v2 import core
+from zaqarclient.tests import base
+from zaqarclient.tests.queues import claims
+from zaqarclient.tests.queues import flavor
+from zaqarclient.tests.queues import health
+from zaqarclient.tests.queues import pool
+from zaqarclient.tests.queues import queues
+from zaqarclient.tests.queues import subscriptions
+from zaqarclient import transport
+from zaqarclient.transport import errors
+from zaqarclient.transport import memory
+
+
+class MemoryMixin:
+
+    is_functional = False
+    transport_cls = memory.MemoryTransport
+    url = 'memory://functional'
+
+    def setUp(self):
+        super().setUp()
+        transport.register_transport('memory', memory.MemoryTransport)
+        self.addCleanup(transport.unregister_transport, 'memory')
+        self.addCleanup(memory.reset)
+
+
+class TestMemoryTransport(MemoryMixin, base.TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = 1000.0
+        self.store = memory.get_store('test')
+        self.store.clock = lambda: self.now
+        self.client = client.Client('memory://test', 2, self.conf)
+        self.queue = self.client.queue('jobs', force_create=True)
+
+    def _client(self, project_id):
+        conf = copy.deepcopy(self.conf)
+        conf['auth_opts']['options']['os_project_id'] = project_id
+        return client.Client('memory://test', 2, conf)
+
+    def _bodies(self, queue, **params):
+        params.setdefault('echo', True)
+        return [msg.body for msg in queue.messages(**params).stream()]
+
+    def test_queue_list_links(self):
+        for i in range(25):
+            self.client.queue('queue-%02d' % i, force_create=True)
+
+        queues_iter, count = self.client.queues(limit=10, with_count=True)
+        self.assertEqual(26, count)
+        self.assertEqual(['queue-%02d' % i for i in range(25)] + ['jobs'],
+                         sorted([q.name for q in queues_iter.stream()],
+                                key=lambda name: name == 'jobs'))
+
+        page = self.client.follow('/v2/queues?limit=10&marker=queue-23')
+        self.assertEqual(['queue-24'], [q['name'] for q in page['queues']])
+        self.assertEqual([{'rel': 'next',
+                           'href': '/v2/queues?marker=queue-24&limit=10'}],
+                         page['links'])
+
+        page = self.client.follow(page['links'][0]['href'])
+        self.assertEqual({'queues': [], 'links': []}, page)
+
+    def test_message_list_links(self):
+        self.queue.post([{'body': i} for i in range(15)])
+        self.assertEqual(list(range(15)), self._bodies(self.queue, limit=4))
+        self.assertEqual([], self._bodies(self.queue, echo=False))
+
+    def test_message_list_marker(self):
+        self.queue.post([{'body': i, 'ttl': 60 + i % 2 * 60}
+                         for i in range(200)])
+        self.now += 60
+        self.assertEqual(list(range(1, 200, 2)), self._bodies(self.queue))
+
+        self.queue.post({'body': 'new'})
+        page = self.client.follow('/v2/queues/jobs/messages?marker=150'
+                                  '&echo=true&limit=3')
+        self.assertEqual([151, 153, 155],
+                         [msg['body'] for msg in page['messages']])
+
+    def test_stats(self):
+        self.queue.post([{'body': 'claimed'}, {'body': 'deleted'},
+                         {'body': 'delayed', 'delay': 60}])
+        self.assertEqual(1, len(list(self.queue.claim(ttl=60, limit=1))))
+        list(self.queue.messages(echo=True))[0].delete()
+
+        stats = self.queue.stats['messages']
+        self.assertEqual((0, 1, 2), (stats['free'], stats['claimed'],
+                                     stats['total']))
+
+        self.now += 60
+        stats = self.queue.stats['messages']
+        self.assertEqual((2, 0, 2), (stats['free'], stats['claimed'],
+                                     stats['total']))
+
+    def test_message_ttl(self):
+        self.queue.post([{'body': 'short', 'ttl': 60},
+                         {'body': 'long', 'ttl': 120}])
+
+        self.now += 60
+        self.assertEqual(['long'], self._bodies(self.queue))
+        self.assertEqual(1, self.queue.stats['messages']['total'])
+
+    def test_message_delay(self):
+        self.queue.post({'body': 'later', 'delay': 30})
+        self.assertEqual([], self._bodies(self.queue))
+        self.assertEqual(0, self.queue.stats['messages']['free'])
+
+        self.now += 30
+        self.assertEqual(['later'], self._bodies(self.queue))
+
+    def test_default_message_ttl(self):
+        self.queue.metadata(new_meta={'_default_message_ttl': 60})
+        self.queue.post({'body': 'short'})
+        self.assertEqual(60, list(self.queue.messages(echo=True))[0].ttl)
+
+    def test_invalid_message(self):
+        self.assertRaises(errors.MalformedRequest,
+                          self.queue.post, {'body': 1, 'ttl': 10})
+        self.assertRaises(errors.MalformedRequest,
+                          self.queue.post, {'ttl': 60})
+
+    def test_claim_grace(self):
+        self.queue.post({'body': 'task', 'ttl': 60})
+        claim = self.queue.claim(ttl=100, grace=60)
+        self.assertEqual(1, len(list(claim)))
+
+        # Claimed messages outlive
+        # their ttl until the claim's grace is over.
+        self.now += 100
+        self.assertRaises(errors.ResourceNotFound, self.queue.claim,
+                          id=claim.id)
+        self.assertEqual(['task'], self._bodies(self.queue))
+
+        self.now += 60
+        self.assertEqual([], self._bodies(self.queue))
+
+    def test_claim_expires(self):
+        self.queue.post({'body': 'task', 'ttl': 600})
+        first = self.queue.claim(ttl=60, grace=60)
+        self.assertEqual([], list(self.queue.claim(ttl=60, grace=60)))
+
+        self.now += 60
+        second = self.queue.claim(ttl=60, grace=60)
+        msg = list(second)[0]
+        self.assertEqual(2, msg.claim_count)
+        self.assertEqual(second.id, msg.claim_id)
+        self.assertNotEqual(first.id, second.id)
+
+    def test_claim_update_and_delete(self):
+        self.queue.post({'body': 'task', 'ttl': 600})
+        claim = self.queue.claim(ttl=60, grace=60)
+
+        self.now += 50
+        claim.update(ttl=120)
+        self.now += 50
+        self.assertEqual(50, self.queue.claim(id=claim.id).age)
+
+        claim.delete()
+        self.assertEqual(1, len(list(self.queue.claim(ttl=60, grace=60))))
+
+    def test_delete_claimed_message(self):
+        self.queue.post({'body': 'task'})
+        msg = list(self.queue.claim(ttl=60, grace=60))[0]
+
+        other = list(self.queue.messages(echo=True,
+                                         include_claimed=True))[0]
+        self.assertRaises(errors.ForbiddenError, other.delete)
+
+        msg.delete()
+        self.assertEqual(0, self.queue.stats['messages']['total'])
+
+    def test_dead_letter_queue(self):
+        req, trans = self.client._request_and_transport()
+        core.queue_create(trans, req, 'poisoned',
+                          metadata={'_max_claim_count': 1,
+                                    '_dead_letter_queue': 'dead'})
+        queue = self.client.queue('poisoned', auto_create=False)
+        queue.post({'body': 'poison'})
+        queue.claim(ttl=60, grace=60)
+
+        self.now += 60
+        self.assertEqual([], list(queue.claim(ttl=60, grace=60)))
+        self.assertEqual(0, queue.stats['messages']['total'])
+        self.assertEqual(['poison'],
+                         self._bodies(self.client.queue('dead')))
+
+    def test_message_pop(self):
+        self.queue.post([{'body': i} for i in range(3)])
+        self.assertEqual([0, 1], [msg.body for msg in self.queue.pop(2)])
+        self.assertEqual([2], self._bodies(self.queue))
+
+    def test_subscription_duplicate(self):
+        data = {'subscriber': 'http://trigger.me', 'ttl': 3600}
+        first = self.client.subscription('jobs', **data)
+        second = self.client.subscription('jobs', **data)
+        self.assertEqual(first.id, second.id)
+
+        self.now += 3600
+        self.assertEqual([], list(self.queue.subscriptions()))
+
+    def test_flavor_pools(self):
+        self.client.pool('pool1', uri='mongodb://127.0.0.1', weight=10)
+        flavor = self.client.flavor('gold', pool_list=['pool1'])
+        self.assertEqual(['pool1'], flavor.get()['pool_list'])
+        self.assertEqual('gold', self.client.pool('pool1',
+                                                  auto_create=False
+                                                  ).get()['flavor'])
+
+        self.assertRaises(errors.MalformedRequest, self.client.flavor,
+                          'silver', pool_list=['missing'])
+
+    def test_projects_are_isolated(self):
+        self._client('other').queue('theirs', force_create=True)
+        self.assertEqual(['jobs'],
+                         [q.name for q in self.client.queues()[0]])
+
+    def test_queue_not_found(self):
+        queue = self.client.queue('missing', auto_create=False)
+        self.assertFalse(queue.exists())
+        self.assertRaises(errors.ResourceNotFound, queue.metadata,
+                          force_reload=True)
+
+    def test_invalid_queue_name(self):
+        self.assertRaises(errors.MalformedRequest,
+                          self.client.queue('x' * 65).post, {'body': 1})
+
+    def test_reset(self):
+        self.queue.post({'body': 1})
+        memory.reset('test')
+        self.assertEqual([], list(self.client.queues()[0]))
+
+
+class MemoryQueueTest(MemoryMixin, queues.QueuesV2QueueFunctionalTest):
+
+    def test_queue_exists_functional(self):
+        self.assertFalse(self.client.queue('404', auto_create=False).exists())
+
+
+class MemoryClaimTest(MemoryMixin, claims.QueuesV2ClaimFunctionalTest):
+    pass
+
+
+class MemorySubscriptionTest(MemoryMixin,
+                             subscriptions.QueuesV2SubscriptionFunctionalTest):
+    pass
+
+
+class MemoryPoolTest(MemoryMixin, pool.QueuesV2PoolFunctionalTest):
+    pass
+
+
+class MemoryFlavorTest(MemoryMixin, flavor.QueuesV2FlavorFunctionalTest):
+    pass
+
+
+class MemoryHealthTest(MemoryMixin, health.QueuesV2HealthFunctionalTest):
+    pass
@@ -15,7 +15,9 @@
 # limitations under the License.
 
 import json
+from unittest import mock
 
+from zaqarclient import auth
 from zaqarclient.queues.v2 import api as api_v2
 from zaqarclient.tests import base
 from zaqarclient.transport import request
@@ -44,7 +46,7 @@ class TestRequest(base.TestBase):
         data = {"data": "tons of GBs"}
         req = request.prepare_request(auth_opts, data=data)
         self.assertIsInstance(req, request.Request)
-        self.assertEqual(json.dumps(data), req.content)
+        self.assertEqual(json.dumps(data).encode('utf-8'), req.content)
 
     def test_request_with_right_version(self):
         auth_opts = self.conf.get('auth_opts', {})
@@ -55,3 +57,36 @@ class TestRequest(base.TestBase):
         api_version = 2.0
         req = request.prepare_request(auth_opts, api=api_version)
         self.assertIsInstance(req.api, api_v2.V2)
+
+    def test_api_is_loaded_once(self):
+        request.get_api('queues.v2')
+        with mock.patch('stevedore.driver.DriverManager') as manager:
+            req = request.Request(api=2)
+            req2 = request.Request(api=2)
+            self.assertIs(req.api, req2.api)
+            self.assertFalse(manager.called)
+
+    def test_project_headers(self):
+        self.assertEqual({'X-Project-Id': 'my-project'},
+                         request.project_headers(self.conf['auth_opts']))
+        self.assertEqual({'X-Project-Id': 'fake_project_id_for_noauth'},
+                         request.project_headers({'backend': 'noauth'}))
+        self.assertEqual({}, request.project_headers({'backend': 'keystone'}))
+
+    def test_prepare_request_static_headers(self):
+        auth_opts = self.conf.get('auth_opts', {})
+        static_headers = {'Client-ID': 'fake-id'}
+        req = request.prepare_request(auth_opts,
+                                      static_headers=static_headers)
+        self.assertEqual({'Client-ID': 'fake-id'}, req.headers)
+
+        req.headers['X-Auth-Token'] = 'token'
+        self.assertEqual({'Client-ID': 'fake-id'}, static_headers)
+
+    def test_prepare_request_reuses_auth_backend(self):
+        auth_opts = self.conf.get('auth_opts', {})
+        backend = auth.get_backend(**auth_opts)
+        with mock.patch.object(auth, 'get_backend') as get_backend:
+            req = request.prepare_request(auth_opts, auth_backend=backend)
+            self.assertFalse(get_backend.called)
+        self.assertIs(backend, req.auth_backend)
@@ -0,0 +1,131 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import email.utils
+import time
+from unittest import mock
+
+from zaqarclient.tests import base
+from zaqarclient.transport import errors
+from zaqarclient.transport import request
+from zaqarclient.transport import retry
+
+
+class TestRetryBudget(base.TestBase):
+
+    def test_budget(self):
+        budget = retry.RetryBudget(max_tokens=4, ratio=0.5)
+        self.assertTrue(budget.can_retry())
+
+        budget.on_failure()
+        self.assertTrue(budget.can_retry())
+        budget.on_failure()
+        self.assertFalse(budget.can_retry())
+
+        budget.on_success()
+        self.assertTrue(budget.can_retry())
+
+    def test_budget_bounds(self):
+        budget = retry.RetryBudget(max_tokens=2)
+        for _ in range(5):
+            budget.on_failure()
+        self.assertEqual(0, budget.tokens)
+        for _ in range(100):
+            budget.on_success()
+        self.assertEqual(2, budget.tokens)
+
+
+@mock.patch.object(time, 'sleep')
+class TestRetryPolicy(base.TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.policy = retry.RetryPolicy(max_retries=3, backoff=0.1,
+                                        max_backoff=1)
+        self.request = request.Request(operation='queue_get')
+
+    def test_disabled(self, sleep):
+        policy = retry.RetryPolicy()
+        func = mock.Mock(side_effect=errors.ServiceUnavailableError)
+        self.assertRaises(errors.ServiceUnavailableError,
+                          policy.call, func, self.request, True)
+        self.assertEqual(1, func.call_count)
+
+    def test_retries_until_success(self, sleep):
+        func = mock.Mock(side_effect=[errors.ServiceUnavailableError,
+                                      errors.BadGatewayError, 'ok'])
+        self.assertEqual('ok', self.policy.call(func, self.request, True))
+        self.assertEqual(3, func.call_count)
+        self.assertEqual(2, sleep.call_count)
+
+    def test_gives_up(self, sleep):
+        func = mock.Mock(side_effect=errors.InternalServerError)
+        self.assertRaises(errors.InternalServerError,
+                          self.policy.call, func, self.request, True)
+        self.assertEqual(4, func.call_count)
+
+    def test_not_idempotent(self, sleep):
+        func = mock.Mock(side_effect=errors.ServiceUnavailableError)
+        self.assertRaises(errors.ServiceUnavailableError,
+                          self.policy.call, func, self.request, False)
+        self.assertEqual(1, func.call_count)
+
+    def test_not_retryable(self, sleep):
+        func = mock.Mock(side_effect=errors.ResourceNotFound)
+        self.assertRaises(errors.ResourceNotFound,
+                          self.policy.call, func, self.request, True)
+        self.assertEqual(1, func.call_count)
+        self.assertEqual(10, self.policy.budget.tokens)
+
+    def test_connection_errors(self, sleep):
+        func = mock.Mock(side_effect=[ConnectionResetError, 'ok'])
+        self.assertEqual('ok', self.policy.call(
+            func, self.request, True, (ConnectionResetError,)))
+
+        func = mock.Mock(side_effect=ConnectionResetError)
+        self.assertRaises(ConnectionResetError,
+                          self.policy.call, func, self.request, True)
+        self.assertEqual(1, func.call_count)
+
+    def test_budget_exhausted(self, sleep):
+        policy = retry.RetryPolicy(max_retries=100, budget_tokens=4)
+        func = mock.Mock(side_effect=errors.ServiceUnavailableError)
+        self.assertRaises(errors.ServiceUnavailableError,
+                          policy.call, func, self.request, True)
+        self.assertEqual(2, func.call_count)
+
+    def test_backoff_is_capped(self, sleep):
+        for attempt in range(20):
+            self.assertLessEqual(self.policy.get_backoff(attempt), 1)
+
+    def test_retry_after_seconds(self, sleep):
+        ex = errors.ServiceUnavailableError(headers={'Retry-After': '0.5'})
+        self.assertEqual(0.5, self.policy.get_delay(ex, 0, True))
+
+        ex = errors.ServiceUnavailableError(headers={'Retry-After': '5'})
+        self.assertIsNone(self.policy.get_delay(ex, 0, True))
+
+    def test_retry_after_date(self, sleep):
+        date = email.utils.formatdate(time.time() + 60, usegmt=True)
+        ex = errors.ServiceUnavailableError(headers={'Retry-After': date})
+        policy = retry.RetryPolicy(max_retries=1, max_backoff=120)
+        self.assertAlmostEqual(60, policy.get_delay(ex, 0, True), delta=2)
+
+    def test_call_async(self, sleep):
+        func = mock.AsyncMock(side_effect=[errors.GatewayTimeoutError,
+                                           'ok'])
+        with mock.patch.object(asyncio, 'sleep') as async_sleep:
+            ret = asyncio.run(self.policy.call_async(func, self.request,
+                                                     True))
+        self.assertEqual('ok', ret)
+        self.assertEqual(1, async_sleep.await_count)
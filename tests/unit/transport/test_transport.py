@@ -0,0 +1,80 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import threading
+import time
+from unittest import mock
+
+from zaqarclient import errors
+from zaqarclient.tests import base
+from zaqarclient.tests.transport import dummy
+from zaqarclient import transport
+from zaqarclient.transport import http
+
+
+class TestGetTransport(base.TestBase):
+
+    def test_get_transport(self):
+        trans = transport.get_transport('http', options=self.conf)
+        self.assertIsInstance(trans, http.HttpTransport)
+        self.assertIs(self.conf, trans.options)
+
+    def test_driver_is_resolved_once(self):
+        transport.get_transport('https')
+        with mock.patch('stevedore.driver.DriverManager') as manager:
+            trans = transport.get_transport_for('https://example.org')
+            self.assertIsInstance(trans, http.HttpTransport)
+            self.assertFalse(manager.called)
+
+    def test_unknown_transport(self):
+        self.assertRaises(errors.DriverLoadFailure,
+                          transport.get_transport, 'unknown')
+
+    def test_register_transport(self):
+        transport.register_transport('dummy', dummy.DummyTransport)
+        self.addCleanup(transport.unregister_transport, 'dummy')
+
+        trans = transport.get_transport_for('dummy://example.org',
+                                            options=self.conf)
+        self.assertIsInstance(trans, dummy.DummyTransport)
+
+    def test_register_overrides_entry_point(self):
+        transport.get_transport('http')
+        transport.register_transport('http', dummy.DummyTransport)
+        self.addCleanup(transport.unregister_transport, 'http')
+
+        trans = transport.get_transport('http')
+        self.assertIsInstance(trans, dummy.DummyTransport)
+
+
+class TestTransport(base.TestBase):
+
+    def test_executor_created_once(self):
+        trans = dummy.DummyTransport(self.conf)
+
+        def build(**kwargs):
+            time.sleep(0.05)
+            return mock.Mock()
+
+        with mock.patch('zaqarclient.common.executor.BoundedExecutor',
+                        side_effect=build) as executor:
+            executors = []
+            threads = [threading.Thread(
+                target=lambda: executors.append(trans.executor))
+                for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(1, executor.call_count)
+        self.assertEqual(1, len({id(ex) for ex in executors}))
@@ -11,13 +11,25 @@
 # under the License.
 
 import json
+import queue
+import threading
+import time
 from unittest import mock
 
+import ddt
+from oslo_utils import importutils
+
+from zaqarclient.queues.v2 import api as api_v2
 from zaqarclient.tests import base
+from zaqarclient.tests.transport import ws as fake_ws
+from zaqarclient.transport import errors as transport_errors
 from zaqarclient.transport import request
 from zaqarclient.transport import ws
 
+websocket = importutils.try_import('websocket')
+
 
+@ddt.ddt
 class TestWsTransport(base.TestBase):
 
     def setUp(self):
@@ -33,46 +45,431 @@ class TestWsTransport(base.TestBase):
         self.options = {'auth_opts': auth_opts}
         self.endpoint = 'ws://127.0.0.1:9000'
 
-    @mock.patch.object(ws.WebsocketTransport, "_create_connection")
-    def test_make_client(self, ws_create_connection):
-        ws_create_connection.return_value.recv.return_value = json.dumps({
-            "headers": {
-                "status": 200
-            }
-        })
-
+    def _transport(self, fake):
         transport = ws.WebsocketTransport(self.options)
+        patcher = mock.patch.object(transport, '_create_connection',
+                                    return_value=fake)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(transport.cleanup)
+        return transport
+
+    def test_make_client(self):
+        fake = fake_ws.FakeWebsocket()
+        transport = self._transport(fake)
         req = request.Request(self.endpoint)
         transport.send(req)
-        ws_create_connection.assert_called_with("ws://127.0.0.1:9000")
+        transport._create_connection.assert_called_with(
+            "ws://127.0.0.1:9000", timeout=None)
+        self.assertEqual('authenticate', fake.sent[0]['action'])
+        self.assertEqual('FAKE_TOKEN', fake.sent[0]['headers']['X-Auth-Token'])
 
-    @mock.patch.object(ws.WebsocketTransport, "recv")
-    @mock.patch.object(ws.WebsocketTransport, "_create_connection")
-    def test_recv(self, ws_create_connection, recv_mock):
+    def test_recv(self):
+        fake = fake_ws.FakeWebsocket()
+        transport = self._transport(fake)
+        req = request.Request(self.endpoint)
+        transport.send(req)
 
-        send_ack = {
-            "headers": {
-                "status": 200
-            }
-        }
+        fake.push({"body": {"payload": "foo"}})
+        data = transport.recv(timeout=5)
+        self.assertEqual(data['body']['payload'], 'foo')
 
-        recv_mock.side_effect = [send_ack, send_ack, send_ack, {
-            "body": {
-                "payload": "foo"
-            }
-        }, send_ack]
+    def test_unsolicited_handler(self):
+        fake = fake_ws.FakeWebsocket()
+        transport = self._transport(fake)
+        frames = queue.Queue()
+        transport.set_unsolicited_handler(frames.put)
+        transport.send(request.Request(self.endpoint))
 
-        transport = ws.WebsocketTransport(self.options)
-        req = request.Request(self.endpoint)
+        fake.push({"body": {"payload": "foo"}})
+        self.assertEqual({"body": {"payload": "foo"}}, frames.get(timeout=5))
+        self.assertRaises(queue.Empty, transport.recv, timeout=0)
+
+    def test_multiplexing(self):
+        fake = fake_ws.FakeWebsocket(auto_reply=False)
+        transport = self._transport(fake)
+
+        # Authenticate first.
+        sender = threading.Thread(
+            target=transport.send, args=(request.Request(self.endpoint),))
+        sender.start()
+        self._wait_sent(fake, 1)
+        fake.reply(fake.sent[0])
+        self._wait_sent(fake, 2)
+        fake.reply(fake.sent[1])
+        sender.join(5)
+
+        results = {}
+
+        def send(name):
+            req = request.Request(self.endpoint, name)
+            results[name] = transport.send(req)
+
+        threads = [threading.Thread(target=send, args=(name,))
+                   for name in ('first', 'second')]
+        for thread in threads:
+            thread.start()
+        self._wait_sent(fake, 4)
+
+        # Answer out of order.
+        for msg in reversed(fake.sent[2:]):
+            fake.reply(msg, body={'action': msg['action']})
+        for thread in threads:
+            thread.join(5)
+
+        for name in ('first', 'second'):
+            self.assertEqual({'action': name},
+                             results[name].deserialized_content)
+
+    def test_fifo_without_request_id(self):
+        fake = fake_ws.FakeWebsocket(auto_reply=False)
+        transport = self._transport(fake)
+
+        sender = threading.Thread(
+            target=transport.send, args=(request.Request(self.endpoint),))
+        sender.start()
+        self._wait_sent(fake, 1)
+        fake.reply(fake.sent[0], echo=False)
+        self._wait_sent(fake, 2)
+        fake.reply(fake.sent[1], echo=False)
+        sender.join(5)
+        self.assertFalse(sender.is_alive())
+
+    def test_timeout(self):
+        self.options['timeout_opts'] = {'read': 0.01}
+        fake = fake_ws.FakeWebsocket()
+        transport = self._transport(fake)
+        transport.send(request.Request(self.endpoint))
+
+        fake.auto_reply = False
+        self.assertRaises(websocket.WebSocketTimeoutException,
+                          transport.send, request.Request(self.endpoint))
+
+        # The late response is dropped and
+        # the connection is still usable.
+        fake.reply(fake.sent[-1])
+        fake.auto_reply = True
+        transport.send(request.Request(self.endpoint))
+        self.assertRaises(queue.Empty, transport.recv, timeout=0)
+
+    def test_connection_lost(self):
+        fake = fake_ws.FakeWebsocket()
+        transport = self._transport(fake)
+        transport.send(request.Request(self.endpoint))
+
+        fake.auto_reply = False
+        sender = threading.Thread(target=self.assertRaises, args=(
+            websocket.WebSocketConnectionClosedException,
+            transport.send, request.Request(self.endpoint)))
+        sender.start()
+        self._wait_sent(fake, 3)
+        fake.close()
+        sender.join(5)
+        self.assertFalse(sender.is_alive())
+
+        # The next request reconnects.
+        other = fake_ws.FakeWebsocket()
+        transport._create_connection.return_value = other
+        transport.send(request.Request(self.endpoint))
+        self.assertEqual(2, len(other.sent))
+
+    def test_error_response(self):
+        fake = fake_ws.FakeWebsocket()
+        transport = self._transport(fake)
+        transport.send(request.Request(self.endpoint))
+
+        fake.auto_reply = False
+        sender = threading.Thread(target=self.assertRaises, args=(
+            transport_errors.ResourceNotFound, transport.send,
+            request.Request(self.endpoint)))
+        sender.start()
+        self._wait_sent(fake, 3)
+        fake.reply(fake.sent[2], body={'error': 'oops'}, status=404)
+        sender.join(5)
+        self.assertFalse(sender.is_alive())
+
+    def test_body_is_not_reencoded(self):
+        fake = fake_ws.FakeWebsocket(bodies={
+            'queue_get_stats': {'messages': {'free': 1}}})
+        transport = self._transport(fake)
+        req = request.Request(self.endpoint, 'queue_get_stats',
+                              content=json.dumps({'queue_name': 'foo'}))
+
+        with mock.patch.object(transport.codec, 'loads',
+                               wraps=transport.codec.loads) as loads:
+            resp = transport.send(req)
+
+        self.assertEqual({'queue_name': 'foo'}, fake.sent[-1]['body'])
+        self.assertEqual({'messages': {'free': 1}},
+                         resp.deserialized_content)
+        # One for each frame read, the
+        # authentication's and the request's responses.
+        self.assertEqual(2, loads.call_count)
+        self.assertEqual({'messages': {'free': 1}}, json.loads(resp.content))
+
+    def test_binary_frames(self):
+        self.options['ws_opts'] = {'binary': True}
+        fake = fake_ws.FakeWebsocket(bodies={
+            'queue_get_stats': {'messages': {'free': 1}}})
+        fake_send = fake.send
+        opcodes = []
+
+        def send(data, opcode=None):
+            opcodes.append(opcode)
+            self.assertIsInstance(data, bytes)
+            fake_send(data, opcode=opcode)
+
+        fake.send = send
+        transport = self._transport(fake)
+        req = request.Request(self.endpoint, 'queue_get_stats',
+                              content=json.dumps({'queue_name': 'foo'}))
+        resp = transport.send(req)
+
+        self.assertEqual([websocket.ABNF.OPCODE_BINARY] * 2, opcodes)
+        self.assertEqual({'queue_name': 'foo'}, fake.sent[-1]['body'])
+        self.assertEqual({'messages': {'free': 1}},
+                         resp.deserialized_content)
+
+        fake.push({'body': 'pushed'})
+        self.assertEqual({'body': 'pushed'}, transport.recv(timeout=5))
+
+    def _send_v2(self, transport, operation, params, content=None):
+        req = request.Request(self.endpoint, operation, params=params,
+                              content=content and json.dumps(content))
+        req._api = api_v2.V2()
         transport.send(req)
 
-        count = 0
+    @ddt.data(False, True)
+    def test_params_in_body(self, binary):
+        self.options['ws_opts'] = {'binary': binary}
+        fake = fake_ws.FakeWebsocket()
+        transport = self._transport(fake)
+
+        self._send_v2(transport, 'message_post', {'queue_name': 'fizbit'},
+                      {'messages': [{'body': 1, 'ttl': 60}]})
+        self.assertEqual({'queue_name': 'fizbit',
+                          'messages': [{'body': 1, 'ttl': 60}]},
+                         fake.sent[-1]['body'])
 
-        while True:
-            count += 1
-            data = transport.recv()
-            if 'body' in data:
-                self.assertEqual(data['body']['payload'], 'foo')
+        self._send_v2(transport, 'message_list',
+                      {'queue_name': 'fizbit', 'limit': 5})
+        self.assertEqual({'queue_name': 'fizbit', 'limit': 5},
+                         fake.sent[-1]['body'])
+
+        self._send_v2(transport, 'message_delete_many',
+                      {'queue_name': 'fizbit', 'ids': ('a', 'b')})
+        self.assertEqual({'queue_name': 'fizbit', 'message_ids': ['a', 'b']},
+                         fake.sent[-1]['body'])
+
+        self._send_v2(transport, 'queue_create', {'queue_name': 'fizbit'},
+                      {'_ttl': 60})
+        self.assertEqual({'queue_name': 'fizbit', 'metadata': {'_ttl': 60}},
+                         fake.sent[-1]['body'])
+
+        self._send_v2(transport, 'claim_create', {'queue_name': 'fizbit'},
+                      {})
+        self.assertEqual({'queue_name': 'fizbit'}, fake.sent[-1]['body'])
+
+    def test_pop_action(self):
+        fake = fake_ws.FakeWebsocket()
+        transport = self._transport(fake)
+
+        self._send_v2(transport, 'message_pop',
+                      {'queue_name': 'fizbit', 'pop': 2})
+        self.assertEqual('message_delete_many', fake.sent[-1]['action'])
+        self.assertEqual({'queue_name': 'fizbit', 'pop': 2},
+                         fake.sent[-1]['body'])
+
+    @ddt.data(False, True)
+    def test_content_in_body(self, binary):
+        self.options['ws_opts'] = {'binary': binary}
+        fake = fake_ws.FakeWebsocket()
+        transport = self._transport(fake)
+
+        # Zaqar's websocket API reads the queue name from the
+        # body, next to the request's content.
+        self._send_v2(transport, 'message_post', {'queue_name': 'fizbit'},
+                      {'messages': [{'body': 1, 'ttl': 60}]})
+        self.assertEqual({'queue_name': 'fizbit',
+                          'messages': [{'body': 1, 'ttl': 60}]},
+                         fake.sent[-1]['body'])
+
+        self._send_v2(transport, 'claim_create', {'queue_name': 'fizbit'},
+                      {'ttl': 30, 'grace': 30})
+        self.assertEqual({'queue_name': 'fizbit', 'ttl': 30, 'grace': 30},
+                         fake.sent[-1]['body'])
+
+        self._send_v2(transport, 'queue_create', {'queue_name': 'fizbit'},
+                      {'_max_messages_post_size': 1024})
+        self.assertEqual({'queue_name': 'fizbit',
+                          'metadata': {'_max_messages_post_size': 1024}},
+                         fake.sent[-1]['body'])
+
+        self._send_v2(transport, 'subscription_create',
+                      {'queue_name': 'fizbit'},
+                      {'subscriber': 'http://trigger.me', 'ttl': 3600})
+        self.assertEqual({'queue_name': 'fizbit',
+                          'subscriber': 'http://trigger.me', 'ttl': 3600},
+                         fake.sent[-1]['body'])
+
+    def _lose_in_flight(self, transport, fake, operation):
+        fake.auto_reply = False
+        errors = []
+
+        def send():
+            try:
+                self._send_v2(transport, operation, {'queue_name': 'fizbit'})
+            except Exception as ex:
+                errors.append(ex)
+
+        sender = threading.Thread(target=send)
+        sender.start()
+        self._wait_sent(fake, 3)
+        fake.close()
+        sender.join(5)
+        self.assertFalse(sender.is_alive())
+        return errors
+
+    def test_reconnect_with_backoff(self):
+        fake = fake_ws.FakeWebsocket()
+        transport = self._transport(fake)
+        transport.send(request.Request(self.endpoint))
+        conn = transport._conn
+        fake.close()
+        for _ in range(500):
+            if conn.closed:
                 break
-            if count >= 4:
-                self.fail('Failed to receive expected message.')
+            time.sleep(0.01)
+
+        other = fake_ws.FakeWebsocket()
+        transport._create_connection.side_effect = [
+            websocket.WebSocketException(), other]
+        with mock.patch.object(ws.time, 'sleep') as sleep:
+            transport.send(request.Request(self.endpoint))
+
+        self.assertEqual(1, sleep.call_count)
+        self.assertEqual('authenticate', other.sent[0]['action'])
+        self.assertEqual(fake.sent[0]['headers']['Client-ID'],
+                         other.sent[0]['headers']['Client-ID'])
+
+    def test_first_connection_not_retried(self):
+        transport = self._transport(None)
+        transport._create_connection.side_effect = (
+            websocket.WebSocketException())
+        with mock.patch.object(ws.time, 'sleep') as sleep:
+            self.assertRaises(websocket.WebSocketException,
+                              transport.send, request.Request(self.endpoint))
+        self.assertFalse(sleep.called)
+
+    def test_replay_idempotent(self):
+        fake = fake_ws.FakeWebsocket()
+        transport = self._transport(fake)
+        transport.send(request.Request(self.endpoint))
+
+        other = fake_ws.FakeWebsocket()
+        transport._create_connection.return_value = other
+        self.assertEqual([], self._lose_in_flight(transport, fake,
+                                                  'message_list'))
+        self.assertEqual(['authenticate', 'message_list'],
+                         [msg['action'] for msg in other.sent])
+
+    def test_no_replay_non_idempotent(self):
+        fake = fake_ws.FakeWebsocket()
+        transport = self._transport(fake)
+        transport.send(request.Request(self.endpoint))
+
+        other = fake_ws.FakeWebsocket()
+        transport._create_connection.return_value = other
+        errors = self._lose_in_flight(transport, fake, 'message_post')
+        self.assertEqual(1, len(errors))
+        self.assertIsInstance(errors[0],
+                              websocket.WebSocketConnectionClosedException)
+        self.assertEqual([], other.sent)
+
+    def test_reconnect_in_background(self):
+        fake = fake_ws.FakeWebsocket()
+        transport = self._transport(fake)
+        connected = queue.Queue()
+        transport.add_connect_hook(connected.put)
+        transport.connect(self.endpoint)
+        connected.get(timeout=5)
+
+        other = fake_ws.FakeWebsocket()
+        transport._create_connection.return_value = other
+        fake.close()
+        connected.get(timeout=5)
+        self.assertEqual(['authenticate'],
+                         [msg['action'] for msg in other.sent])
+
+    def test_keepalive(self):
+        self.options['ws_opts'] = {'ping_interval': 0.01}
+        fake = fake_ws.FakeWebsocket()
+        transport = self._transport(fake)
+        transport.send(request.Request(self.endpoint))
+
+        for _ in range(500):
+            if fake.pings >= 2:
+                break
+            time.sleep(0.01)
+        self.assertGreaterEqual(fake.pings, 2)
+        self.assertTrue(transport.stats()['connected'])
+        self.assertFalse(fake.closed)
+
+    def test_dead_peer(self):
+        self.options['ws_opts'] = {'ping_interval': 0.01,
+                                   'ping_timeout': 0.01}
+        fake = fake_ws.FakeWebsocket()
+        transport = self._transport(fake)
+        transport.send(request.Request(self.endpoint))
+        fake.answer_pings = False
+
+        for _ in range(500):
+            if fake.closed:
+                break
+            time.sleep(0.01)
+        self.assertTrue(fake.closed)
+        self.assertFalse(transport.stats()['connected'])
+
+        # The next request reconnects.
+        other = fake_ws.FakeWebsocket()
+        transport._create_connection.return_value = other
+        transport.send(request.Request(self.endpoint))
+        self.assertEqual(2, transport.stats()['connections'])
+
+    def test_no_keepalive_by_default(self):
+        fake = fake_ws.FakeWebsocket()
+        transport = self._transport(fake)
+        transport.send(request.Request(self.endpoint))
+        time.sleep(0.05)
+        self.assertEqual(0, fake.pings)
+
+    def test_stats(self):
+        fake = fake_ws.FakeWebsocket(auto_reply=False)
+        transport = self._transport(fake)
+        self.assertFalse(transport.stats()['connected'])
+
+        sender = threading.Thread(
+            target=transport.send, args=(request.Request(self.endpoint),))
+        sender.start()
+        self._wait_sent(fake, 1)
+        time.sleep(0.05)
+        fake.reply(fake.sent[0])
+        self._wait_sent(fake, 2)
+        fake.reply(fake.sent[1])
+        sender.join(5)
+        time.sleep(0.05)
+
+        stats = transport.stats()
+        self.assertTrue(stats['connected'])
+        self.assertEqual(1, stats['connections'])
+        self.assertEqual(2, stats['requests'])
+        self.assertGreaterEqual(stats['busy'], 0.05)
+        self.assertGreaterEqual(stats['idle'], 0.05)
+
+    @staticmethod
+    def _wait_sent(fake, count):
+        for _ in range(500):
+            if len(fake.sent) >= count:
+                return
+            time.sleep(0.01)
+        raise AssertionError('%d frames were not sent' % count)
@@ -0,0 +1,68 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Measures the cost of encoding and decoding a page of 1,000 messages
+with every available JSON codec::
+
+    python tools/codec_benchmark.py
+"""
+
+import timeit
+import uuid
+
+from zaqarclient.common import codec
+
+
+def _page(size=1000):
+    messages = []
+    for i in range(size):
+        message_id = uuid.uuid4().hex
+        messages.append({
+            'id': message_id,
+            'href': '/v2/queues/fizbit/messages/%s' % message_id,
+            'ttl': 3600,
+            'age': i,
+            'body': {
+                'event': 'BackupStarted',
+                'backup_id': str(uuid.uuid4()),
+                'sequence': i,
+                'tags': ['nightly', 'incremental'],
+                'ratio': 0.75,
+            },
+        })
+    return {'messages': messages,
+            'links': [{'rel': 'next',
+                       'href': '/v2/queues/fizbit/messages?marker=1000'}]}
+
+
+def main(number=200):
+    page = _page()
+    for name in ('json', 'orjson'):
+        try:
+            json_codec = codec.get_codec(name)
+        except RuntimeError:
+            print('%-8s not installed' % name)
+            continue
+
+        encoded = json_codec.dumps(page)
+        encode = timeit.timeit(lambda: json_codec.dumps(page),
+                               number=number)
+        decode = timeit.timeit(lambda: json_codec.loads(encoded),
+                               number=number)
+        print('%-8s %8d bytes  encode %7.3f ms  decode %7.3f ms' %
+              (name, len(encoded), encode / number * 1000,
+               decode / number * 1000))
+
+
+if __name__ == '__main__':
+    main()
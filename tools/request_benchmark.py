@@ -0,0 +1,62 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Measures the per request overhead of preparing a request, with the
+noauth backend, and resolving its API::
+
+    python tools/request_benchmark.py
+
+The `uncached` rows drop the cache of `request.get_api` before each
+request, which is what every request paid when the API driver was
+loaded with stevedore for each of them.
+"""
+
+import timeit
+
+from zaqarclient.transport import request
+
+_AUTH_OPTS = {'backend': 'noauth',
+              'options': {'os_project_id': 'my-project'}}
+
+
+def _prepare():
+    req = request.prepare_request(_AUTH_OPTS,
+                                  endpoint='http://zaqar:8888',
+                                  api=2)
+    return req.api
+
+
+def _lookup():
+    return request.Request('http://zaqar:8888', api=2).api
+
+
+def _uncached(func):
+    def run():
+        request._APIS.clear()
+        return func()
+    return run
+
+
+def main(number=2000):
+    for name, func in (('prepare + api', _prepare),
+                       ('api lookup', _lookup)):
+        # Warm the cache and the imports up.
+        func()
+        cached = timeit.timeit(func, number=number)
+        uncached = timeit.timeit(_uncached(func), number=number)
+        print('%-14s cached %8.1f us  uncached %8.1f us' %
+              (name, cached / number * 1e6, uncached / number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
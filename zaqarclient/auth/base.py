@@ -18,6 +18,10 @@ import abc
 
 class AuthBackend(metaclass=abc.ABCMeta):
 
+    # Whether `authenticate` may block, i.e: on network calls.
+    # Async clients run blocking backends in an executor.
+    blocking = True
+
     def __init__(self, conf):
         self.conf = conf
 
@@ -37,9 +41,29 @@ class AuthBackend(metaclass=abc.ABCMeta):
         :returns: The modified request spec.
         """
 
+    def invalidate(self):
+        """Drops any cached credentials.
+
+        It's called when the server rejected the credentials
+        set by `authenticate`, before authenticating again.
+        """
+
+    def get_endpoints(self):
+        """Returns the service endpoints known to this backend.
+
+        Backends resolving the endpoint, i.e: from a service
+        catalog, return every endpoint they found once a
+        request has been authenticated.
+
+        :rtype: list
+        """
+        return []
+
 
 class NoAuth(AuthBackend):
     """No Auth Plugin."""
 
+    blocking = False
+
     def authenticate(self, api_version, req):
         return req
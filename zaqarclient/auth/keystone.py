@@ -37,9 +37,22 @@ class KeystoneAuth(base.AuthBackend):
             - os_region_name
             - os_service_type
             - os_endpoint_type
+            - token_refresh_window
     :type conf: `dict`
+
+    The keystone session, the token and the endpoint are cached
+    by the backend instance. Tokens are renewed
+    `token_refresh_window` seconds (Default: 120) before they
+    expire, and whenever `invalidate` is called.
     """
 
+    def __init__(self, conf):
+        super().__init__(conf)
+        self._session = None
+        self._endpoint = None
+        self._endpoints = []
+        self._last_session = None
+
     def _get_keystone_session(self, **kwargs):
         cacert = kwargs.pop('cacert', None)
         cert = kwargs.pop('cert', None)
@@ -113,8 +126,48 @@ class KeystoneAuth(base.AuthBackend):
                                            interface=endpoint_type,
                                            region_name=region_name)
 
+        # Keep every endpoint of the service
+        # around so that clients can balance between them.
+        self._endpoints = self._get_catalog_urls(
+            ks_session, service_type, endpoint_type, region_name)
+        if endpoint and endpoint not in self._endpoints:
+            self._endpoints.insert(0, endpoint)
+
         return endpoint
 
+    def _get_catalog_urls(self, ks_session, service_type, interface,
+                          region_name):
+        auth = getattr(ks_session, 'auth', None)
+        if not hasattr(auth, 'get_access'):
+            return []
+
+        catalog = auth.get_access(ks_session).service_catalog
+        urls = catalog.get_urls(service_type=service_type,
+                                interface=interface,
+                                region_name=region_name)
+        return list(urls or [])
+
+    def get_endpoints(self):
+        return list(self._endpoints)
+
+    def _get_token(self, ks_session):
+        auth = getattr(ks_session, 'auth', None)
+        if hasattr(auth, 'get_access'):
+            refresh_window = self.conf.get('token_refresh_window', 120)
+            auth_ref = auth.get_access(ks_session)
+            if auth_ref.will_expire_soon(refresh_window):
+                ks_session.invalidate()
+
+        # The auth plugin caches the token,
+        # this only goes to Keystone when it was invalidated.
+        return ks_session.get_token()
+
+    def invalidate(self):
+        if self._last_session is not None:
+            self._last_session.invalidate()
+        self._endpoint = None
+        self._endpoints = []
+
     def authenticate(self, api_version, request):
         """Get an authtenticated client using credentials in the keyword args.
 
@@ -137,12 +190,20 @@ class KeystoneAuth(base.AuthBackend):
             for k in keys:
                 ks_kwargs.update({k: get_options(k)})
 
-            ks_session = (request.session or
-                          self._get_keystone_session(**ks_kwargs))
+            ks_session = request.session
+            if ks_session is None:
+                if self._session is None:
+                    self._session = self._get_keystone_session(**ks_kwargs)
+                ks_session = self._session
+            self._last_session = ks_session
+
             if not token:
-                token = ks_session.get_token()
+                token = self._get_token(ks_session)
             if not request.endpoint:
-                request.endpoint = self._get_endpoint(ks_session, **ks_kwargs)
+                if self._endpoint is None:
+                    self._endpoint = self._get_endpoint(ks_session,
+                                                        **ks_kwargs)
+                request.endpoint = self._endpoint
 
         # NOTE(flaper87): Update the request spec
         # with the final token.
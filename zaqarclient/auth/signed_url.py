@@ -31,10 +31,20 @@ class SignedURLAuth(base.AuthBackend):
     :type conf: `dict`
     """
 
+    blocking = False
+
+    def __init__(self, conf):
+        super().__init__(conf)
+        # The signature doesn't change during
+        # the backend's lifetime, build the headers just once.
+        self._headers = {
+            'URL-Expires': self.conf['expires'],
+            'URL-Methods': ','.join(self.conf['methods']),
+            'URL-Paths': ','.join(self.conf['paths']),
+            'URL-Signature': self.conf['signature'],
+        }
+
     def authenticate(self, api_version, request):
         """Set the necessary headers on the request."""
-        request.headers['URL-Expires'] = self.conf['expires']
-        request.headers['URL-Methods'] = ','.join(self.conf['methods'])
-        request.headers['URL-Paths'] = ','.join(self.conf['paths'])
-        request.headers['URL-Signature'] = self.conf['signature']
+        request.headers.update(self._headers)
         return request
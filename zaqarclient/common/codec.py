@@ -0,0 +1,119 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+JSON codecs used to encode request bodies and decode responses.
+
+Codecs produce `bytes` and accept either `bytes` or `str`. The one
+used by a transport is picked with the `json_codec` option::
+
+    conf = {'json_codec': 'orjson'}
+
+Valid values are `json` (the default), `orjson`, which requires
+the orjson library, and `auto`, which uses orjson when it's
+installed and falls back to `json` otherwise. Any object with
+`dumps` and `loads` methods is accepted as well.
+
+`MsgpackCodec` has the same interface but isn't a JSON codec. It's
+only used for the websocket transport's binary frames.
+"""
+
+import json
+
+from oslo_utils import importutils
+
+msgpack = importutils.try_import('msgpack')
+orjson = importutils.try_import('orjson')
+
+
+class JsonCodec:
+    """Codec based on the standard library's `json` module"""
+
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """Codec based on `orjson`"""
+
+    name = 'orjson'
+
+    def __init__(self):
+        if not orjson:
+            raise RuntimeError('The orjson library is not installed')
+
+    def dumps(self, obj):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+class MsgpackCodec:
+    """Codec based on `msgpack`"""
+
+    name = 'msgpack'
+
+    def __init__(self):
+        if not msgpack:
+            raise RuntimeError('The msgpack library is not installed')
+
+    def dumps(self, obj):
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def loads(self, data):
+        return msgpack.unpackb(data, raw=False)
+
+
+_CODECS = {
+    'json': JsonCodec,
+    'orjson': OrjsonCodec,
+}
+
+_INSTANCES = {}
+
+
+def get_codec(name=None):
+    """Returns the codec called `name`
+
+    :param name: Name of the codec, `auto` or a codec
+        instance. Defaults to `json`.
+    :type name: str
+
+    :raises ValueError: If there's no codec called `name`.
+    :raises RuntimeError: If the codec's library isn't installed.
+    """
+    if name is None:
+        name = 'json'
+    elif not isinstance(name, str):
+        return name
+
+    if name == 'auto':
+        name = 'orjson' if orjson else 'json'
+
+    try:
+        return _INSTANCES[name]
+    except KeyError:
+        pass
+
+    try:
+        cls = _CODECS[name]
+    except KeyError:
+        raise ValueError('Unknown JSON codec: %s' % name)
+
+    codec = _INSTANCES[name] = cls()
+    return codec
@@ -14,9 +14,14 @@
 # limitations under the License.
 
 import functools
+import threading
 
 from zaqarclient import errors
 
+# Guards the creation of lazy properties. It's reentrant
+# since properties may be built out of other lazy ones.
+_LAZY_LOCK = threading.RLock()
+
 
 def version(min_version, max_version=None):
     min_version = float(min_version)
@@ -50,8 +55,16 @@ def lazy_property(write=False, delete=True):
         attr_name = '_lazy_' + fn.__name__
 
         def getter(self):
-            if not hasattr(self, attr_name):
-                setattr(self, attr_name, fn(self))
+            try:
+                return getattr(self, attr_name)
+            except AttributeError:
+                pass
+
+            # Threads racing here would otherwise
+            # each build a value and lose all but one.
+            with _LAZY_LOCK:
+                if not hasattr(self, attr_name):
+                    setattr(self, attr_name, fn(self))
             return getattr(self, attr_name)
 
         def setter(self, value):
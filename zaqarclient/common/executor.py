@@ -0,0 +1,76 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from concurrent import futures
+import threading
+
+
+class BoundedExecutor:
+    """Thread pool executor with a bounded backlog
+
+    `submit` blocks once `max_pending` tasks are either running
+    or waiting for a worker, which keeps fire-and-forget callers
+    from queueing an unbounded amount of work.
+
+    :param max_workers: Number of worker threads.
+    :type max_workers: int
+    :param max_pending: Maximum number of submitted tasks that
+        haven't completed yet. Defaults to `max_workers * 4`.
+    :type max_pending: int
+    """
+
+    def __init__(self, max_workers=10, max_pending=None):
+        self._executor = futures.ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='zaqarclient')
+        self._semaphore = threading.BoundedSemaphore(
+            max_pending or max_workers * 4)
+
+    def _release(self, future):
+        self._semaphore.release()
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedules `fn(*args, **kwargs)` on a worker thread
+
+        :returns: A future for the call.
+        :rtype: `concurrent.futures.Future`
+        """
+        self._semaphore.acquire()
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._semaphore.release()
+            raise
+
+        future.add_done_callback(self._release)
+        return future
+
+    def try_submit(self, fn, *args, **kwargs):
+        """Like `submit`, without blocking once the backlog is full
+
+        :returns: A future for the call, or None if `max_pending`
+            tasks are waiting already.
+        :rtype: `concurrent.futures.Future`
+        """
+        if not self._semaphore.acquire(blocking=False):
+            return None
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._semaphore.release()
+            raise
+
+        future.add_done_callback(self._release)
+        return future
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
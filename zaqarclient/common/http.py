@@ -16,12 +16,47 @@
 import json
 
 import requests
+from requests import adapters
 
 
 class Client:
-
-    def __init__(self, *args, **kwargs):
-        self.session = requests.session(*args, **kwargs)
+    """Thin wrapper around a `requests.Session`
+
+    :param pool_connections: Number of per-host connection
+        pools to cache.
+    :type pool_connections: int
+    :param pool_maxsize: Maximum number of connections kept
+        in each per-host pool.
+    :type pool_maxsize: int
+    :param pool_block: Whether to block, instead of opening
+        throw-away connections, when a pool is exhausted.
+    :type pool_block: bool
+    :param keep_alive: Whether to keep connections open
+        between requests.
+    :type keep_alive: bool
+    """
+
+    def __init__(self, pool_connections=adapters.DEFAULT_POOLSIZE,
+                 pool_maxsize=adapters.DEFAULT_POOLSIZE,
+                 pool_block=adapters.DEFAULT_POOLBLOCK,
+                 keep_alive=True):
+        self.session = requests.session()
+
+        # The same adapter is mounted for both
+        # schemes so that its pool is shared by every request
+        # sent through this client.
+        self.adapter = adapters.HTTPAdapter(pool_connections=pool_connections,
+                                            pool_maxsize=pool_maxsize,
+                                            pool_block=pool_block)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+    def close(self):
+        """Closes the session and the connections of its pool."""
+        self.session.close()
 
     def request(self, *args, **kwargs):
         """Raw request."""
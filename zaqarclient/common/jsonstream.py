@@ -0,0 +1,149 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Incremental parsing of Zaqar listings, i.e::
+
+    {"messages": [{...}, {...}], "links": [...]}
+
+Items of the listed array are decoded one at a time, as the chunks
+of the body arrive. Only the unconsumed part of the body is kept
+around, hence memory usage is bounded by the size of one item.
+"""
+
+import codecs
+import json
+
+_WHITESPACE = ' \t\n\r'
+_DECODER = json.JSONDecoder()
+
+
+class _Reader:
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        if self._eof:
+            return False
+
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            chunk = self._decoder.decode(b'', final=True)
+        elif isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk)
+
+        # Drop what's been consumed already.
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return not self._eof or bool(chunk)
+
+    def peek(self):
+        while True:
+            buf = self._buf
+            pos = self._pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                raise ValueError('Unexpected end of JSON document')
+
+    def at_end(self):
+        try:
+            self.peek()
+        except ValueError:
+            return True
+        return False
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError('Expected %r at position %d' %
+                             (char, self._pos))
+        self._pos += 1
+
+    def next_char(self):
+        char = self.peek()
+        self._pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self._buf, self._pos)
+            except ValueError:
+                if self._eof:
+                    raise
+            else:
+                # Scalars, numbers in particular,
+                # may continue in the next chunk. A value is only
+                # complete when something follows it.
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return obj
+            self._fill()
+
+
+def iter_items(chunks, key, extra=None):
+    """Yields the items of the array stored under `key`
+
+    :param chunks: Iterable of `bytes` or `str` chunks forming
+        a JSON object.
+    :param key: The key of the array to iterate over.
+    :type key: str
+    :param extra: Optional dict filled with the other keys of
+        the object as they're parsed.
+    :type extra: dict
+    """
+    reader = _Reader(chunks)
+    # Empty bodies, i.e: 204 responses,
+    # have nothing to iterate over.
+    if reader.at_end():
+        return
+
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+
+    while True:
+        name = reader.value()
+        reader.expect(':')
+
+        if name == key and reader.peek() == '[':
+            reader.next_char()
+            if reader.peek() == ']':
+                reader.next_char()
+            else:
+                while True:
+                    yield reader.value()
+                    char = reader.next_char()
+                    if char == ']':
+                        break
+                    if char != ',':
+                        raise ValueError('Expected "," or "]"')
+        else:
+            value = reader.value()
+            if extra is not None:
+                extra[name] = value
+
+        char = reader.next_char()
+        if char == '}':
+            return
+        if char != ',':
+            raise ValueError('Expected "," or "}"')
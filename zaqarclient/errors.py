@@ -14,7 +14,8 @@
 
 from zaqarclient._i18n import _  # noqa
 
-__all__ = ['ZaqarError', 'DriverLoadFailure', 'InvalidOperation']
+__all__ = ['ZaqarError', 'DriverLoadFailure', 'InvalidOperation',
+           'CircuitOpenError', 'DeadlineExceeded']
 
 
 class ZaqarError(Exception):
@@ -38,3 +39,27 @@ class InvalidOperation(ZaqarError):
 
 class UnsupportedVersion(ZaqarError):
     """Raised if there is no endpoint which supports the requested version."""
+
+
+class CircuitOpenError(ZaqarError):
+    """Raised when a request is rejected by an open circuit breaker."""
+
+    def __init__(self, endpoint, retry_in=0.0):
+        msg = (_('Circuit breaker of %(endpoint)s is open, retry in '
+                 '%(retry_in).1fs') %
+               {'endpoint': endpoint, 'retry_in': max(0.0, retry_in)})
+        super().__init__(msg)
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class DeadlineExceeded(ZaqarError):
+    """Raised when a request can't complete before its deadline."""
+
+    def __init__(self, operation=None):
+        msg = _('Deadline exceeded')
+        if operation:
+            msg = (_('Deadline exceeded while sending %(operation)s') %
+                   {'operation': operation})
+        super().__init__(msg)
+        self.operation = operation
@@ -31,6 +31,7 @@ class V2(api.Api):
         'queue_create': {
             'ref': 'queues/{queue_name}',
             'method': 'PUT',
+            'ws': {'body': 'metadata'},
             'required': ['queue_name'],
             'properties': {
                 'queue_name': {'type': 'string'}
@@ -55,6 +56,7 @@ class V2(api.Api):
         'queue_update': {
             'ref': 'queues/{queue_name}',
             'method': 'PATCH',
+            'ws': {'body': 'metadata'},
             'required': ['queue_name'],
             'properties': {
                 'queue_name': {'type': 'string'}
@@ -63,6 +65,7 @@ class V2(api.Api):
         'queue_delete': {
             'ref': 'queues/{queue_name}',
             'method': 'DELETE',
+            'timeout': {'read': 300},
             'required': ['queue_name'],
             'properties': {
                 'queue_name': {'type': 'string'}
@@ -71,6 +74,7 @@ class V2(api.Api):
         'queue_get_stats': {
             'ref': 'queues/{queue_name}/stats',
             'method': 'GET',
+            'safe': True,
             'required': ['queue_name'],
             'properties': {
                 'queue_name': {'type': 'string'}
@@ -79,6 +83,7 @@ class V2(api.Api):
         'queue_purge': {
             'ref': 'queues/{queue_name}/purge',
             'method': 'POST',
+            'timeout': {'read': 300},
             'required': ['queue_name'],
             'properties': {
                 'queue_name': {'type': 'string'}
@@ -88,6 +93,7 @@ class V2(api.Api):
         'message_list': {
             'ref': 'queues/{queue_name}/messages',
             'method': 'GET',
+            'safe': True,
             'required': ['queue_name'],
             'properties': {
                 'queue_name': {'type': 'string'},
@@ -109,6 +115,7 @@ class V2(api.Api):
         'message_get': {
             'ref': 'queues/{queue_name}/messages/{message_id}',
             'method': 'GET',
+            'safe': True,
             'required': ['queue_name', 'message_id'],
             'properties': {
                 'queue_name': {'type': 'string'},
@@ -119,6 +126,7 @@ class V2(api.Api):
         'message_get_many': {
             'ref': 'queues/{queue_name}/messages',
             'method': 'GET',
+            'ws': {'params': {'ids': 'message_ids'}},
             'required': ['queue_name', 'ids'],
             'properties': {
                 'queue_name': {'type': 'string'},
@@ -129,6 +137,7 @@ class V2(api.Api):
         'message_delete': {
             'ref': 'queues/{queue_name}/messages/{message_id}',
             'method': 'DELETE',
+            'timeout': {'read': 10},
             'required': ['queue_name', 'message_id'],
             'properties': {
                 'queue_name': {'type': 'string'},
@@ -139,6 +148,7 @@ class V2(api.Api):
         'message_delete_many': {
             'ref': 'queues/{queue_name}/messages',
             'method': 'DELETE',
+            'ws': {'params': {'ids': 'message_ids'}},
             'required': ['queue_name', 'ids'],
             'properties': {
                 'queue_name': {'type': 'string'},
@@ -148,6 +158,11 @@ class V2(api.Api):
         'message_pop': {
             'ref': 'queues/{queue_name}/messages',
             'method': 'DELETE',
+            # Popping twice deletes
+            # twice as many messages.
+            'idempotent': False,
+            # Zaqar's websocket API pops through message_delete_many.
+            'ws': {'action': 'message_delete_many'},
             'required': ['queue_name', 'pop'],
             'properties': {
                 'queue_name': {'type': 'string'},
@@ -299,6 +314,7 @@ class V2(api.Api):
         'claim_get': {
             'ref': 'queues/{queue_name}/claims/{claim_id}',
             'method': 'GET',
+            'safe': True,
             'required': ['queue_name', 'claim_id'],
             'properties': {
                 'queue_name': {'type': 'string'},
@@ -0,0 +1,392 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+asyncio flavour of the v2 `Client`. All the methods sending requests
+to the server are coroutines::
+
+    from zaqarclient.queues.v2 import async_client
+
+    async def produce():
+        async with async_client.AsyncClient(URL, conf=conf) as cli:
+            queue = cli.queue('my_queue')
+            await queue.ensure_exists(force_create=True)
+            await asyncio.gather(*[queue.post({'body': i, 'ttl': 60})
+                                   for i in range(100)])
+
+A single `AsyncClient` shares one pooled connection to the server
+between every coroutine using it.
+"""
+
+import asyncio
+import functools
+
+from oslo_utils import uuidutils
+
+from zaqarclient._i18n import _  # noqa
+from zaqarclient import auth
+from zaqarclient.queues.v2 import async_core
+from zaqarclient.queues.v2 import message
+from zaqarclient.queues.v2 import queues
+from zaqarclient.transport import async_http
+from zaqarclient.transport import request
+
+
+class AsyncClient:
+    """asyncio client for Zaqar's API v2
+
+    :param url: Zaqar's instance base url.
+    :type url: str
+    :param version: API Version pointing to.
+    :type version: `int`
+    :param conf: CONF object.
+    :type conf: `oslo_config.cfg.CONF`
+    """
+
+    def __init__(self, url=None, version=2, conf=None, session=None):
+        self.conf = conf or {}
+
+        self.api_url = url
+        self.api_version = version
+        self.auth_opts = self.conf.get('auth_opts', {})
+        self.client_uuid = self.conf.get('client_uuid',
+                                         uuidutils.generate_uuid(dashed=False))
+        self.session = session
+        self._auth_backend = None
+        self._static_headers = None
+        self._transport = None
+
+    def _get_transport(self, request):
+        if self._transport is None:
+            self._transport = async_http.AsyncHttpTransport(self.conf)
+        return self._transport
+
+    def _get_auth_backend(self):
+        if self._auth_backend is None:
+            self._auth_backend = auth.get_backend(**self.auth_opts)
+        return self._auth_backend
+
+    def _get_static_headers(self):
+        if self._static_headers is None:
+            headers = request.project_headers(self.auth_opts)
+            headers['Client-ID'] = self.client_uuid
+            self._static_headers = headers
+        return self._static_headers
+
+    async def _request_and_transport(self):
+        auth_backend = self._get_auth_backend()
+        prepare = functools.partial(
+            request.prepare_request,
+            self.auth_opts,
+            auth_backend=auth_backend,
+            static_headers=self._get_static_headers(),
+            endpoint=self.api_url,
+            api=self.api_version,
+            session=self.session)
+
+        if auth_backend.blocking:
+            # Authenticating may talk to Keystone, keep
+            # the event loop running in the meantime.
+            loop = asyncio.get_running_loop()
+            req = await loop.run_in_executor(None, prepare)
+        else:
+            req = prepare()
+
+        trans = self._get_transport(req)
+        return req, trans
+
+    def queue(self, ref, **kwargs):
+        """Returns a queue instance
+
+        :param ref: Queue's reference id.
+        :type ref: str
+
+        :returns: A queue instance
+        :rtype: `AsyncQueue`
+        """
+        return AsyncQueue(self, ref, **kwargs)
+
+    async def queues(self, **params):
+        """Gets a page of queues from the server
+
+        :returns: A list of queues and their count, if requested.
+        :rtype: `tuple`
+        """
+        req, trans = await self._request_and_transport()
+        queue_list = await async_core.queue_list(trans, req, **params)
+
+        count = None
+        if params.get("with_count"):
+            count = queue_list.get("count", None)
+
+        return ([AsyncQueue(self, q['name'], href=q.get('href'),
+                            metadata=q.get('metadata'))
+                 for q in queue_list.get('queues', [])], count)
+
+    async def ping(self):
+        """Gets the health status of Zaqar server."""
+        req, trans = await self._request_and_transport()
+        return await async_core.ping(trans, req)
+
+    async def health(self):
+        """Gets the detailed health status of Zaqar server."""
+        req, trans = await self._request_and_transport()
+        return await async_core.health(trans, req)
+
+    async def close(self):
+        """Closes the connections held by this client."""
+        if self._transport is not None:
+            transport, self._transport = self._transport, None
+            await transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class AsyncQueue:
+    """asyncio flavour of `zaqarclient.queues.v2.queues.Queue`
+
+    Unlike the sync `Queue`, instantiating an `AsyncQueue` never
+    talks to the server. Use `ensure_exists` to create it.
+    """
+
+    def __init__(self, client, name, href=None, metadata=None):
+        self.client = client
+
+        if name == "":
+            raise ValueError(_('Queue name does not have a value'))
+
+        if not queues.QUEUE_NAME_REGEX.match(str(name)):
+            raise ValueError(_('The queue name may only contain ASCII '
+                               'letters, digits, underscores and dashes.'))
+
+        self._name = name
+        self._metadata = metadata
+        self._href = href
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def href(self):
+        return self._href
+
+    async def exists(self):
+        """Checks if the queue exists."""
+        req, trans = await self.client._request_and_transport()
+        return await async_core.queue_exists(trans, req, self._name)
+
+    async def ensure_exists(self, force_create=False):
+        """Ensures a queue exists"""
+        req, trans = await self.client._request_and_transport()
+        if force_create:
+            await async_core.queue_create(trans, req, self._name)
+
+    async def metadata(self, new_meta=None, force_reload=False):
+        """Get metadata and return it
+
+        Refer to `zaqarclient.queues.v2.queues.Queue.metadata`.
+        """
+        if new_meta is None and self._metadata and not force_reload:
+            return self._metadata
+
+        req, trans = await self.client._request_and_transport()
+        self._metadata = await async_core.queue_get(trans, req, self._name)
+
+        if new_meta is not None:
+            changes = queues._metadata_patch(self._metadata, new_meta)
+            req, trans = await self.client._request_and_transport()
+            self._metadata = await async_core.queue_update(trans, req,
+                                                           self._name,
+                                                           metadata=changes)
+
+        return self._metadata
+
+    async def stats(self):
+        req, trans = await self.client._request_and_transport()
+        return await async_core.queue_get_stats(trans, req, self._name)
+
+    async def delete(self):
+        req, trans = await self.client._request_and_transport()
+        await async_core.queue_delete(trans, req, self._name)
+
+    async def purge(self, resource_types=None):
+        req, trans = await self.client._request_and_transport()
+        await async_core.queue_purge(trans, req, self._name,
+                                     resource_types=resource_types)
+
+    # Messages API
+
+    async def post(self, messages):
+        """Posts one or more messages to this queue
+
+        :param messages: One or more messages to post
+        :type messages: `list` or `dict`
+
+        :returns: A dict with the result of this operation.
+        :rtype: `dict`
+        """
+        if not isinstance(messages, list):
+            messages = [messages]
+
+        req, trans = await self.client._request_and_transport()
+        return await async_core.message_post(trans, req, self._name,
+                                             {'messages': messages})
+
+    async def message(self, message_id):
+        """Gets a message by id
+
+        :returns: A message
+        :rtype: `AsyncMessage`
+        """
+        req, trans = await self.client._request_and_transport()
+        msg = await async_core.message_get(trans, req, self._name,
+                                           message_id)
+        return AsyncMessage(self, **msg)
+
+    async def messages(self, *messages, **params):
+        """Gets a page of messages from the server
+
+        Refer to `zaqarclient.queues.v2.queues.Queue.messages`.
+
+        :returns: List of messages
+        :rtype: `list` of `AsyncMessage`
+        """
+        req, trans = await self.client._request_and_transport()
+
+        if messages:
+            msgs = await async_core.message_get_many(trans, req,
+                                                     self._name, messages)
+        else:
+            msgs = await async_core.message_list(trans, req, self._name,
+                                                 **params)
+
+        if isinstance(msgs, dict):
+            msgs = msgs.get('messages', [])
+        return [AsyncMessage(self, **msg) for msg in msgs or []]
+
+    async def delete_messages(self, *messages):
+        """Deletes a set of messages from the server"""
+        req, trans = await self.client._request_and_transport()
+        await async_core.message_delete_many(trans, req, self._name,
+                                             set(messages))
+
+    async def pop(self, count=1):
+        """Pop `count` messages from the server
+
+        :returns: List of messages
+        :rtype: `list` of `AsyncMessage`
+        """
+        req, trans = await self.client._request_and_transport()
+        msgs = await async_core.message_pop(trans, req, self._name,
+                                            count=count)
+        return [AsyncMessage(self, **msg)
+                for msg in (msgs or {}).get('messages', [])]
+
+    async def claim(self, id=None, ttl=None, grace=None, limit=None):
+        """Creates a claim or loads an existing one.
+
+        :returns: The claim, with its messages loaded.
+        :rtype: `AsyncClaim`
+        """
+        claim = AsyncClaim(self, id=id, ttl=ttl, grace=grace, limit=limit)
+        if id is None:
+            await claim._create()
+        else:
+            await claim._get()
+        return claim
+
+
+class AsyncMessage(message.Message):
+    """asyncio flavour of `zaqarclient.queues.v2.message.Message`"""
+
+    async def delete(self):
+        req, trans = await self.queue.client._request_and_transport()
+        await async_core.message_delete(trans, req, self.queue._name,
+                                        self.id, self.claim_id)
+
+
+class AsyncClaim:
+    """asyncio flavour of `zaqarclient.queues.v2.claim.Claim`
+
+    Claims are created, or loaded, by `AsyncQueue.claim`.
+    """
+
+    def __init__(self, queue, id=None, ttl=None, grace=None, limit=None):
+        self._queue = queue
+        self.id = id
+        self.ttl = ttl
+        self.grace = grace
+        self.age = None
+        self._limit = limit
+        self.messages = []
+
+    def __repr__(self):
+        return '<AsyncClaim id:{id} ttl:{ttl} age:{age}>'.format(
+            id=self.id, ttl=self.ttl, age=self.age)
+
+    def _load_messages(self, msgs):
+        self.messages = [AsyncMessage(self._queue, **msg)
+                         for msg in msgs or []]
+
+    async def _get(self):
+        req, trans = await self._queue.client._request_and_transport()
+        claim_res = await async_core.claim_get(trans, req,
+                                               self._queue._name, self.id)
+        self.age = claim_res['age']
+        self.ttl = claim_res['ttl']
+        self.grace = claim_res.get('grace')
+        self._load_messages(claim_res.get('messages', []))
+
+    async def _create(self):
+        req, trans = await self._queue.client._request_and_transport()
+        msgs = await async_core.claim_create(trans, req,
+                                             self._queue._name,
+                                             ttl=self.ttl,
+                                             grace=self.grace,
+                                             limit=self._limit)
+
+        # extract the id from the first message
+        if msgs is not None:
+            msgs = msgs['messages']
+            self.id = msgs[0]['href'].split('=')[-1]
+        self._load_messages(msgs)
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    async def reload(self):
+        """Refreshes the claim's attributes and messages."""
+        await self._get()
+
+    async def delete(self):
+        req, trans = await self._queue.client._request_and_transport()
+        await async_core.claim_delete(trans, req, self._queue._name, self.id)
+
+    async def update(self, ttl=None, grace=None):
+        req, trans = await self._queue.client._request_and_transport()
+        kwargs = {}
+        if ttl is not None:
+            kwargs['ttl'] = ttl
+        if grace is not None:
+            kwargs['grace'] = grace
+        res = await async_core.claim_update(trans, req, self._queue._name,
+                                            self.id, **kwargs)
+        if ttl is not None:
+            self.ttl = ttl
+        if grace is not None:
+            self.grace = grace
+        return res
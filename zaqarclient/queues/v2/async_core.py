@@ -0,0 +1,206 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+This module is the asyncio counterpart of `zaqarclient.queues.v2.core`.
+Functions here pack up the request exactly like the ones in `core` do,
+but they are coroutines and expect the transport's `send` to be a
+coroutine as well, i.e: `zaqarclient.transport.async_http`.
+"""
+
+import zaqarclient.transport.errors as errors
+
+
+async def _send(transport, request):
+    resp = await transport.send(request)
+    return resp.deserialized_content
+
+
+async def _common_queue_ops(operation, transport, request, name):
+    request.operation = operation
+    request.params['queue_name'] = name
+    return await _send(transport, request)
+
+
+async def queue_create(transport, request, name, metadata=None):
+    """Creates a queue"""
+    request.operation = 'queue_create'
+    request.params['queue_name'] = name
+    request.content = metadata and transport.codec.dumps(metadata)
+    return await _send(transport, request)
+
+
+async def queue_update(transport, request, name, metadata):
+    """Updates a queue's metadata using PATCH"""
+    request.operation = 'queue_update'
+    request.params['queue_name'] = name
+    request.content = transport.codec.dumps(metadata)
+    return await _send(transport, request)
+
+
+async def queue_exists(transport, request, name):
+    """Checks if the queue exists."""
+    try:
+        await _common_queue_ops('queue_exists', transport, request, name)
+        return True
+    except errors.ResourceNotFound:
+        return False
+
+
+async def queue_get(transport, request, name):
+    """Retrieve a queue."""
+    return await _common_queue_ops('queue_get', transport, request, name)
+
+
+async def queue_get_stats(transport, request, name):
+    return await _common_queue_ops('queue_get_stats', transport,
+                                   request, name)
+
+
+async def queue_delete(transport, request, name):
+    """Deletes queue."""
+    return await _common_queue_ops('queue_delete', transport, request, name)
+
+
+async def queue_list(transport, request, **kwargs):
+    """Gets a list of queues"""
+    request.operation = 'queue_list'
+    request.params.update(kwargs)
+
+    resp = await transport.send(request)
+    if not resp.deserialized_content:
+        return {'links': [], 'queues': []}
+    return resp.deserialized_content
+
+
+async def queue_purge(transport, request, name, resource_types=None):
+    """Purge resources under a queue"""
+    request.operation = 'queue_purge'
+    request.params['queue_name'] = name
+    if resource_types:
+        request.content = transport.codec.dumps(
+            {'resource_types': resource_types})
+    await transport.send(request)
+
+
+async def message_list(transport, request, queue_name, **kwargs):
+    """Gets a list of messages in queue `queue_name`"""
+    request.operation = 'message_list'
+    request.params['queue_name'] = queue_name
+    request.params.update(kwargs)
+
+    resp = await transport.send(request)
+    if not resp.deserialized_content:
+        return {'links': [], 'messages': []}
+    return resp.deserialized_content
+
+
+async def message_post(transport, request, queue_name, messages):
+    """Post messages to `queue_name`"""
+    request.operation = 'message_post'
+    request.params['queue_name'] = queue_name
+    request.content = transport.codec.dumps(messages)
+    return await _send(transport, request)
+
+
+async def message_get(transport, request, queue_name, message_id):
+    """Gets one message from the queue by id"""
+    request.operation = 'message_get'
+    request.params['queue_name'] = queue_name
+    request.params['message_id'] = message_id
+    return await _send(transport, request)
+
+
+async def message_get_many(transport, request, queue_name, messages):
+    """Gets many messages by id"""
+    request.operation = 'message_get_many'
+    request.params['queue_name'] = queue_name
+    request.params['ids'] = messages
+    return await _send(transport, request)
+
+
+async def message_delete(transport, request, queue_name, message_id,
+                         claim_id=None):
+    """Deletes messages from `queue_name`"""
+    request.operation = 'message_delete'
+    request.params['queue_name'] = queue_name
+    request.params['message_id'] = message_id
+    if claim_id:
+        request.params['claim_id'] = claim_id
+    await transport.send(request)
+
+
+async def message_delete_many(transport, request, queue_name, ids):
+    """Deletes `ids` messages from `queue_name`"""
+    request.operation = 'message_delete_many'
+    request.params['queue_name'] = queue_name
+    request.params['ids'] = ids
+    await transport.send(request)
+
+
+async def message_pop(transport, request, queue_name, count):
+    """Pops out `count` messages from `queue_name`"""
+    request.operation = 'message_pop'
+    request.params['queue_name'] = queue_name
+    request.params['pop'] = count
+    return await _send(transport, request)
+
+
+async def claim_create(transport, request, queue_name, **kwargs):
+    """Creates a Claim `claim_id` on the queue `queue_name`"""
+    request.operation = 'claim_create'
+    request.params['queue_name'] = queue_name
+    if 'limit' in kwargs:
+        request.params['limit'] = kwargs.pop('limit')
+    request.content = transport.codec.dumps(kwargs)
+    return await _send(transport, request)
+
+
+async def claim_get(transport, request, queue_name, claim_id):
+    """Gets a Claim `claim_id`"""
+    request.operation = 'claim_get'
+    request.params['queue_name'] = queue_name
+    request.params['claim_id'] = claim_id
+    return await _send(transport, request)
+
+
+async def claim_update(transport, request, queue_name, claim_id, **kwargs):
+    """Updates a Claim `claim_id`"""
+    request.operation = 'claim_update'
+    request.params['queue_name'] = queue_name
+    request.params['claim_id'] = claim_id
+    request.content = transport.codec.dumps(kwargs)
+    return await _send(transport, request)
+
+
+async def claim_delete(transport, request, queue_name, claim_id):
+    """Deletes a Claim `claim_id`"""
+    request.operation = 'claim_delete'
+    request.params['queue_name'] = queue_name
+    request.params['claim_id'] = claim_id
+    await transport.send(request)
+
+
+async def ping(transport, request):
+    """Check the health of web head for load balancing"""
+    request.operation = 'ping'
+    try:
+        await transport.send(request)
+        return True
+    except Exception:
+        return False
+
+
+async def health(transport, request):
+    """Get detailed health status of Zaqar server"""
+    request.operation = 'health'
+    return await _send(transport, request)
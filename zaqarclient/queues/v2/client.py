@@ -13,7 +13,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import urllib.parse
+
 from oslo_utils import uuidutils
+
+from zaqarclient import auth
 from zaqarclient.queues.v2 import core
 from zaqarclient.queues.v2 import flavor
 from zaqarclient.queues.v2 import iterator
@@ -21,14 +25,19 @@ from zaqarclient.queues.v2 import pool
 from zaqarclient.queues.v2 import queues
 from zaqarclient.queues.v2 import subscription
 from zaqarclient import transport
+from zaqarclient.transport import balancer
+from zaqarclient.transport import circuit
+from zaqarclient.transport import deadline
 from zaqarclient.transport import request
 
 
 class Client:
     """Client base class
 
-    :param url: Zaqar's instance base url.
-    :type url: str
+    :param url: Zaqar's instance base url, or a list of them
+        to balance the requests between. When it's not set, the
+        auth backend resolves it, i.e: from Keystone's catalog.
+    :type url: str or list
     :param version: API Version pointing to.
     :type version: `int`
     :param conf: CONF object.
@@ -40,41 +49,169 @@ class Client:
     def __init__(self, url=None, version=2, conf=None, session=None):
         self.conf = conf or {}
 
+        self._balancer = None
+        if isinstance(url, (list, tuple)):
+            if len(url) > 1:
+                self._balancer = self._create_balancer(url)
+            url = url[0] if url else None
+
         self.api_url = url
         self.api_version = version
         self.auth_opts = self.conf.get('auth_opts', {})
         self.client_uuid = self.conf.get('client_uuid',
                                          uuidutils.generate_uuid(dashed=False))
         self.session = session
+        self._auth_backend = None
+        self._static_headers = None
+        self._circuit_breakers = circuit.CircuitBreakers(
+            **self.conf.get('circuit_breaker_opts', {}))
+
+        # Transports are cached per scheme and endpoint. Auth
+        # is applied to each request, hence they outlive the
+        # tokens they've sent.
+        self._transports = {}
 
     def _get_transport(self, request):
         """Gets a transport and caches its instance
 
         This method gets a transport instance based on
         the request's endpoint and caches that for later
-        use. The transport instance is invalidated whenever
-        a session expires.
+        use, along with its connection pool.
 
         :param request: The request to use to load the
             transport instance.
         :type request: :class:`zaqarclient.transport.request.Request`
         """
 
-        return transport.get_transport_for(request,
-                                           version=self.api_version,
-                                           options=self.conf)
+        parsed = urllib.parse.urlparse(request.endpoint)
+        key = (parsed.scheme, parsed.netloc)
 
-    def _request_and_transport(self):
-        req = request.prepare_request(self.auth_opts,
-                                      endpoint=self.api_url,
-                                      api=self.api_version,
-                                      session=self.session)
+        trans = self._transports.get(key)
+        if trans is not None:
+            return trans
+
+        trans = transport.get_transport_for(request,
+                                            version=self.api_version,
+                                            options=self.conf)
+        trans.circuit_breakers = self._circuit_breakers
+        self._transports[key] = trans
+        return trans
+
+    def _invalidate_transport(self, key):
+        trans = self._transports.pop(key, None)
+        if trans is not None:
+            trans.cleanup()
+
+    def invalidate_transports(self):
+        """Drops all the cached transport instances.
+
+        Transports are created again on the next request and the
+        connections of the dropped ones are closed. This is useful
+        when the endpoints used by this client have changed.
+        """
+        for key in list(self._transports):
+            self._invalidate_transport(key)
+
+    def circuit_breakers(self):
+        """Gets the state of the circuit breakers of this client.
+
+        :returns: The state of each endpoint's breaker, i.e:
+            `{'http://zaqar:8888': {'state': 'open', ...}}`
+        :rtype: dict
+        """
+        return self._circuit_breakers.stats()
+
+    def _get_auth_backend(self):
+        # The backend is kept for the
+        # client's lifetime so that the credentials it
+        # caches, i.e: Keystone tokens, are reused.
+        if self._auth_backend is None:
+            self._auth_backend = auth.get_backend(**self.auth_opts)
+        return self._auth_backend
+
+    def _get_static_headers(self):
+        if self._static_headers is None:
+            headers = request.project_headers(self.auth_opts)
+            headers['Client-ID'] = self.client_uuid
+            self._static_headers = headers
+        return self._static_headers
+
+    def _create_balancer(self, urls):
+        opts = dict(self.conf.get('balancer_opts', {}))
+        self._failover = opts.pop('failover', 1)
+        return balancer.Balancer(urls, probe=self._probe, **opts)
+
+    def _probe(self, url):
+        req = self._prepare_request(url)
+        return core.ping(self._get_transport(req), req)
+
+    def _prepare_request(self, endpoint):
+        return request.prepare_request(
+            self.auth_opts,
+            auth_backend=self._get_auth_backend(),
+            static_headers=self._get_static_headers(),
+            endpoint=endpoint,
+            api=self.api_version,
+            session=self.session)
+
+    def _balanced(self, req):
+        trans = balancer.BalancedTransport(self._balancer,
+                                           self._get_transport,
+                                           self._get_transport(req),
+                                           failover=self._failover)
+        return req, trans
 
-        req.headers['Client-ID'] = self.client_uuid
+    def _request_and_transport(self):
+        if self._balancer is not None:
+            return self._balanced(
+                self._prepare_request(self._balancer.choose()))
+
+        req = self._prepare_request(self.api_url)
+        if self.api_url is None:
+            # The auth backend resolved the
+            # endpoint, balance between all of them if it
+            # knows more than one. This request goes through the
+            # balancer too, like every one after it.
+            endpoints = self._get_auth_backend().get_endpoints()
+            if len(endpoints) > 1:
+                self._balancer = self._create_balancer(endpoints)
+                req.endpoint = self._balancer.choose()
+                return self._balanced(req)
 
         trans = self._get_transport(req)
         return req, trans
 
+    def deadline(self, seconds):
+        """Sets a deadline for the requests sent within a block
+
+        Every request prepared inside the `with` block, including
+        the pages later loaded by iterators created inside it,
+        must complete within `seconds`::
+
+            with client.deadline(5):
+                claim = queue.claim(ttl=60, grace=60)
+                for msg in claim:
+                    msg.delete()
+
+        :param seconds: Seconds from now.
+        :type seconds: float
+
+        :raises: `zaqarclient.errors.DeadlineExceeded` from the
+            requests that can't complete in time.
+        """
+        return deadline.deadline(seconds)
+
+    def endpoints(self):
+        """Gets the state of the endpoints requests are balanced between.
+
+        :returns: The load and health of each endpoint, or an
+            empty dict when requests go to a single endpoint.
+        :rtype: dict
+        """
+        if self._balancer is None:
+            return {}
+        return self._balancer.stats()
+
     def transport(self):
         """Gets a transport based the api url and version.
 
@@ -28,12 +28,54 @@ Functions present in this module assume that:
 """
 
 import datetime
-import json
+import functools
+import inspect
 
+from oslo_log import log as logging
 from oslo_utils import timeutils
 
 import zaqarclient.transport.errors as errors
 
+LOG = logging.getLogger(__name__)
+
+
+def _run_callback(callback, future):
+    try:
+        callback(future)
+    except Exception:
+        LOG.exception('Callback %s raised an exception', callback)
+
+
+def _with_callback(func):
+    """Runs `func` asynchronously if a callback is passed
+
+    The request is then sent by the transport's executor and
+    the decorated function returns a `concurrent.futures.Future`.
+    Once the request completes, the callback is called with that
+    future, whose `result` is either the deserialized result or
+    the exception raised by the call.
+    """
+    signature = inspect.signature(func)
+    position = list(signature.parameters).index('callback')
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if 'callback' not in kwargs and len(args) <= position:
+            return func(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        callback = bound.arguments.get('callback')
+        if callback is None:
+            return func(*args, **kwargs)
+
+        bound.arguments['callback'] = None
+        transport = bound.arguments['transport']
+        future = transport.executor.submit(func, *bound.args,
+                                           **bound.kwargs)
+        future.add_done_callback(functools.partial(_run_callback, callback))
+        return future
+    return wrapper
+
 
 def _common_queue_ops(operation, transport, request, name, callback=None):
     """Function for common operation
@@ -48,8 +90,8 @@ def _common_queue_ops(operation, transport, request, name, callback=None):
     :param name: Queue reference name.
     :type name: str
     :param callback: Optional callable to use as callback.
-        If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
+        If specified, this request will be sent asynchronously
+        and a `concurrent.futures.Future` is returned instead.
     :type callback: Callable object.
     """
     request.operation = operation
@@ -58,6 +100,7 @@ def _common_queue_ops(operation, transport, request, name, callback=None):
     return resp.deserialized_content
 
 
+@_with_callback
 def queue_create(transport, request, name,
                  metadata=None, callback=None):
     """Creates a queue
@@ -71,19 +114,20 @@ def queue_create(transport, request, name,
     :param metadata: Queue's metadata object.
     :type metadata: `dict`
     :param callback: Optional callable to use as callback.
-        If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
+        If specified, this request will be sent asynchronously
+        and a `concurrent.futures.Future` is returned instead.
     :type callback: Callable object.
     """
 
     request.operation = 'queue_create'
     request.params['queue_name'] = name
-    request.content = metadata and json.dumps(metadata)
+    request.content = metadata and transport.codec.dumps(metadata)
 
     resp = transport.send(request)
     return resp.deserialized_content
 
 
+@_with_callback
 def queue_update(transport, request, name, metadata, callback=None):
     """Updates a queue's metadata using PATCH
 
@@ -96,19 +140,20 @@ def queue_update(transport, request, name, metadata, callback=None):
     :param metadata: Queue's metadata object.
     :type metadata: `list`
     :param callback: Optional callable to use as callback.
-        If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
+        If specified, this request will be sent asynchronously
+        and a `concurrent.futures.Future` is returned instead.
     :type callback: Callable object.
     """
 
     request.operation = 'queue_update'
     request.params['queue_name'] = name
-    request.content = json.dumps(metadata)
+    request.content = transport.codec.dumps(metadata)
 
     resp = transport.send(request)
     return resp.deserialized_content
 
 
+@_with_callback
 def queue_exists(transport, request, name, callback=None):
     """Checks if the queue exists."""
     try:
@@ -119,24 +164,27 @@ def queue_exists(transport, request, name, callback=None):
         return False
 
 
+@_with_callback
 def queue_get(transport, request, name, callback=None):
     """Retrieve a queue."""
     return _common_queue_ops('queue_get', transport,
                              request, name, callback=callback)
 
 
+@_with_callback
 def queue_get_metadata(transport, request, name, callback=None):
     """Gets queue metadata."""
     return _common_queue_ops('queue_get_metadata', transport,
                              request, name, callback=callback)
 
 
+@_with_callback
 def queue_set_metadata(transport, request, name, metadata, callback=None):
     """Sets queue metadata."""
 
     request.operation = 'queue_set_metadata'
     request.params['queue_name'] = name
-    request.content = json.dumps(metadata)
+    request.content = transport.codec.dumps(metadata)
 
     transport.send(request)
 
@@ -146,12 +194,14 @@ def queue_get_stats(transport, request, name):
                              request, name)
 
 
+@_with_callback
 def queue_delete(transport, request, name, callback=None):
     """Deletes queue."""
     return _common_queue_ops('queue_delete', transport,
                              request, name, callback=callback)
 
 
+@_with_callback
 def queue_list(transport, request, callback=None, **kwargs):
     """Gets a list of queues
 
@@ -160,8 +210,8 @@ def queue_list(transport, request, callback=None, **kwargs):
     :param request: Request instance ready to be sent.
     :type request: `transport.request.Request`
     :param callback: Optional callable to use as callback.
-        If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
+        If specified, this request will be sent asynchronously
+        and a `concurrent.futures.Future` is returned instead.
     :type callback: Callable object.
     :param kwargs: Optional arguments for this operation.
         - marker: Where to start getting queues from.
@@ -174,12 +224,39 @@ def queue_list(transport, request, callback=None, **kwargs):
 
     resp = transport.send(request)
 
-    if not resp.content:
+    if not resp.deserialized_content:
         return {'links': [], 'queues': []}
 
     return resp.deserialized_content
 
 
+def queue_list_stream(transport, request, **kwargs):
+    """Streams the list of queues
+
+    Unlike `queue_list`, queues are decoded as the response is
+    read, which keeps detailed listings from being loaded in
+    memory all at once.
+
+    :param transport: Transport instance to use
+    :type transport: `transport.base.Transport`
+    :param request: Request instance ready to be sent.
+    :type request: `transport.request.Request`
+    :param kwargs: Optional arguments for this operation.
+        Refer to `queue_list`.
+
+    :returns: An iterator over the queues. Its `links`
+        attribute is set once it's been consumed.
+    :rtype: `transport.response.RecordIterator`
+    """
+
+    request.operation = 'queue_list'
+    request.params.update(kwargs)
+    request.stream = True
+
+    resp = transport.send(request)
+    return resp.iter_records('queues')
+
+
 def queue_purge(transport, request, name, resource_types=None):
     """Purge resources under a queue
 
@@ -195,12 +272,14 @@ def queue_purge(transport, request, name, resource_types=None):
     request.operation = 'queue_purge'
     request.params['queue_name'] = name
     if resource_types:
-        request.content = json.dumps({'resource_types': resource_types})
+        request.content = transport.codec.dumps(
+            {'resource_types': resource_types})
 
     resp = transport.send(request)
     return resp.deserialized_content
 
 
+@_with_callback
 def message_list(transport, request, queue_name, callback=None, **kwargs):
     """Gets a list of messages in queue `queue_name`
 
@@ -211,8 +290,8 @@ def message_list(transport, request, queue_name, callback=None, **kwargs):
     :param queue_name: Queue reference name.
     :type queue_name: str
     :param callback: Optional callable to use as callback.
-        If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
+        If specified, this request will be sent asynchronously
+        and a `concurrent.futures.Future` is returned instead.
     :type callback: Callable object.
     :param kwargs: Optional arguments for this operation.
         - marker: Where to start getting messages from.
@@ -232,7 +311,7 @@ def message_list(transport, request, queue_name, callback=None, **kwargs):
 
     resp = transport.send(request)
 
-    if not resp.content:
+    if not resp.deserialized_content:
         # NOTE(flaper87): We could also return None
         # or an empty dict, however, we're giving
         # more value to a consistent API here by
@@ -243,6 +322,36 @@ def message_list(transport, request, queue_name, callback=None, **kwargs):
     return resp.deserialized_content
 
 
+def message_list_stream(transport, request, queue_name, **kwargs):
+    """Streams the messages in queue `queue_name`
+
+    Unlike `message_list`, messages are decoded as the response
+    is read, hence only one of them is held in memory at a time.
+
+    :param transport: Transport instance to use
+    :type transport: `transport.base.Transport`
+    :param request: Request instance ready to be sent.
+    :type request: `transport.request.Request`
+    :param queue_name: Queue reference name.
+    :type queue_name: str
+    :param kwargs: Optional arguments for this operation.
+        Refer to `message_list`.
+
+    :returns: An iterator over the messages. Its `links`
+        attribute is set once it's been consumed.
+    :rtype: `transport.response.RecordIterator`
+    """
+
+    request.operation = 'message_list'
+    request.params['queue_name'] = queue_name
+    request.params.update(kwargs)
+    request.stream = True
+
+    resp = transport.send(request)
+    return resp.iter_records('messages')
+
+
+@_with_callback
 def message_post(transport, request, queue_name, messages, callback=None):
     """Post messages to `queue_name`
 
@@ -255,19 +364,20 @@ def message_post(transport, request, queue_name, messages, callback=None):
     :param messages: One or more messages to post.
     :param messages: `list`
     :param callback: Optional callable to use as callback.
-        If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
+        If specified, this request will be sent asynchronously
+        and a `concurrent.futures.Future` is returned instead.
     :type callback: Callable object.
     """
 
     request.operation = 'message_post'
     request.params['queue_name'] = queue_name
-    request.content = json.dumps(messages)
+    request.content = transport.codec.dumps(messages)
 
     resp = transport.send(request)
     return resp.deserialized_content
 
 
+@_with_callback
 def message_get(transport, request, queue_name, message_id, callback=None):
     """Gets one message from the queue by id
 
@@ -280,8 +390,8 @@ def message_get(transport, request, queue_name, message_id, callback=None):
     :param message_id: Message reference.
     :param message_id: str
     :param callback: Optional callable to use as callback.
-        If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
+        If specified, this request will be sent asynchronously
+        and a `concurrent.futures.Future` is returned instead.
     :type callback: Callable object.
     """
 
@@ -293,6 +403,7 @@ def message_get(transport, request, queue_name, message_id, callback=None):
     return resp.deserialized_content
 
 
+@_with_callback
 def message_get_many(transport, request, queue_name, messages, callback=None):
     """Gets many messages by id
 
@@ -305,8 +416,8 @@ def message_get_many(transport, request, queue_name, messages, callback=None):
     :param messages: Messages references.
     :param messages: list of str
     :param callback: Optional callable to use as callback.
-        If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
+        If specified, this request will be sent asynchronously
+        and a `concurrent.futures.Future` is returned instead.
     :type callback: Callable object.
     """
 
@@ -318,6 +429,7 @@ def message_get_many(transport, request, queue_name, messages, callback=None):
     return resp.deserialized_content
 
 
+@_with_callback
 def message_delete(transport, request, queue_name, message_id,
                    claim_id=None, callback=None):
     """Deletes messages from `queue_name`
@@ -331,8 +443,8 @@ def message_delete(transport, request, queue_name, message_id,
     :param message_id: Message reference.
     :param message_id: str
     :param callback: Optional callable to use as callback.
-        If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
+        If specified, this request will be sent asynchronously
+        and a `concurrent.futures.Future` is returned instead.
     :type callback: Callable object.
     """
 
@@ -345,6 +457,7 @@ def message_delete(transport, request, queue_name, message_id,
     transport.send(request)
 
 
+@_with_callback
 def message_delete_many(transport, request, queue_name,
                         ids, callback=None):
     """Deletes `ids` messages from `queue_name`
@@ -358,8 +471,8 @@ def message_delete_many(transport, request, queue_name,
     :param ids: Ids of the messages to delete
     :type ids: List of str
     :param callback: Optional callable to use as callback.
-        If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
+        If specified, this request will be sent asynchronously
+        and a `concurrent.futures.Future` is returned instead.
     :type callback: Callable object.
     """
 
@@ -369,6 +482,7 @@ def message_delete_many(transport, request, queue_name,
     transport.send(request)
 
 
+@_with_callback
 def message_pop(transport, request, queue_name,
                 count, callback=None):
     """Pops out `count` messages from `queue_name`
@@ -382,12 +496,12 @@ def message_pop(transport, request, queue_name,
     :param count: Number of messages to pop.
     :type count: int
     :param callback: Optional callable to use as callback.
-        If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
+        If specified, this request will be sent asynchronously
+        and a `concurrent.futures.Future` is returned instead.
     :type callback: Callable object.
     """
 
-    request.operation = 'message_delete_many'
+    request.operation = 'message_pop'
     request.params['queue_name'] = queue_name
     request.params['pop'] = count
 
@@ -410,12 +524,37 @@ def claim_create(transport, request, queue_name, **kwargs):
     if 'limit' in kwargs:
         request.params['limit'] = kwargs.pop('limit')
 
-    request.content = json.dumps(kwargs)
+    request.content = transport.codec.dumps(kwargs)
 
     resp = transport.send(request)
     return resp.deserialized_content
 
 
+def claim_create_stream(transport, request, queue_name, **kwargs):
+    """Creates a Claim on the queue `queue_name` and streams its messages
+
+    :param transport: Transport instance to use
+    :type transport: `transport.base.Transport`
+    :param request: Request instance ready to be sent.
+    :type request: `transport.request.Request`
+
+    :returns: An iterator over the claimed messages.
+    :rtype: `transport.response.RecordIterator`
+    """
+
+    request.operation = 'claim_create'
+    request.params['queue_name'] = queue_name
+
+    if 'limit' in kwargs:
+        request.params['limit'] = kwargs.pop('limit')
+
+    request.content = transport.codec.dumps(kwargs)
+    request.stream = True
+
+    resp = transport.send(request)
+    return resp.iter_records('messages')
+
+
 def claim_get(transport, request, queue_name, claim_id):
     """Gets a Claim `claim_id`
 
@@ -445,7 +584,7 @@ def claim_update(transport, request, queue_name, claim_id, **kwargs):
     request.operation = 'claim_update'
     request.params['queue_name'] = queue_name
     request.params['claim_id'] = claim_id
-    request.content = json.dumps(kwargs)
+    request.content = transport.codec.dumps(kwargs)
 
     resp = transport.send(request)
     return resp.deserialized_content
@@ -466,6 +605,7 @@ def claim_delete(transport, request, queue_name, claim_id):
     transport.send(request)
 
 
+@_with_callback
 def pool_get(transport, request, pool_name, callback=None):
     """Gets pool data
 
@@ -501,7 +641,7 @@ def pool_create(transport, request, pool_name, pool_data):
 
     request.operation = 'pool_create'
     request.params['pool_name'] = pool_name
-    request.content = json.dumps(pool_data)
+    request.content = transport.codec.dumps(pool_data)
     transport.send(request)
 
 
@@ -520,7 +660,7 @@ def pool_update(transport, request, pool_name, pool_data):
 
     request.operation = 'pool_update'
     request.params['pool_name'] = pool_name
-    request.content = json.dumps(pool_data)
+    request.content = transport.codec.dumps(pool_data)
 
     resp = transport.send(request)
     return resp.deserialized_content
@@ -543,7 +683,7 @@ def pool_list(transport, request, **kwargs):
 
     resp = transport.send(request)
 
-    if not resp.content:
+    if not resp.deserialized_content:
         return {'links': [], 'pools': []}
 
     return resp.deserialized_content
@@ -580,10 +720,11 @@ def flavor_create(transport, request, name, flavor_data):
 
     request.operation = 'flavor_create'
     request.params['flavor_name'] = name
-    request.content = json.dumps(flavor_data)
+    request.content = transport.codec.dumps(flavor_data)
     transport.send(request)
 
 
+@_with_callback
 def flavor_get(transport, request, flavor_name, callback=None):
     """Gets flavor data
 
@@ -618,7 +759,7 @@ def flavor_update(transport, request, flavor_name, flavor_data):
 
     request.operation = 'flavor_update'
     request.params['flavor_name'] = flavor_name
-    request.content = json.dumps(flavor_data)
+    request.content = transport.codec.dumps(flavor_data)
 
     resp = transport.send(request)
     return resp.deserialized_content
@@ -641,7 +782,7 @@ def flavor_list(transport, request, **kwargs):
 
     resp = transport.send(request)
 
-    if not resp.content:
+    if not resp.deserialized_content:
         return {'links': [], 'flavors': []}
 
     return resp.deserialized_content
@@ -700,7 +841,7 @@ def signed_url_create(transport, request, queue_name, paths=None,
     if methods is not None:
         body['methods'] = methods
 
-    request.content = json.dumps(body)
+    request.content = transport.codec.dumps(body)
 
     resp = transport.send(request)
     return resp.deserialized_content
@@ -723,7 +864,7 @@ def subscription_create(transport, request, queue_name, subscription_data):
 
     request.operation = 'subscription_create'
     request.params['queue_name'] = queue_name
-    request.content = json.dumps(subscription_data)
+    request.content = transport.codec.dumps(subscription_data)
     resp = transport.send(request)
 
     return resp.deserialized_content
@@ -771,7 +912,7 @@ def subscription_update(transport, request, queue_name, subscription_id,
     request.operation = 'subscription_update'
     request.params['queue_name'] = queue_name
     request.params['subscription_id'] = subscription_id
-    request.content = json.dumps(subscription_data)
+    request.content = transport.codec.dumps(subscription_data)
 
     resp = transport.send(request)
     return resp.deserialized_content
@@ -816,12 +957,13 @@ def subscription_list(transport, request, queue_name, **kwargs):
 
     resp = transport.send(request)
 
-    if not resp.content:
+    if not resp.deserialized_content:
         return {'links': [], 'subscriptions': []}
 
     return resp.deserialized_content
 
 
+@_with_callback
 def ping(transport, request, callback=None):
     """Check the health of web head for load balancing
 
@@ -830,8 +972,8 @@ def ping(transport, request, callback=None):
     :param request: Request instance ready to be sent.
     :type request: `transport.request.Request`
     :param callback: Optional callable to use as callback.
-        If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
+        If specified, this request will be sent asynchronously
+        and a `concurrent.futures.Future` is returned instead.
     :type callback: Callable object.
     """
 
@@ -843,6 +985,7 @@ def ping(transport, request, callback=None):
         return False
 
 
+@_with_callback
 def health(transport, request, callback=None):
     """Get detailed health status of Zaqar server
 
@@ -851,8 +994,8 @@ def health(transport, request, callback=None):
     :param request: Request instance ready to be sent.
     :type request: `transport.request.Request`
     :param callback: Optional callable to use as callback.
-        If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
+        If specified, this request will be sent asynchronously
+        and a `concurrent.futures.Future` is returned instead.
     :type callback: Callable object.
     """
 
@@ -861,6 +1004,7 @@ def health(transport, request, callback=None):
     return resp.deserialized_content
 
 
+@_with_callback
 def homedoc(transport, request, callback=None):
     """Get the detailed resource doc of Zaqar server
 
@@ -869,8 +1013,8 @@ def homedoc(transport, request, callback=None):
     :param request: Request instance ready to be sent.
     :type request: `transport.request.Request`
     :param callback: Optional callable to use as callback.
-        If specified, this request will be sent asynchronously.
-        (IGNORED UNTIL ASYNC SUPPORT IS COMPLETE)
+        If specified, this request will be sent asynchronously
+        and a `concurrent.futures.Future` is returned instead.
     :type callback: Callable object.
     """
 
@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from zaqarclient.transport import deadline
+
 
 class _Iterator:
     """Base Iterator
@@ -36,6 +38,9 @@ class _Iterator:
     :type client: `v2.Client`
     :param listing_response: Response returned by the listing call
     :type listing_response: Dict
+
+    The deadline in effect when the iterator is created, if any,
+    applies to the pages it loads afterwards as well.
     """
     def __init__(self, client, listing_response, iter_key, create_function):
         self._client = client
@@ -45,6 +50,7 @@ class _Iterator:
         self._links = []
         self._stream = False
         self._listing_response = listing_response
+        self._deadline = deadline.current()
 
         # NOTE(flaper87): Simple hack to
         # re-use the iterator for get_many_messages
@@ -82,7 +88,8 @@ class _Iterator:
                 # NOTE(flaper87): We already have the
                 # ref for the next set of messages, lets
                 # just follow it.
-                iterables = self._client.follow(link['href'])
+                with deadline.deadline_at(self._deadline):
+                    iterables = self._client.follow(link['href'])
 
                 # NOTE(flaper87): Since we're using
                 # `.follow`, the empty result will
@@ -0,0 +1,213 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import collections
+from concurrent import futures
+import threading
+import time
+
+from zaqarclient.common import codec
+from zaqarclient import errors
+from zaqarclient.queues.v2 import core
+
+
+class BatchingProducer:
+    """Buffers messages and posts them to a queue in batches
+
+    Messages are sent as soon as `max_messages` of them are
+    buffered, as soon as adding one more would make the request
+    body bigger than `max_bytes`, or `linger` seconds after the
+    first message of the batch was buffered, whichever happens
+    first::
+
+        with queue.producer(linger=0.01) as producer:
+            futures = [producer.post({'body': i, 'ttl': 60})
+                       for i in range(100)]
+
+        ids = [f.result() for f in futures]
+
+    Batches are posted one at a time, in the order messages were
+    buffered in.
+
+    :param queue: The queue to post messages to.
+    :type queue: `zaqarclient.queues.v2.queues.Queue`
+    :param max_messages: Maximum number of messages per request.
+        It must not exceed the server's maximum number of
+        messages per post. Default: 10
+    :type max_messages: int
+    :param max_bytes: Maximum size of a request body, as encoded
+        by the client's `json_codec`. It must not exceed the
+        server's `max_messages_post_size`. Default: 262144
+    :type max_bytes: int
+    :param linger: Seconds to wait for a batch to fill up.
+        Default: 0.05
+    :type linger: float
+    """
+
+    def __init__(self, queue, max_messages=10, max_bytes=262144,
+                 linger=0.05):
+        self._queue = queue
+        self._max_messages = max_messages
+        self._max_bytes = max_bytes
+        self._linger = linger
+
+        self._codec = codec.get_codec(
+            (queue.client.conf or {}).get('json_codec'))
+        # Sizes of the '{"messages": []}' envelope every
+        # batch is wrapped in and of the separator between messages.
+        self._envelope_size = len(self._codec.dumps({'messages': []}))
+        self._separator_size = (len(self._codec.dumps([0, 0])) -
+                                len(self._codec.dumps([0])) - 1)
+
+        self._cond = threading.Condition()
+        self._buffer = []
+        self._size = self._envelope_size
+        self._deadline = None
+        self._closed = False
+        self._thread = None
+
+        # Batches taken out of the buffer, in order, and
+        # the lock held while posting them.
+        self._ready = collections.deque()
+        self._send_lock = threading.Lock()
+
+    def _take(self):
+        """Moves the buffered messages to the ready batches
+
+        Must be called with `_cond` held.
+        """
+        if self._buffer:
+            self._ready.append(self._buffer)
+            self._buffer = []
+            self._size = self._envelope_size
+
+    def _drain(self):
+        """Posts the ready batches, oldest first"""
+        with self._send_lock:
+            while True:
+                with self._cond:
+                    if not self._ready:
+                        return
+                    batch = self._ready.popleft()
+                self._send(batch)
+
+    def _ensure_flusher(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run,
+                                            name='zaqarclient-producer',
+                                            daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closed:
+                    self._cond.wait()
+
+                if not self._buffer:
+                    return
+
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0 and not self._closed:
+                    self._cond.wait(remaining)
+                    continue
+
+                self._take()
+            self._drain()
+
+    def _send(self, batch):
+        messages = [message for message, _future in batch]
+        try:
+            req, trans = self._queue.client._request_and_transport()
+            result = core.message_post(trans, req, self._queue.name,
+                                       {'messages': messages})
+        except Exception as ex:
+            for _message, future in batch:
+                future.set_exception(ex)
+            return
+
+        hrefs = (result or {}).get('resources', [])
+        for i, (_message, future) in enumerate(batch):
+            try:
+                href = hrefs[i]
+            except IndexError:
+                future.set_exception(errors.ZaqarError(
+                    'The server did not return a reference for the '
+                    'message'))
+            else:
+                future.set_result(href.split('/')[-1])
+
+    def post(self, message):
+        """Buffers `message` to be posted with the next batch
+
+        :param message: The message to post, i.e:
+            `{'body': {...}, 'ttl': 300}`
+        :type message: `dict`
+
+        :returns: A future resolved with the id of the
+            message once it's been posted.
+        :rtype: `concurrent.futures.Future`
+        """
+        size = len(self._codec.dumps(message))
+        if size + self._envelope_size > self._max_bytes:
+            raise ValueError('The message is bigger than %d bytes' %
+                             self._max_bytes)
+
+        future = futures.Future()
+        with self._cond:
+            if self._closed:
+                raise errors.ZaqarError('The producer is closed')
+
+            if self._buffer:
+                size += self._separator_size
+                if self._size + size > self._max_bytes:
+                    self._take()
+                    size -= self._separator_size
+
+            self._buffer.append((message, future))
+            self._size += size
+
+            if len(self._buffer) >= self._max_messages:
+                self._take()
+            elif len(self._buffer) == 1:
+                self._deadline = time.monotonic() + self._linger
+                self._ensure_flusher()
+                self._cond.notify()
+            ready = bool(self._ready)
+
+        # Full batches are sent by the thread
+        # that filled them up, which slows down producers that
+        # are faster than the server.
+        if ready:
+            self._drain()
+        return future
+
+    def flush(self):
+        """Posts the buffered messages right away."""
+        with self._cond:
+            self._take()
+        self._drain()
+
+    def close(self):
+        """Flushes the buffered messages and stops the producer."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.flush()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
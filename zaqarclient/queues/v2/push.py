@@ -0,0 +1,184 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import threading
+
+from oslo_log import log as logging
+
+from zaqarclient.common import executor
+from zaqarclient import errors
+from zaqarclient import transport
+from zaqarclient.transport import request
+
+LOG = logging.getLogger(__name__)
+
+
+class PushConsumer:
+    """Consumes the messages Zaqar pushes through a websocket
+
+    The consumer subscribes its own websocket connection to the
+    queue and hands every pushed message over to `callback` on a
+    pool of worker threads::
+
+        def on_message(message):
+            print(message['body'])
+
+        with queue.subscribe_ws(on_message, url='ws://zaqar:9000'):
+            ...
+
+    The thread reading the websocket never waits for the workers,
+    it also serves the responses and pings of the connection. Once
+    `max_pending` messages are waiting for a worker, the next ones
+    are dropped and counted in `dropped`. Lost connections are
+    established again by the transport, see the `ws_opts` section
+    of the options, and the subscription is created again then.
+
+    The subscription is renewed every `ttl / 2` seconds, so that it
+    outlives the connection.
+
+    :param queue: The queue to subscribe to.
+    :type queue: `zaqarclient.queues.v2.queues.Queue`
+    :param callback: Called with each pushed message, as a `dict`.
+    :type callback: callable
+    :param url: Zaqar's websocket endpoint, i.e: `ws://zaqar:9000`.
+    :type url: str
+    :param ttl: Lifetime of the subscription, in seconds.
+        Default: 3600
+    :type ttl: int
+    :param max_workers: Threads running `callback`. Default: 1,
+        messages are handled in order.
+    :type max_workers: int
+    :param max_pending: Messages waiting for a worker before the
+        next ones are dropped. Defaults to `max_workers * 4`.
+    :type max_pending: int
+    """
+
+    def __init__(self, queue, callback, url, ttl=3600, max_workers=1,
+                 max_pending=None):
+        self._queue = queue
+        self._callback = callback
+        self._url = url
+        self._ttl = ttl
+
+        self._max_pending = max_pending or max_workers * 4
+        self._executor = executor.BoundedExecutor(max_workers,
+                                                  self._max_pending)
+        self._closed = threading.Event()
+        self._renewer = None
+        self.subscription_id = None
+        self.dropped = 0
+
+        client = queue.client
+        self._transport = transport.get_transport_for(
+            url, version=client.api_version, options=client.conf)
+        self._transport.set_unsolicited_handler(self._dispatch)
+        self._transport.add_connect_hook(self._subscribe)
+        self._transport.add_disconnect_hook(self._on_disconnect)
+
+    def _request(self, operation, body):
+        return request.Request(self._url, operation,
+                               content=self._transport.codec.dumps(body))
+
+    def _subscribe(self, send):
+        if self._closed.is_set():
+            return
+        resp = send(self._request('subscription_create', {
+            'queue_name': self._queue.name,
+            'ttl': self._ttl,
+            'options': {},
+        }))
+        self.subscription_id = (resp.deserialized_content or {}).get(
+            'subscription_id')
+        LOG.debug('Subscribed to queue %s: %s', self._queue.name,
+                  self.subscription_id)
+
+    def _renew(self):
+        while not self._closed.wait(self._ttl / 2.0):
+            # Websocket subscriptions can't be updated, the
+            # subscription is created again with a fresh ttl.
+            try:
+                self._unsubscribe()
+                self._subscribe(self._transport.send)
+            except Exception as ex:
+                LOG.warning('Failed to renew the subscription to '
+                            'queue %s: %s', self._queue.name, ex)
+
+    def _unsubscribe(self):
+        subscription_id, self.subscription_id = self.subscription_id, None
+        if subscription_id is not None:
+            self._transport.send(self._request('subscription_delete', {
+                'queue_name': self._queue.name,
+                'subscription_id': subscription_id,
+            }))
+
+    def _dispatch(self, frame):
+        if self._closed.is_set():
+            return
+        if self._executor.try_submit(self._handle, frame) is None:
+            self.dropped += 1
+            LOG.warning('Dropping a message pushed to queue %s, %d '
+                        'messages are waiting to be handled already',
+                        self._queue.name, self._max_pending)
+
+    def _handle(self, message):
+        try:
+            self._callback(message)
+        except Exception:
+            LOG.exception('Failed to handle a message pushed to queue %s',
+                          self._queue.name)
+
+    def _on_disconnect(self, ex):
+        if self._closed.is_set():
+            return
+
+        LOG.warning('Lost the subscription to queue %s: %s',
+                    self._queue.name, ex)
+
+    def start(self):
+        """Subscribes to the queue
+
+        :raises: `zaqarclient.errors.ZaqarError` if the consumer
+            is closed.
+        """
+        if self._closed.is_set():
+            raise errors.ZaqarError('The consumer is closed')
+        self._transport.connect(self._url)
+        if self._renewer is None:
+            self._renewer = threading.Thread(
+                target=self._renew, name='zaqarclient-push-renew',
+                daemon=True)
+            self._renewer.start()
+
+    def close(self):
+        """Deletes the subscription and stops the consumer
+
+        Messages already read from the websocket are handled
+        before it returns.
+        """
+        if self._closed.is_set():
+            return
+        self._closed.set()
+
+        try:
+            self._unsubscribe()
+        except Exception as ex:
+            LOG.debug('Failed to delete the subscription to queue %s: %s',
+                      self._queue.name, ex)
+
+        self._transport.cleanup()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
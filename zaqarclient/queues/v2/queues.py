@@ -20,6 +20,8 @@ from zaqarclient.queues.v2 import claim as claim_api
 from zaqarclient.queues.v2 import core
 from zaqarclient.queues.v2 import iterator
 from zaqarclient.queues.v2 import message
+from zaqarclient.queues.v2 import producer
+from zaqarclient.queues.v2 import push
 
 # NOTE(wanghao): This is copied from Zaqar server side, so if server have
 # updated it someday, we should update it here to keep consistent.
@@ -121,26 +123,7 @@ class Queue:
             self._metadata = core.queue_get(trans, req, self._name)
 
         if new_meta is not None:
-            temp_metadata = self._metadata.copy()
-            changes = []
-            for key, value in new_meta.items():
-                # If key exists, replace it's value.
-                if self._metadata.get(key, None) is not None:
-                    changes.append({'op': 'replace',
-                                    'path': '/metadata/%s' % key,
-                                    'value': value})
-                    temp_metadata.pop(key)
-                # If not, add the new key.
-                else:
-                    changes.append({'op': 'add',
-                                    'path': '/metadata/%s' % key,
-                                    'value': value})
-            # For the keys which are not included in the new metadata, remove
-            # them.
-            for key, value in temp_metadata.items():
-                changes.append({'op': 'remove',
-                                'path': '/metadata/%s' % key})
-
+            changes = _metadata_patch(self._metadata, new_meta)
             self._metadata = core.queue_update(trans, req, self._name,
                                                metadata=changes)
 
@@ -177,6 +160,43 @@ class Queue:
         return core.message_post(trans, req,
                                  self._name, messages)
 
+    def producer(self, **kwargs):
+        """Returns a producer posting messages to this queue in batches
+
+        :param kwargs: Anything accepted by
+            `zaqarclient.queues.v2.producer.BatchingProducer`
+
+        :rtype: `producer.BatchingProducer`
+        """
+        return producer.BatchingProducer(self, **kwargs)
+
+    def subscribe_ws(self, callback, url=None, **kwargs):
+        """Subscribes to this queue and consumes the pushed messages
+
+        :param callback: Called with each message pushed to
+            this queue, as a `dict`.
+        :type callback: callable
+        :param url: Zaqar's websocket endpoint, i.e:
+            `ws://zaqar:9000`. Defaults to the `ws_url` option.
+        :type url: str
+        :param kwargs: Anything accepted by
+            `zaqarclient.queues.v2.push.PushConsumer`
+
+        :returns: The started consumer, `close` it to unsubscribe.
+        :rtype: `push.PushConsumer`
+        """
+        url = url or self.client.conf.get('ws_url')
+        if not url:
+            raise ValueError(_('A websocket endpoint is required'))
+
+        consumer = push.PushConsumer(self, callback, url, **kwargs)
+        try:
+            consumer.start()
+        except Exception:
+            consumer.close()
+            raise
+        return consumer
+
     def message(self, message_id):
         """Gets a message by id
 
@@ -282,6 +302,30 @@ class Queue:
         return claim_api.Claim(self, id=id, ttl=ttl, grace=grace, limit=limit)
 
 
+def _metadata_patch(metadata, new_meta):
+    """Builds the JSON patch turning `metadata` into `new_meta`."""
+    temp_metadata = metadata.copy()
+    changes = []
+    for key, value in new_meta.items():
+        # If key exists, replace it's value.
+        if metadata.get(key, None) is not None:
+            changes.append({'op': 'replace',
+                            'path': '/metadata/%s' % key,
+                            'value': value})
+            temp_metadata.pop(key)
+        # If not, add the new key.
+        else:
+            changes.append({'op': 'add',
+                            'path': '/metadata/%s' % key,
+                            'value': value})
+    # For the keys which are not included in the new metadata, remove
+    # them.
+    for key, value in temp_metadata.items():
+        changes.append({'op': 'remove',
+                        'path': '/metadata/%s' % key})
+    return changes
+
+
 def create_object(parent):
     return lambda args: Queue(parent, args["name"], href=args.get("href"),
                               metadata=args.get("metadata"), auto_create=False)
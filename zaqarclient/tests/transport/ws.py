@@ -0,0 +1,101 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+import queue
+
+from oslo_utils import importutils
+
+msgpack = importutils.try_import('msgpack')
+websocket = importutils.try_import('websocket')
+
+
+class FakeWebsocket:
+    """In memory stand-in for `websocket.WebSocket`
+
+    Requests are answered with a 200 response echoing them, whose
+    body is taken from `bodies` by action, unless `auto_reply` is
+    False. Frames may be pushed with `push` and requests answered
+    by hand with `reply`. Like Zaqar, it switches to MessagePack
+    binary frames once it receives one. Pings are answered unless
+    `answer_pings` is False.
+    """
+
+    def __init__(self, auto_reply=True, bodies=None):
+        self.auto_reply = auto_reply
+        self.bodies = bodies or {}
+        self.sent = []
+        self.closed = False
+        self.timeout = None
+        self.binary = False
+        self.answer_pings = True
+        self.pings = 0
+        self._frames = queue.Queue()
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def send(self, data, opcode=None):
+        if self.closed:
+            raise websocket.WebSocketConnectionClosedException()
+        if opcode == websocket.ABNF.OPCODE_BINARY:
+            self.binary = True
+            msg = msgpack.unpackb(data, raw=False)
+        else:
+            msg = json.loads(data)
+        self.sent.append(msg)
+        if self.auto_reply:
+            self.reply(msg, body=self.bodies.get(msg.get('action')))
+
+    def reply(self, msg, body=None, status=200, echo=True):
+        frame = {'headers': {'status': status}}
+        if echo:
+            frame['request'] = msg
+        if body is not None:
+            frame['body'] = body
+        self.push(frame)
+
+    def push(self, frame):
+        if self.binary:
+            self._frames.put(msgpack.packb(frame, use_bin_type=True))
+        else:
+            self._frames.put(json.dumps(frame))
+
+    def ping(self, payload=''):
+        if self.closed:
+            raise websocket.WebSocketConnectionClosedException()
+        self.pings += 1
+        if self.answer_pings:
+            self._frames.put((websocket.ABNF.OPCODE_PONG, payload))
+
+    def recv_data(self, control_frame=False):
+        while True:
+            data = self._frames.get()
+            if data is None:
+                raise websocket.WebSocketConnectionClosedException()
+            if isinstance(data, tuple):
+                if control_frame:
+                    return data
+            elif isinstance(data, bytes):
+                return websocket.ABNF.OPCODE_BINARY, data
+            else:
+                return websocket.ABNF.OPCODE_TEXT, data.encode('utf-8')
+
+    def recv(self):
+        opcode, data = self.recv_data()
+        if opcode == websocket.ABNF.OPCODE_TEXT:
+            return data.decode('utf-8')
+        return data
+
+    def close(self):
+        self.closed = True
+        self._frames.put(None)
@@ -13,12 +13,65 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
 import urllib.parse
 
 from stevedore import driver
 
 from zaqarclient import errors as _errors
 
+# Maps entry point names, i.e: 'http.v2',
+# to transport classes. Classes are resolved once through
+# stevedore unless they were registered explicitly.
+_TRANSPORTS = {}
+_TRANSPORTS_LOCK = threading.Lock()
+
+
+def register_transport(transport, cls, version=2):
+    """Registers a transport class programmatically.
+
+    Registered classes take precedence over the ones
+    published in the `zaqarclient.transport` namespace.
+
+    :param transport: Transport name, i.e: the URL scheme.
+    :type transport: str
+    :param cls: Transport class. It'll be instantiated with
+        the options passed to `get_transport`.
+    :type cls: `zaqarclient.transport.base.Transport` subclass
+    :param version: Version of the target transport.
+        Default: 2
+    :type version: int
+    """
+    _TRANSPORTS['{}.v{}'.format(transport, version)] = cls
+
+
+def unregister_transport(transport, version=2):
+    """Forgets about the class used for `transport`.
+
+    The class will be resolved from the entry points again
+    the next time it's needed.
+    """
+    _TRANSPORTS.pop('{}.v{}'.format(transport, version), None)
+
+
+def _get_transport_cls(entry_point):
+    try:
+        return _TRANSPORTS[entry_point]
+    except KeyError:
+        pass
+
+    with _TRANSPORTS_LOCK:
+        if entry_point not in _TRANSPORTS:
+            try:
+                namespace = 'zaqarclient.transport'
+                mgr = driver.DriverManager(namespace,
+                                           entry_point,
+                                           invoke_on_load=False)
+            except RuntimeError as ex:
+                raise _errors.DriverLoadFailure(entry_point, ex)
+            _TRANSPORTS[entry_point] = mgr.driver
+    return _TRANSPORTS[entry_point]
+
 
 def get_transport(transport='http', version=2, options=None):
     """Gets a transport and returns it.
@@ -35,18 +88,13 @@ def get_transport(transport='http', version=2, options=None):
     """
 
     entry_point = '{}.v{}'.format(transport, version)
+    cls = _get_transport_cls(entry_point)
 
     try:
-        namespace = 'zaqarclient.transport'
-        mgr = driver.DriverManager(namespace,
-                                   entry_point,
-                                   invoke_on_load=True,
-                                   invoke_args=[options])
+        return cls(options)
     except RuntimeError as ex:
         raise _errors.DriverLoadFailure(entry_point, ex)
 
-    return mgr.driver
-
 
 def get_transport_for(url_or_request, version=2, options=None):
     """Gets a transport for a given url.
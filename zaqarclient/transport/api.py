@@ -13,11 +13,98 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
+import string
+
 import jsonschema
 from jsonschema import validators
 
 from zaqarclient import errors
 
+# Methods that can be sent more than
+# once without changing the outcome, RFC 7231 4.2.2
+_IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+
+def _encode(value):
+    # NOTE(flaper87): Zaqar API parses
+    # sequences encoded as '1,2,3,4'. Let's
+    # encode lists, tuples and sets before
+    # sending them to the server.
+    if isinstance(value, (list, tuple, set)):
+        return ','.join(value)
+    return str(value)
+
+
+class Route:
+    """A compiled URL template
+
+    Routes split their template into literal chunks and
+    placeholders once, so that building a path doesn't need
+    to scan nor format the template again.
+
+    :param template: Path template relative to the API label,
+        i.e: 'queues/{queue_name}/messages'
+    :type template: str
+    :param method: HTTP method used by the operation.
+    :type method: str
+    """
+
+    __slots__ = ('template', 'method', 'fields', '_parts')
+
+    def __init__(self, template, method='GET'):
+        self.template = template
+        self.method = method
+
+        parts = []
+        fields = []
+        for literal, field, _spec, _conv in string.Formatter().parse(
+                template):
+            if literal:
+                parts.append((literal, None))
+            if field is not None:
+                parts.append((None, field))
+                fields.append(field)
+        self._parts = tuple(parts)
+        self.fields = frozenset(fields)
+
+    def build(self, params):
+        """Builds the path for this route
+
+        Values for the route placeholders are popped out of
+        `params`, what's left there belongs to the query string.
+
+        :param params: The request parameters.
+        :type params: dict
+
+        :returns: The final path.
+        :rtype: str
+        """
+        if not self.fields:
+            return self.template
+
+        chunks = []
+        for literal, field in self._parts:
+            if field is None:
+                chunks.append(literal)
+            else:
+                chunks.append(_encode(params.pop(field)))
+        return ''.join(chunks)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_ref(ref, label=None, method='GET'):
+    """Compiles `ref` into a `Route`
+
+    The API `label` prefix, i.e: '/v2/', is removed from the
+    ref. Routes are cached, hence following the same kind of
+    references over and over is cheap.
+    """
+    ref = ref.lstrip('/')
+    if label and (ref == label or ref.startswith(label + '/')):
+        ref = ref[len(label) + 1:]
+    return Route(ref, method)
+
 
 class Api:
 
@@ -55,6 +142,88 @@ class Api:
             msg = '{} is not a valid operation'.format(operation)
             raise errors.InvalidOperation(msg)
 
+    def get_route(self, operation):
+        """Returns the compiled route for an operation
+
+        :param operation: The operation to get the route for.
+        :type operation: str
+
+        :rtype: `Route`
+
+        :raises: `errors.InvalidOperation` if the operation
+            does not exist
+        """
+        schema = self.get_schema(operation)
+        return compile_ref(schema.get('ref', ''), self.label,
+                           schema.get('method', 'GET'))
+
+    def is_idempotent(self, operation):
+        """Returns `True` if `operation` can be safely retried
+
+        Operations are idempotent if their HTTP method is. The
+        schema of an operation may override it with an explicit
+        `idempotent` flag.
+
+        :param operation: The operation to check on.
+        :type operation: str
+
+        :rtype: bool
+        """
+        schema = self.get_schema(operation)
+        idempotent = schema.get('idempotent')
+        if idempotent is None:
+            idempotent = schema.get('method', 'GET') in _IDEMPOTENT_METHODS
+        return idempotent
+
+    def is_safe(self, operation):
+        """Returns `True` if `operation` only reads data
+
+        Safe operations may be sent more than once concurrently,
+        see `zaqarclient.transport.hedge`. They're flagged with
+        `safe` in their schema.
+
+        :param operation: The operation to check on.
+        :type operation: str
+
+        :rtype: bool
+        """
+        if not self.is_supported(operation):
+            return False
+        return self.schema[operation].get('safe', False)
+
+    def get_ws_format(self, operation):
+        """Returns how `operation` is mapped to a websocket frame
+
+        Zaqar's websocket API takes the request's params in the
+        body. The `ws` key of an operation's schema tells how:
+        `params` renames some of them, `body` is the key the
+        request's content is set under, when it isn't merged
+        with the params, and `action` is the websocket action
+        to send instead of the operation's name.
+
+        :param operation: The operation to get the format of.
+        :type operation: str
+
+        :rtype: dict
+        """
+        if not self.is_supported(operation):
+            return {}
+        return self.schema[operation].get('ws', {})
+
+    def get_timeout(self, operation):
+        """Returns the timeouts of `operation` set in its schema
+
+        :param operation: The operation to get the timeouts for.
+        :type operation: str
+
+        :returns: A dict with the `connect` and/or `read`
+            timeouts of the operation, in seconds.
+        :rtype: dict
+        """
+        if not self.is_supported(operation):
+            return {}
+        return self.schema[operation].get('timeout', {})
+
     def validate(self, operation, params):
         """Validates the request data
 
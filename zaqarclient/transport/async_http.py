@@ -0,0 +1,158 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import ssl
+
+from oslo_utils import importutils
+
+from zaqarclient import errors as zaqar_errors
+from zaqarclient.transport import base
+from zaqarclient.transport import deadline
+from zaqarclient.transport import errors
+from zaqarclient.transport import http
+from zaqarclient.transport import response
+
+aiohttp = importutils.try_import('aiohttp')
+
+
+class AsyncHttpTransport(http.HttpTransport):
+    """Zaqar HTTP transport for asyncio.
+
+    `send` is a coroutine. Requests are sent through a single
+    `aiohttp.ClientSession` whose connector keeps a pool of
+    connections open, which lets one event loop drive many
+    concurrent requests. The pool is sized from the `http_opts`
+    section of the options, i.e::
+
+        conf = {
+            'http_opts': {
+                'pool_maxsize': 100,
+            }
+        }
+
+    The session is bound to the event loop it was created in and
+    must be released with `close`.
+    """
+
+    def __init__(self, options):
+        if not aiohttp:
+            raise RuntimeError('The aiohttp library is not installed')
+
+        base.Transport.__init__(self, options)
+        self.connection_errors = (aiohttp.ClientConnectionError,
+                                  asyncio.TimeoutError)
+        http_opts = (options or {}).get('http_opts', {})
+        self._pool_maxsize = http_opts.get('pool_maxsize', 100)
+        self._keep_alive = http_opts.get('keep_alive', True)
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._pool_maxsize,
+                force_close=not self._keep_alive)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def _ssl(self, request):
+        verify = self._verify(request)
+        if isinstance(verify, bool):
+            return verify
+        return ssl.create_default_context(cafile=verify)
+
+    @staticmethod
+    def _params(params):
+        # aiohttp only accepts strings and
+        # numbers as query values. Encode them the same way
+        # requests does for the sync transport.
+        encoded = []
+        for key, value in params.items():
+            if isinstance(value, (list, tuple, set)):
+                encoded.extend((key, str(v)) for v in value)
+            elif value is not None:
+                encoded.append((key, str(value)))
+        return encoded
+
+    async def send(self, request):
+        return await self.retry_policy.call_async(
+            self._send_hedged, request,
+            self._is_idempotent(request),
+            self.connection_errors)
+
+    async def _send_hedged(self, request):
+        return await self.hedge_policy.call_async(self._send_guarded,
+                                                  request)
+
+    async def _send_guarded(self, request):
+        return await self.circuit_breakers.call_async(
+            self._send_authenticated, request, self.connection_errors)
+
+    async def _send_authenticated(self, request):
+        try:
+            return await self._send(request)
+        except errors.UnauthorizedError:
+            # Getting a new token blocks, don't
+            # hold the event loop up while it happens.
+            loop = asyncio.get_running_loop()
+            if not await loop.run_in_executor(None,
+                                              request.reauthenticate):
+                raise
+        return await self._send(request)
+
+    async def _send(self, request):
+        url, method, params = self._prepare(request)
+
+        connect, read = self.get_timeout(request)
+        timeout = aiohttp.ClientTimeout(connect=connect, sock_read=read)
+
+        session = self._get_session()
+        try:
+            async with session.request(method, url,
+                                       params=self._params(params),
+                                       headers=self._headers(request),
+                                       data=request.content,
+                                       ssl=self._ssl(request),
+                                       timeout=timeout) as resp:
+                body = await resp.read()
+        except asyncio.TimeoutError:
+            if deadline.expired(request.deadline):
+                raise zaqar_errors.DeadlineExceeded(request.operation)
+            raise
+
+        if resp.status in self.http_to_zaqar:
+            self._check_status(resp.status,
+                               body.decode('utf-8', 'replace'),
+                               dict(resp.headers))
+
+        return response.Response(request, body,
+                                 headers=dict(resp.headers),
+                                 status_code=resp.status,
+                                 codec=self.codec)
+
+    def cleanup(self):
+        # There's no sync client to close, the session
+        # is bound to its event loop and released by `close`.
+        base.Transport.cleanup(self)
+
+    async def close(self):
+        """Releases the session and the threads of this transport"""
+        base.Transport.cleanup(self)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -0,0 +1,323 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Client side load balancing between several Zaqar endpoints.
+
+The balancer is tuned through the `balancer_opts` section of the
+options, i.e::
+
+    conf = {
+        'balancer_opts': {
+            'strategy': 'ewma',
+            'max_failures': 3,
+            'ejection_time': 30,
+            'failover': 1,
+        }
+    }
+
+Endpoints failing `max_failures` requests in a row are ejected for
+`ejection_time` seconds. They're pinged afterwards and put back in
+rotation as soon as they answer.
+"""
+
+import random
+import threading
+import time
+
+from oslo_log import log as logging
+
+from zaqarclient import errors
+from zaqarclient.transport import circuit
+
+LOG = logging.getLogger(__name__)
+
+LEAST_OUTSTANDING = 'least_outstanding'
+EWMA = 'ewma'
+
+
+class _Node:
+
+    __slots__ = ('url', 'outstanding', 'latency', 'failures',
+                 'ejected_until', 'probing')
+
+    def __init__(self, url):
+        self.url = url
+        self.outstanding = 0
+        self.latency = None
+        self.failures = 0
+        self.ejected_until = None
+        self.probing = False
+
+
+class Balancer:
+    """Spreads requests between endpoints
+
+    Endpoints are picked with the power of two choices: two of
+    the healthy endpoints are drawn at random and the least loaded
+    one wins. The load is either the number of outstanding requests
+    (`least_outstanding`) or the exponentially weighted moving
+    average of the latency scaled by the outstanding requests
+    (`ewma`).
+
+    :param urls: The endpoints to balance between.
+    :type urls: list
+    :param strategy: `least_outstanding` or `ewma`.
+    :type strategy: str
+    :param ewma_alpha: Weight of the last latency in the average.
+    :type ewma_alpha: float
+    :param max_failures: Consecutive failures ejecting an endpoint.
+    :type max_failures: int
+    :param ejection_time: Seconds an endpoint stays ejected.
+    :type ejection_time: float
+    :param probe: Optional callable taking an url and returning
+        whether the endpoint is healthy. Ejected endpoints are put
+        back in rotation without probing when it's not set.
+    :type probe: callable
+    """
+
+    def __init__(self, urls, strategy=LEAST_OUTSTANDING, ewma_alpha=0.3,
+                 max_failures=3, ejection_time=30.0, probe=None):
+        if not urls:
+            raise ValueError('At least one endpoint is required')
+        if strategy not in (LEAST_OUTSTANDING, EWMA):
+            raise ValueError('Unknown balancing strategy: %s' % strategy)
+
+        self.strategy = strategy
+        self.ewma_alpha = ewma_alpha
+        self.max_failures = max_failures
+        self.ejection_time = ejection_time
+        self.probe = probe
+
+        self._nodes = {url: _Node(url) for url in urls}
+        self._lock = threading.Lock()
+
+    @property
+    def urls(self):
+        return list(self._nodes)
+
+    def _load(self, node):
+        if self.strategy == EWMA:
+            return (node.latency or 0.0) * (node.outstanding + 1)
+        return node.outstanding
+
+    def _reinstate(self, node):
+        node.ejected_until = None
+        node.failures = 0
+
+    def _check_ejected(self, now):
+        """Returns the ejected nodes due for a health check"""
+        due = []
+        for node in self._nodes.values():
+            if (node.ejected_until is None or node.probing or
+                    node.ejected_until > now):
+                continue
+
+            if self.probe is None:
+                self._reinstate(node)
+            else:
+                node.probing = True
+                due.append(node)
+        return due
+
+    def _probe(self, node):
+        try:
+            healthy = self.probe(node.url)
+        except Exception:
+            LOG.exception('Failed to probe %s', node.url)
+            healthy = False
+
+        with self._lock:
+            node.probing = False
+            if healthy:
+                LOG.info('Endpoint %s is back in rotation', node.url)
+                self._reinstate(node)
+            else:
+                node.ejected_until = time.monotonic() + self.ejection_time
+
+    def choose(self, exclude=()):
+        """Returns the endpoint the next request should go to
+
+        :param exclude: Endpoints not to pick, unless there's
+            no other one.
+        :type exclude: iterable
+
+        :rtype: str
+        """
+        with self._lock:
+            now = time.monotonic()
+            due = self._check_ejected(now)
+
+            candidates = [node for node in self._nodes.values()
+                          if node.ejected_until is None and
+                          node.url not in exclude]
+            if not candidates:
+                candidates = [node for node in self._nodes.values()
+                              if node.url not in exclude]
+
+            if not candidates:
+                url = None
+            elif len(candidates) == 1:
+                url = candidates[0].url
+            else:
+                first, second = random.sample(candidates, 2)
+                if self._load(second) < self._load(first):
+                    first = second
+                url = first.url
+
+            if url is None or self._nodes[url].ejected_until is not None:
+                # Every endpoint is ejected, fall back
+                # to the one that's been ejected for the longest time.
+                ejected = [node for node in self._nodes.values()
+                           if node.url not in exclude]
+                if ejected:
+                    url = min(ejected, key=lambda n: n.ejected_until).url
+
+        for node in due:
+            threading.Thread(target=self._probe, args=(node,),
+                             name='zaqarclient-probe', daemon=True).start()
+        return url
+
+    def start(self, url):
+        """Records a request sent to `url`"""
+        with self._lock:
+            node = self._nodes.get(url)
+            if node is not None:
+                node.outstanding += 1
+
+    def finish(self, url, latency, failed):
+        """Records the outcome of a request recorded by `start`
+
+        :param url: The endpoint the request was sent to.
+        :type url: str
+        :param latency: Seconds the request took.
+        :type latency: float
+        :param failed: Whether the endpoint failed to serve it.
+        :type failed: bool
+        """
+        with self._lock:
+            node = self._nodes.get(url)
+            if node is None:
+                return
+
+            node.outstanding = max(0, node.outstanding - 1)
+            if node.latency is None:
+                node.latency = latency
+            else:
+                node.latency += self.ewma_alpha * (latency - node.latency)
+
+            if not failed:
+                node.failures = 0
+                return
+
+            node.failures += 1
+            if (node.ejected_until is None and
+                    node.failures >= self.max_failures):
+                LOG.warning('Ejecting endpoint %s after %d failures',
+                            url, node.failures)
+                node.ejected_until = time.monotonic() + self.ejection_time
+
+    def stats(self):
+        """Returns the state of every endpoint
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {node.url: {'outstanding': node.outstanding,
+                               'latency': node.latency,
+                               'failures': node.failures,
+                               'ejected': node.ejected_until is not None}
+                    for node in self._nodes.values()}
+
+
+class BalancedTransport:
+    """Transport proxy spreading requests with a `Balancer`
+
+    The request is sent to the endpoint it was prepared for and the
+    outcome is reported to the balancer. Requests rejected by a
+    circuit breaker, or idempotent ones failing because of the
+    endpoint, are sent again to another endpoint up to `failover`
+    times.
+
+    The hedged copies of slow safe requests are sent to another
+    endpoint than the one the request was sent to first.
+
+    Everything but `send` is delegated to the transport of the
+    request's endpoint.
+
+    :param balancer: The balancer to report to.
+    :type balancer: `Balancer`
+    :param get_transport: Callable returning the transport to send
+        a request with.
+    :type get_transport: callable
+    :param transport: Transport of the endpoint chosen first.
+    :type transport: `zaqarclient.transport.base.Transport`
+    :param failover: Maximum number of endpoints to fail over to.
+    :type failover: int
+    """
+
+    def __init__(self, balancer, get_transport, transport, failover=1):
+        self._balancer = balancer
+        self._get_transport = get_transport
+        self._transport = transport
+        self._failover = failover
+
+    def __getattr__(self, name):
+        return getattr(self._transport, name)
+
+    @staticmethod
+    def _is_idempotent(request):
+        if not (request.api and request.operation):
+            return True
+        return request.api.is_idempotent(request.operation)
+
+    def _set_hedge_endpoint(self, trans, request):
+        # Send the hedged copy of slow reads
+        # to another endpoint, see `zaqarclient.transport.hedge`.
+        policy = getattr(trans, 'hedge_policy', None)
+        if policy is not None and policy.should_hedge(request):
+            request.hedge_endpoint = self._balancer.choose(
+                exclude=(request.endpoint,))
+
+    def send(self, request):
+        tried = []
+        trans = self._transport
+        while True:
+            endpoint = request.endpoint
+            self._set_hedge_endpoint(trans, request)
+            self._balancer.start(endpoint)
+            start = time.monotonic()
+            try:
+                resp = trans.send(request)
+            except Exception as ex:
+                failed = circuit.CircuitBreakers.is_failure(
+                    ex, getattr(trans, 'connection_errors', ()))
+                self._balancer.finish(endpoint, time.monotonic() - start,
+                                      failed)
+
+                rejected = isinstance(ex, errors.CircuitOpenError)
+                if (len(tried) >= self._failover or
+                        not (rejected or
+                             (failed and self._is_idempotent(request)))):
+                    raise
+
+                tried.append(endpoint)
+                other = self._balancer.choose(exclude=tried)
+                if other is None:
+                    raise
+                LOG.debug('Failing over from %s to %s', endpoint, other)
+                request.endpoint = other
+                trans = self._get_transport(request)
+                continue
+
+            self._balancer.finish(endpoint, time.monotonic() - start, False)
+            return resp
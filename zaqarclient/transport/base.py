@@ -14,8 +14,16 @@
 # limitations under the License.
 
 import abc
+import time
 
+from zaqarclient.common import codec
+from zaqarclient.common import decorators
+from zaqarclient.common import executor
+from zaqarclient import errors as zaqar_errors
+from zaqarclient.transport import circuit
 from zaqarclient.transport import errors
+from zaqarclient.transport import hedge
+from zaqarclient.transport import retry
 
 
 class Transport(metaclass=abc.ABCMeta):
@@ -28,12 +36,129 @@ class Transport(metaclass=abc.ABCMeta):
         404: errors.ResourceNotFound,
         409: errors.ConflictError,
         500: errors.InternalServerError,
-        503: errors.ServiceUnavailableError
+        502: errors.BadGatewayError,
+        503: errors.ServiceUnavailableError,
+        504: errors.GatewayTimeoutError,
     }
 
     def __init__(self, options):
         self.options = options
 
+    @decorators.lazy_property(write=False)
+    def executor(self):
+        """Executor running the requests sent with a callback.
+
+        It's sized from the `executor_opts` section of the options,
+        i.e: `{'executor_opts': {'max_workers': 10, 'max_pending': 40}}`
+        """
+        opts = (self.options or {}).get('executor_opts', {})
+        return executor.BoundedExecutor(**opts)
+
+    @decorators.lazy_property(write=False)
+    def retry_policy(self):
+        """Policy retrying the failed requests.
+
+        It's configured through the `retry_opts` section of the
+        options, see `zaqarclient.transport.retry`.
+        """
+        opts = (self.options or {}).get('retry_opts', {})
+        return retry.RetryPolicy(**opts)
+
+    @decorators.lazy_property(write=False)
+    def hedge_policy(self):
+        """Policy hedging the slow safe requests.
+
+        It's configured through the `hedge_opts` section of the
+        options, see `zaqarclient.transport.hedge`.
+        """
+        opts = (self.options or {}).get('hedge_opts', {})
+        return hedge.HedgePolicy(**opts)
+
+    @decorators.lazy_property(write=True)
+    def circuit_breakers(self):
+        """Circuit breakers of the endpoints requests are sent to.
+
+        They're configured through the `circuit_breaker_opts`
+        section of the options, see `zaqarclient.transport.circuit`.
+        Clients replace them with their own so that the breakers'
+        state outlives the transport.
+        """
+        opts = (self.options or {}).get('circuit_breaker_opts', {})
+        return circuit.CircuitBreakers(**opts)
+
+    @decorators.lazy_property(write=False)
+    def codec(self):
+        """JSON codec picked with the `json_codec` option.
+
+        See `zaqarclient.common.codec`.
+        """
+        return codec.get_codec((self.options or {}).get('json_codec'))
+
+    def get_timeout(self, request):
+        """Returns the connect and read timeouts of `request`.
+
+        Requests don't time out unless the `timeout_opts` section
+        of the options is set. Timeouts then default to its
+        `connect` and `read` keys. The operation's schema may
+        change them, and so may the `operations` key of
+        `timeout_opts`, i.e::
+
+            conf = {
+                'timeout_opts': {
+                    'connect': 10,
+                    'read': 60,
+                    'operations': {
+                        'message_delete': {'read': 5},
+                        'queue_purge': {'read': 600},
+                    }
+                }
+            }
+
+        Both are cut down to the time left before the request's
+        deadline, if any.
+
+        :returns: The (connect, read) timeouts in seconds. None
+            means no timeout.
+        :rtype: tuple
+
+        :raises: `zaqarclient.errors.DeadlineExceeded` if the
+            request's deadline is over.
+        """
+        opts = (self.options or {}).get('timeout_opts')
+        timeouts = {'connect': None, 'read': None}
+
+        operation = request.operation
+        if opts:
+            timeouts.update(connect=opts.get('connect'),
+                            read=opts.get('read'))
+            if operation and request.api:
+                timeouts.update(request.api.get_timeout(operation))
+            if operation:
+                timeouts.update(opts.get('operations', {}).get(operation,
+                                                               {}))
+
+        connect, read = timeouts['connect'], timeouts['read']
+        if request.deadline is not None:
+            remaining = request.deadline - time.monotonic()
+            if remaining <= 0:
+                raise zaqar_errors.DeadlineExceeded(operation)
+            connect = remaining if connect is None else min(connect,
+                                                            remaining)
+            read = remaining if read is None else min(read, remaining)
+        return connect, read
+
+    def cleanup(self):
+        """Releases the threads and connections held by this transport
+
+        The transport must not be used afterwards.
+        """
+        executor = getattr(self, '_lazy_executor', None)
+        if executor is not None:
+            executor.shutdown(wait=False)
+        hedge_policy = getattr(self, '_lazy_hedge_policy', None)
+        if hedge_policy is not None:
+            hedge_policy.shutdown(wait=False)
+
     @abc.abstractmethod
     def send(self, request):
         """Returns the response.
@@ -0,0 +1,285 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Circuit breakers failing requests fast while an endpoint is unhealthy.
+
+A breaker tracks the outcome and latency of the last calls sent to
+one endpoint. It opens once too many of them failed or were slow,
+rejecting requests with `CircuitOpenError` without sending them.
+After `open_duration` seconds it lets `half_open_calls` trial
+requests through, closing again if they all succeed.
+
+Breakers are disabled by default. They're enabled through the
+`circuit_breaker_opts` section of the options, i.e::
+
+    conf = {
+        'circuit_breaker_opts': {
+            'enabled': True,
+            'failure_rate': 0.5,
+            'slow_call_duration': 2,
+            'open_duration': 30,
+        }
+    }
+"""
+
+import collections
+import threading
+import time
+import urllib.parse
+
+from zaqarclient import errors
+from zaqarclient.transport import errors as transport_errors
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Circuit breaker of a single endpoint
+
+    :param endpoint: The endpoint guarded by this breaker.
+    :type endpoint: str
+    :param window_size: Number of calls the rates are computed on.
+    :type window_size: int
+    :param minimum_calls: Calls needed before the breaker may open.
+    :type minimum_calls: int
+    :param failure_rate: Ratio of failed calls opening the breaker.
+    :type failure_rate: float
+    :param slow_call_duration: Seconds after which a call is slow.
+        Default: None, the latency is not tracked.
+    :type slow_call_duration: float
+    :param slow_call_rate: Ratio of slow calls opening the breaker.
+    :type slow_call_rate: float
+    :param open_duration: Seconds the breaker stays open.
+    :type open_duration: float
+    :param half_open_calls: Number of trial calls.
+    :type half_open_calls: int
+    """
+
+    def __init__(self, endpoint, window_size=20, minimum_calls=10,
+                 failure_rate=0.5, slow_call_duration=None,
+                 slow_call_rate=1.0, open_duration=30.0,
+                 half_open_calls=1):
+        self.endpoint = endpoint
+        self.minimum_calls = minimum_calls
+        self.failure_rate = failure_rate
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate = slow_call_rate
+        self.open_duration = open_duration
+        self.half_open_calls = half_open_calls
+
+        self._lock = threading.Lock()
+        self._calls = collections.deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at = None
+        self._trials = 0
+        self._trial_successes = 0
+
+    def _update_state(self):
+        if (self._state == OPEN and
+                time.monotonic() - self._opened_at >= self.open_duration):
+            self._state = HALF_OPEN
+            self._trials = 0
+            self._trial_successes = 0
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._calls.clear()
+
+    def _close(self):
+        self._state = CLOSED
+        self._opened_at = None
+        self._calls.clear()
+
+    @property
+    def state(self):
+        with self._lock:
+            self._update_state()
+            return self._state
+
+    def acquire(self):
+        """Reserves a call
+
+        :raises: `errors.CircuitOpenError` if the call must
+            not be sent.
+        """
+        with self._lock:
+            self._update_state()
+            if self._state == CLOSED:
+                return
+
+            if self._state == HALF_OPEN:
+                if self._trials < self.half_open_calls:
+                    self._trials += 1
+                    return
+                retry_in = 0.0
+            else:
+                retry_in = (self._opened_at + self.open_duration -
+                            time.monotonic())
+        raise errors.CircuitOpenError(self.endpoint, retry_in)
+
+    def record(self, failed, duration):
+        """Records the outcome of a call reserved with `acquire`
+
+        :param failed: Whether the call failed.
+        :type failed: bool
+        :param duration: Seconds the call took.
+        :type duration: float
+        """
+        slow = (self.slow_call_duration is not None and
+                duration >= self.slow_call_duration)
+
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trials = max(0, self._trials - 1)
+                if failed or slow:
+                    self._open()
+                    return
+                self._trial_successes += 1
+                if self._trial_successes >= self.half_open_calls:
+                    self._close()
+                return
+
+            if self._state == OPEN:
+                # Calls sent before the
+                # breaker opened don't count anymore.
+                return
+
+            self._calls.append((failed, slow))
+            total = len(self._calls)
+            if total < self.minimum_calls:
+                return
+
+            failures = sum(1 for f, _s in self._calls if f)
+            slow_calls = sum(1 for _f, s in self._calls if s)
+            if (failures / total >= self.failure_rate or
+                    (self.slow_call_duration is not None and
+                     slow_calls / total >= self.slow_call_rate)):
+                self._open()
+
+    def release(self):
+        """Gives back a call reserved with `acquire` without an outcome
+
+        Used for the calls that were interrupted, i.e: cancelled,
+        before telling anything about the endpoint's health.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trials = max(0, self._trials - 1)
+
+    def stats(self):
+        """Returns a snapshot of this breaker's state
+
+        :rtype: dict
+        """
+        with self._lock:
+            self._update_state()
+            return {
+                'state': self._state,
+                'calls': len(self._calls),
+                'failures': sum(1 for f, _s in self._calls if f),
+                'slow_calls': sum(1 for _f, s in self._calls if s),
+                'opened_at': self._opened_at,
+            }
+
+
+class CircuitBreakers:
+    """Circuit breakers of every endpoint a transport talks to
+
+    :param enabled: Whether requests go through the breakers.
+        Default: False
+    :type enabled: bool
+    :param breaker_opts: Options of each `CircuitBreaker`.
+    """
+
+    def __init__(self, enabled=False, **breaker_opts):
+        self.enabled = enabled
+        self._breaker_opts = breaker_opts
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(endpoint):
+        parsed = urllib.parse.urlparse(endpoint)
+        return '{}://{}'.format(parsed.scheme, parsed.netloc)
+
+    def get(self, endpoint):
+        """Returns the breaker of `endpoint`, creating it if needed"""
+        key = self._key(endpoint)
+        try:
+            return self._breakers[key]
+        except KeyError:
+            with self._lock:
+                if key not in self._breakers:
+                    self._breakers[key] = CircuitBreaker(
+                        key, **self._breaker_opts)
+                return self._breakers[key]
+
+    @staticmethod
+    def is_failure(ex, connection_errors=()):
+        # 4xx are the caller's fault,
+        # they say nothing about the endpoint's health.
+        if isinstance(ex, transport_errors.TransportError):
+            return ex.code is not None and ex.code >= 500
+        return isinstance(ex, connection_errors)
+
+    def call(self, func, request, connection_errors=()):
+        """Calls `func(request)` through the breaker of its endpoint"""
+        if not self.enabled:
+            return func(request)
+
+        breaker = self.get(request.endpoint)
+        breaker.acquire()
+        start = time.monotonic()
+        try:
+            result = func(request)
+        except Exception as ex:
+            breaker.record(self.is_failure(ex, connection_errors),
+                           time.monotonic() - start)
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record(False, time.monotonic() - start)
+        return result
+
+    async def call_async(self, func, request, connection_errors=()):
+        """Coroutine flavour of `call`, `func` must be a coroutine"""
+        if not self.enabled:
+            return await func(request)
+
+        breaker = self.get(request.endpoint)
+        breaker.acquire()
+        start = time.monotonic()
+        try:
+            result = await func(request)
+        except Exception as ex:
+            breaker.record(self.is_failure(ex, connection_errors),
+                           time.monotonic() - start)
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record(False, time.monotonic() - start)
+        return result
+
+    def stats(self):
+        """Returns the state of every breaker, by endpoint
+
+        :rtype: dict
+        """
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.endpoint: breaker.stats() for breaker in breakers}
@@ -0,0 +1,70 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Deadlines shared by every request sent within a block of code::
+
+    with client.deadline(5):
+        queue.post(messages)
+        for msg in queue.messages():
+            ...
+
+Requests prepared inside the block are stamped with the deadline,
+their timeouts are cut down to the time left and they fail with
+`DeadlineExceeded` once it's over. Nested deadlines never extend
+the enclosing one.
+
+Deadlines are absolute `time.monotonic` values kept in a context
+variable, hence they follow the code flow across threads started
+with `contextvars.copy_context` and asyncio tasks.
+"""
+
+import contextlib
+import contextvars
+import time
+
+_DEADLINE = contextvars.ContextVar('zaqarclient_deadline', default=None)
+
+
+def current():
+    """Returns the deadline in effect, if any"""
+    return _DEADLINE.get()
+
+
+@contextlib.contextmanager
+def deadline_at(when):
+    """Enforces the absolute deadline `when` within the block
+
+    :param when: A `time.monotonic` value, or None for
+        no additional deadline.
+    :type when: float
+    """
+    enclosing = _DEADLINE.get()
+    if when is None or (enclosing is not None and enclosing <= when):
+        yield enclosing
+        return
+
+    token = _DEADLINE.set(when)
+    try:
+        yield when
+    finally:
+        _DEADLINE.reset(token)
+
+
+def deadline(seconds):
+    """Enforces a deadline `seconds` from now within the block"""
+    return deadline_at(time.monotonic() + seconds)
+
+
+def expired(when):
+    """Returns True if the deadline `when` is set and over"""
+    return when is not None and when <= time.monotonic()
@@ -24,7 +24,8 @@ from zaqarclient import errors
 
 __all__ = ['TransportError', 'ResourceNotFound', 'MalformedRequest',
            'UnauthorizedError', 'ForbiddenError', 'ServiceUnavailableError',
-           'InternalServerError', 'ConflictError']
+           'InternalServerError', 'ConflictError', 'BadGatewayError',
+           'GatewayTimeoutError']
 
 
 class TransportError(errors.ZaqarError):
@@ -32,7 +33,9 @@ class TransportError(errors.ZaqarError):
 
     code = None
 
-    def __init__(self, title=None, description=None, text=None):
+    def __init__(self, title=None, description=None, text=None,
+                 headers=None):
+        self.headers = headers or {}
         msg = 'Error response from Zaqar. Code: {}.'.format(self.code)
         if title:
             msg += ' Title: {}.'.format(title)
@@ -97,6 +100,24 @@ class ServiceUnavailableError(TransportError):
     code = 503
 
 
+class BadGatewayError(TransportError):
+    """Indicates that a proxy got an invalid response from the server
+
+    This error maps to HTTP's 502
+    """
+
+    code = 502
+
+
+class GatewayTimeoutError(TransportError):
+    """Indicates that a proxy timed out waiting for the server
+
+    This error maps to HTTP's 504
+    """
+
+    code = 504
+
+
 class ConflictError(TransportError):
     """Indicates that the server was unable to service the request
 
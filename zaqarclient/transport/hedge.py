@@ -0,0 +1,323 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Hedged requests cutting the tail latency of reads.
+
+When the answer to a safe request takes longer than most answers
+to the same operation did, a second copy of the request is sent to
+another endpoint. The first answer wins and the other attempt is
+cancelled. Requests are never hedged when there's no other endpoint
+to send them to, see `zaqarclient.transport.balancer`.
+
+Hedging is disabled by default. It's enabled through the
+`hedge_opts` section of the options, i.e::
+
+    conf = {
+        'hedge_opts': {
+            'enabled': True,
+            'percentile': 95,
+        }
+    }
+
+Only operations flagged as safe are hedged, see
+`zaqarclient.transport.api.Api.is_safe`.
+"""
+
+import asyncio
+import collections
+from concurrent import futures
+import contextvars
+import copy
+import math
+import threading
+import time
+
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Latencies of the last requests, by operation
+
+    :param window_size: Number of latencies kept per operation.
+    :type window_size: int
+    """
+
+    def __init__(self, window_size=100):
+        self.window_size = window_size
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation, latency):
+        with self._lock:
+            latencies = self._latencies.get(operation)
+            if latencies is None:
+                latencies = collections.deque(maxlen=self.window_size)
+                self._latencies[operation] = latencies
+            latencies.append(latency)
+
+    def count(self, operation):
+        latencies = self._latencies.get(operation)
+        return len(latencies) if latencies else 0
+
+    def percentile(self, operation, percentile):
+        """Returns the `percentile` of the latencies of `operation`
+
+        :returns: The latency in seconds, or None if no request
+            was recorded for `operation`.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies.get(operation, ()))
+        if not latencies:
+            return None
+        rank = math.ceil(percentile / 100.0 * len(latencies)) - 1
+        return latencies[min(len(latencies) - 1, max(0, rank))]
+
+
+def _discard(future):
+    """Releases the response of an attempt that lost the race"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    close = getattr(future.result(), 'close', None)
+    if close is not None:
+        close()
+
+
+class HedgePolicy:
+    """Decides whether, and when, requests are hedged
+
+    The hedge is sent once the first attempt has been outstanding
+    for longer than the `percentile` of the latencies recorded for
+    its operation. Operations are not hedged until `min_samples`
+    latencies were recorded for them.
+
+    First attempts are sent right away on a pool of `max_attempts`
+    threads, whereas hedges run on a separate pool of `max_workers`
+    threads, so that attempts are never queued behind hedges.
+    Requests aren't hedged while every thread of either pool is
+    busy, they're then sent on the caller's thread as if hedging
+    was disabled. Hence hedging never adds more than `max_workers`
+    requests to the load, nor more than `max_attempts` threads, even
+    when attempts stuck on an unresponsive endpoint never return.
+
+    :param enabled: Whether safe requests are hedged.
+        Default: False
+    :type enabled: bool
+    :param percentile: Percentile of the latency after which the
+        hedge is sent.
+    :type percentile: float
+    :param min_samples: Latencies needed before hedging.
+    :type min_samples: int
+    :param min_delay: Minimum wait before hedging, in seconds.
+    :type min_delay: float
+    :param window_size: Latencies kept per operation.
+    :type window_size: int
+    :param max_workers: Maximum number of hedges in flight.
+    :type max_workers: int
+    :param max_attempts: Maximum number of hedgeable first
+        attempts in flight.
+    :type max_attempts: int
+    """
+
+    def __init__(self, enabled=False, percentile=95, min_samples=20,
+                 min_delay=0.01, window_size=100, max_workers=10,
+                 max_attempts=20):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.tracker = LatencyTracker(window_size)
+
+        self._executor = None
+        self._attempt_executor = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._attempt_slots = threading.BoundedSemaphore(max_attempts)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = futures.ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix='zaqarclient-hedge')
+        return self._executor
+
+    def _get_attempt_executor(self):
+        if self._attempt_executor is None:
+            with self._lock:
+                if self._attempt_executor is None:
+                    self._attempt_executor = futures.ThreadPoolExecutor(
+                        max_workers=self.max_attempts,
+                        thread_name_prefix='zaqarclient-request')
+        return self._attempt_executor
+
+    def should_hedge(self, request):
+        return bool(self.enabled and request.api and request.operation and
+                    request.api.is_safe(request.operation))
+
+    def get_delay(self, operation):
+        """Returns the seconds to wait before hedging `operation`
+
+        :returns: The delay, or None if there aren't enough
+            latencies recorded to tell.
+        """
+        if self.tracker.count(operation) < self.min_samples:
+            return None
+        latency = self.tracker.percentile(operation, self.percentile)
+        return max(self.min_delay, latency)
+
+    def shutdown(self, wait=True):
+        """Stops the threads sending the attempts and the hedges"""
+        with self._lock:
+            executors = (self._attempt_executor, self._executor)
+            self._attempt_executor = self._executor = None
+        for executor in executors:
+            if executor is not None:
+                executor.shutdown(wait=wait)
+
+    @staticmethod
+    def _can_hedge(request):
+        return bool(request.hedge_endpoint and
+                    request.hedge_endpoint != request.endpoint)
+
+    @staticmethod
+    def _hedged_request(request):
+        hedged = copy.copy(request)
+        hedged.headers = request.headers.copy()
+        hedged.endpoint = request.hedge_endpoint
+        return hedged
+
+    def _timed(self, func, request):
+        start = time.monotonic()
+        result = func(request)
+        self.tracker.record(request.operation, time.monotonic() - start)
+        return result
+
+    def _start(self, func, request):
+        """Sends the first attempt, unless every attempt thread is busy
+
+        The attempt isn't queued behind the hedges, nor behind
+        other attempts, hence the time it spends outstanding is
+        the time the endpoint takes.
+
+        :returns: The attempt's future, or None.
+        """
+        if not self._attempt_slots.acquire(blocking=False):
+            LOG.debug('Not hedging %s, too many attempts in flight',
+                      request.operation)
+            return None
+
+        ctx = contextvars.copy_context()
+        future = self._get_attempt_executor().submit(
+            ctx.run, self._timed, func, request)
+        future.add_done_callback(lambda _f: self._attempt_slots.release())
+        return future
+
+    def _submit_hedge(self, func, request):
+        """Sends the hedge, unless every hedging thread is busy
+
+        :returns: The hedge's future, or None.
+        """
+        if not self._slots.acquire(blocking=False):
+            LOG.debug('Not hedging %s, too many hedges in flight',
+                      request.operation)
+            return None
+
+        ctx = contextvars.copy_context()
+        future = self._get_executor().submit(
+            ctx.run, self._timed, func, self._hedged_request(request))
+        future.add_done_callback(lambda _f: self._slots.release())
+        return future
+
+    def call(self, func, request):
+        """Calls `func(request)`, hedging it if it's too slow"""
+        if not (self.should_hedge(request) and self._can_hedge(request)):
+            return func(request)
+
+        delay = self.get_delay(request.operation)
+        if delay is None:
+            return self._timed(func, request)
+
+        first = self._start(func, request)
+        if first is None:
+            return self._timed(func, request)
+
+        done, _pending = futures.wait([first], timeout=delay)
+        if done:
+            return first.result()
+
+        LOG.debug('Hedging %s after %.3fs', request.operation, delay)
+        second = self._submit_hedge(func, request)
+        if second is None:
+            return first.result()
+
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = futures.wait(
+                pending, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        if not other.cancel():
+                            other.add_done_callback(_discard)
+                    return future.result()
+                if error is None or future is first:
+                    error = future.exception()
+        raise error
+
+    async def _timed_async(self, func, request):
+        start = time.monotonic()
+        result = await func(request)
+        self.tracker.record(request.operation, time.monotonic() - start)
+        return result
+
+    async def call_async(self, func, request):
+        """Coroutine flavour of `call`, `func` must be a coroutine
+
+        The attempt losing the race is cancelled.
+        """
+        if not (self.should_hedge(request) and self._can_hedge(request)):
+            return await func(request)
+
+        delay = self.get_delay(request.operation)
+        if delay is None:
+            return await self._timed_async(func, request)
+
+        first = asyncio.ensure_future(self._timed_async(func, request))
+        done, _pending = await asyncio.wait([first], timeout=delay)
+        if done:
+            return first.result()
+
+        LOG.debug('Hedging %s after %.3fs', request.operation, delay)
+        second = asyncio.ensure_future(
+            self._timed_async(func, self._hedged_request(request)))
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    if error is None or task is first:
+                        error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
@@ -13,67 +13,91 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
-
 from oslo_utils import importutils
+import requests
 
 from zaqarclient.common import http
+from zaqarclient import errors as zaqar_errors
+from zaqarclient.transport import api
 from zaqarclient.transport import base
+from zaqarclient.transport import deadline
+from zaqarclient.transport import errors
 from zaqarclient.transport import response
 
 osprofiler_web = importutils.try_import("osprofiler.web")
 
 
 class HttpTransport(base.Transport):
+    """Zaqar HTTP transport.
+
+    The connection pool used by this transport can be tuned
+    through the `http_opts` section of the options, i.e::
+
+        conf = {
+            'http_opts': {
+                'pool_connections': 10,
+                'pool_maxsize': 50,
+                'pool_block': True,
+                'keep_alive': True,
+            }
+        }
+
+    Requests flagged with `stream` get a
+    `zaqarclient.transport.response.StreamingResponse` back, whose
+    body is read `chunk_size` bytes at a time.
+    """
+
+    chunk_size = 8192
+
+    # Errors worth retrying, see
+    # `zaqarclient.transport.retry`.
+    connection_errors = (requests.ConnectionError, requests.Timeout)
 
     def __init__(self, options):
         super().__init__(options)
-        self.client = http.Client()
+        http_opts = (options or {}).get('http_opts', {})
+        self.client = http.Client(**http_opts)
+
+    def cleanup(self):
+        super().cleanup()
+        self.client.close()
 
     def _prepare(self, request):
+        """Returns the URL, method and query params of `request`
+
+        The request itself is left untouched so that it can
+        be sent again.
+        """
         if not request.api:
-            return request.endpoint, 'GET', request
+            return request.endpoint, 'GET', request.params
 
         # TODO(flaper87): Validate if the user
         # explicitly wants so. Validation must
         # happen before any other operation here.
         # request.validate()
 
-        schema = {}
-        ref_params = {}
-        ref = request.ref
-
-        if request.operation:
-            schema = request.api.get_schema(request.operation)
-            ref = ref or schema.get('ref', '')
-
         # FIXME(flaper87): We expect the endpoint
         # to have the API version label already,
         # however in a follow-your-nose implementation
         # it should be the other way around.
-        ref = ref.lstrip('/' + request.api.label)
-
-        for param in list(request.params.keys()):
-            if '{{{0}}}'.format(param) in ref:
-                value = request.params.pop(param)
+        route = None
+        if request.operation:
+            route = request.api.get_route(request.operation)
+        method = route.method if route else 'GET'
 
-                # NOTE(flaper87): Zaqar API parses
-                # sequences encoded as '1,2,3,4'. Let's
-                # encode lists, tuples and sets before
-                # sending them to the server.
-                if isinstance(value, (list, tuple, set)):
-                    value = ','.join(value)
+        if request.ref or route is None:
+            route = api.compile_ref(request.ref, request.api.label, method)
 
-                ref_params[param] = value
+        params = request.params
+        if route.fields:
+            params = params.copy()
 
         url = '{}/{}/{}'.format(request.endpoint.rstrip('/'),
                                 request.api.label,
-                                ref.format(**ref_params))
-        return url, schema.get('method', 'GET'), request
-
-    def send(self, request):
-        url, method, request = self._prepare(request)
+                                route.build(params))
+        return url, method, params
 
+    def _headers(self, request):
         # NOTE(flape87): Do not modify
         # request's headers directly.
         headers = request.headers.copy()
@@ -85,25 +109,20 @@ class HttpTransport(base.Transport):
 
         if osprofiler_web:
             headers.update(osprofiler_web.get_trace_id_headers())
+        return headers
 
+    def _verify(self, request):
         if request.verify:
             if request.cert:
-                verify = request.cert
-            else:
-                verify = True
-        else:
-            verify = False
-        resp = self.client.request(method,
-                                   url=url,
-                                   params=request.params,
-                                   headers=headers,
-                                   data=request.content,
-                                   verify=verify)
+                return request.cert
+            return True
+        return False
 
-        if resp.status_code in self.http_to_zaqar:
+    def _check_status(self, status_code, text, headers=None):
+        if status_code in self.http_to_zaqar:
             kwargs = {}
             try:
-                error_body = json.loads(resp.text)
+                error_body = self.codec.loads(text)
                 kwargs['title'] = error_body['title']
                 kwargs['description'] = error_body['description']
             except Exception:
@@ -113,11 +132,67 @@ class HttpTransport(base.Transport):
                 # Note(Eva-i): most of the error responses from Zaqar have
                 # dict with title and description in their bodies. If it's not
                 # the case, let's just show body text.
-                kwargs['text'] = resp.text
-            raise self.http_to_zaqar[resp.status_code](**kwargs)
+                kwargs['text'] = text
+            raise self.http_to_zaqar[status_code](headers=headers, **kwargs)
+
+    def _is_idempotent(self, request):
+        if not (request.api and request.operation):
+            # Requests without an
+            # operation are GETs, see `_prepare`.
+            return True
+        return request.api.is_idempotent(request.operation)
+
+    def send(self, request):
+        return self.retry_policy.call(self._send_hedged, request,
+                                      self._is_idempotent(request),
+                                      self.connection_errors)
+
+    def _send_hedged(self, request):
+        return self.hedge_policy.call(self._send_guarded, request)
+
+    def _send_guarded(self, request):
+        return self.circuit_breakers.call(self._send_authenticated,
+                                          request, self.connection_errors)
+
+    def _send_authenticated(self, request):
+        try:
+            return self._send(request)
+        except errors.UnauthorizedError:
+            # The token may have expired or
+            # been revoked. Get a new one and try once more.
+            if not request.reauthenticate():
+                raise
+        return self._send(request)
+
+    def _send(self, request):
+        url, method, params = self._prepare(request)
+
+        try:
+            resp = self.client.request(method,
+                                       url=url,
+                                       params=params,
+                                       headers=self._headers(request),
+                                       data=request.content,
+                                       verify=self._verify(request),
+                                       stream=request.stream,
+                                       timeout=self.get_timeout(request))
+        except requests.Timeout:
+            if deadline.expired(request.deadline):
+                raise zaqar_errors.DeadlineExceeded(request.operation)
+            raise
+
+        if resp.status_code in self.http_to_zaqar:
+            self._check_status(resp.status_code, resp.text, resp.headers)
+
+        if request.stream:
+            return response.StreamingResponse(
+                request, resp.iter_content(chunk_size=self.chunk_size),
+                headers=resp.headers,
+                status_code=resp.status_code,
+                codec=self.codec,
+                close=resp.close)
 
-        # NOTE(flaper87): This reads the whole content
-        # and will consume any attempt of streaming.
-        return response.Response(request, resp.text,
+        return response.Response(request, resp.content,
                                  headers=resp.headers,
-                                 status_code=resp.status_code)
+                                 status_code=resp.status_code,
+                                 codec=self.codec)
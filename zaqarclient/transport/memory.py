@@ -0,0 +1,1182 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+In process emulation of Zaqar's v2 API.
+
+Requests sent to `memory://` endpoints are answered the way a
+Zaqar server would, without a network nor a server, which makes
+it handy to test and benchmark code using the client::
+
+    cli = client.Client('memory://bench', conf=conf)
+    queue = cli.queue('jobs')
+    queue.post({'body': 'resize', 'ttl': 300})
+
+Endpoints sharing the same host, i.e: `memory://bench`, share a
+`Store` for the lifetime of the process, or until `reset` is
+called. Queues, messages, claims and subscriptions are scoped by
+the `X-Project-Id` header, pools and flavors are global.
+
+Messages and claims expire as they're accessed, according to the
+store's `clock`, which tests may replace to move time forward.
+"""
+
+import bisect
+import datetime
+import functools
+import hashlib
+import heapq
+import hmac
+import os
+import re
+import threading
+import time
+import urllib.parse
+
+from oslo_utils import uuidutils
+
+from zaqarclient import errors as zaqar_errors
+from zaqarclient.transport import api
+from zaqarclient.transport import base
+from zaqarclient.transport import deadline
+from zaqarclient.transport import errors
+from zaqarclient.transport import response
+
+# Zaqar's default limits.
+_QUEUE_NAME = re.compile(r'^[a-zA-Z0-9_-]{1,64}$')
+_DEFAULT_QUEUE_METADATA = {
+    '_max_messages_post_size': 262144,
+    '_default_message_ttl': 3600,
+    '_default_message_delay': 0,
+    '_dead_letter_queue': None,
+    '_dead_letter_queue_messages_ttl': None,
+    '_max_claim_count': None,
+}
+_MESSAGE_TTL = (60, 1209600)
+_MESSAGE_DELAY = (0, 900)
+_CLAIM_TTL = (60, 43200)
+_CLAIM_GRACE = (60, 43200)
+_DEFAULT_CLAIM_TTL = 300
+_DEFAULT_CLAIM_GRACE = 60
+_DEFAULT_LIMIT = 10
+_MAX_LIMIT = 20
+_SIGNED_URL_PATHS = ('messages', 'subscriptions', 'claims')
+_SIGNED_URL_METHODS = ('GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'DELETE')
+_PURGE_TYPES = ('messages', 'subscriptions')
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_store(name):
+    """Returns the store shared by the `memory://<name>` endpoints"""
+    try:
+        return _STORES[name]
+    except KeyError:
+        pass
+
+    with _STORES_LOCK:
+        return _STORES.setdefault(name, Store())
+
+
+def reset(name=None):
+    """Drops the state of `memory://<name>`, or of every endpoint"""
+    with _STORES_LOCK:
+        if name is None:
+            _STORES.clear()
+        else:
+            _STORES.pop(name, None)
+
+
+def _bad_request(description):
+    return errors.MalformedRequest(title='Invalid API request',
+                                   description=description)
+
+
+def _not_found(description):
+    return errors.ResourceNotFound(title='Not found',
+                                   description=description)
+
+
+def _as_bool(value):
+    if isinstance(value, str):
+        return value.lower() in ('true', '1', 'yes')
+    return bool(value)
+
+
+def _as_int(value, name, bounds=None):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise _bad_request('%s must be an integer.' % name)
+
+    if bounds is not None and not bounds[0] <= value <= bounds[1]:
+        raise _bad_request('%s must be between %d and %d.' %
+                           (name, bounds[0], bounds[1]))
+    return value
+
+
+def _limit(params):
+    return _as_int(params.get('limit', _DEFAULT_LIMIT), 'limit',
+                   (1, _MAX_LIMIT))
+
+
+def _as_list(value):
+    if isinstance(value, str):
+        return [item for item in value.split(',') if item]
+    return list(value or ())
+
+
+def _link(path, **query):
+    query = {key: ('true' if value else 'false')
+             if isinstance(value, bool) else value
+             for key, value in query.items() if value is not None}
+    return [{'rel': 'next',
+             'href': '%s?%s' % (path, urllib.parse.urlencode(query))}]
+
+
+def _isotime(timestamp):
+    return datetime.datetime.fromtimestamp(
+        timestamp, datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class _Context:
+
+    __slots__ = ('api', 'project', 'client_id', 'base', 'now')
+
+    def __init__(self, api, project, client_id, now):
+        self.api = api
+        self.project = project
+        self.client_id = client_id
+        self.base = '/' + api.label
+        self.now = now
+
+
+class _Message:
+
+    __slots__ = ('id', 'seq', 'body', 'ttl', 'created', 'expires',
+                 'available', 'client_id', 'claim_id', 'claim_count')
+
+    def __init__(self, seq, body, ttl, delay, client_id, now):
+        self.id = uuidutils.generate_uuid(dashed=False)
+        self.seq = seq
+        self.body = body
+        self.ttl = ttl
+        self.created = now
+        self.expires = now + ttl
+        self.available = now + delay
+        self.client_id = client_id
+        self.claim_id = None
+        self.claim_count = 0
+
+
+class _Claim:
+
+    __slots__ = ('id', 'ttl', 'grace', 'created', 'expires', 'messages')
+
+    def __init__(self, ttl, grace, now):
+        self.id = uuidutils.generate_uuid(dashed=False)
+        self.grace = grace
+        self.messages = {}
+        self.renew(ttl, now)
+
+    def renew(self, ttl, now):
+        self.ttl = ttl
+        self.created = now
+        self.expires = now + ttl
+
+
+class _Subscription:
+
+    __slots__ = ('id', 'subscriber', 'ttl', 'options', 'created')
+
+    def __init__(self, subscriber, ttl, options, now):
+        self.id = uuidutils.generate_uuid(dashed=False)
+        self.subscriber = subscriber
+        self.ttl = ttl
+        self.options = options
+        self.created = now
+
+    @property
+    def expires(self):
+        return self.created + self.ttl
+
+
+class _Queue:
+    """Messages, claims and subscriptions of a queue
+
+    Messages are kept in the order they were posted in, which is
+    the order of their markers, so that pages are read from their
+    marker on. Whatever expires is tracked in heaps, hence expiring
+    a queue only looks at what's due.
+    """
+
+    __slots__ = ('name', 'metadata', 'messages', 'claims',
+                 'subscriptions', 'seq', '_seqs', '_by_seq', '_removed',
+                 '_expiries', '_claim_expiries', '_sub_expiries',
+                 '_delays')
+
+    def __init__(self, name, metadata=None):
+        self.name = name
+        self.metadata = metadata or {}
+        self.messages = {}
+        self.claims = {}
+        self.subscriptions = {}
+        self.seq = 0
+        self._reset_messages()
+        self._sub_expiries = []
+
+    def _reset_messages(self):
+        self.messages.clear()
+        self.claims.clear()
+        # Markers of the messages, in order. Removed messages are
+        # left behind until they make up half of the list.
+        self._seqs = []
+        self._by_seq = {}
+        self._removed = 0
+        # (expires, seq) of the messages, (expires, id) of the
+        # claims and (available, seq) of the delayed messages.
+        self._expiries = []
+        self._claim_expiries = []
+        self._delays = []
+
+    def get_option(self, key):
+        return self.metadata.get(key, _DEFAULT_QUEUE_METADATA.get(key))
+
+    def add_message(self, body, ttl, delay, client_id, now):
+        self.seq += 1
+        msg = _Message(self.seq, body, ttl, delay, client_id, now)
+        self.messages[msg.id] = msg
+        self._by_seq[msg.seq] = msg
+        self._seqs.append(msg.seq)
+        heapq.heappush(self._expiries, (msg.expires, msg.seq))
+        if delay:
+            heapq.heappush(self._delays, (msg.available, msg.seq))
+        return msg
+
+    def remove_message(self, msg):
+        del self.messages[msg.id]
+        del self._by_seq[msg.seq]
+        self._removed += 1
+        claim = self.claims.get(msg.claim_id)
+        if claim is not None:
+            claim.messages.pop(msg.id, None)
+
+    def extend_message(self, msg, expires):
+        if msg.expires < expires:
+            msg.expires = expires
+            msg.ttl = int(expires - msg.created)
+            heapq.heappush(self._expiries, (expires, msg.seq))
+
+    def iter_messages(self, marker=0):
+        """Yields the messages posted after `marker`, in order"""
+        seqs = self._seqs
+        index = bisect.bisect_right(seqs, marker)
+        while index < len(seqs):
+            msg = self._by_seq.get(seqs[index])
+            if msg is not None:
+                yield msg
+            index += 1
+
+    def oldest(self):
+        return next(self.iter_messages(), None)
+
+    def newest(self):
+        for seq in reversed(self._seqs):
+            msg = self._by_seq.get(seq)
+            if msg is not None:
+                return msg
+        return None
+
+    def add_claim(self, claim, messages):
+        self.claims[claim.id] = claim
+        for msg in messages:
+            msg.claim_id = claim.id
+            msg.claim_count += 1
+            claim.messages[msg.id] = msg
+        self.renew_claim(claim, claim.ttl, claim.grace, claim.created)
+
+    def renew_claim(self, claim, ttl, grace, now):
+        claim.grace = grace
+        claim.renew(ttl, now)
+        heapq.heappush(self._claim_expiries, (claim.expires, claim.id))
+        # Claimed messages live for as long as the claim and its grace.
+        for msg in claim.messages.values():
+            self.extend_message(msg, claim.expires + claim.grace)
+
+    def remove_claim(self, claim):
+        del self.claims[claim.id]
+        for msg in claim.messages.values():
+            msg.claim_id = None
+
+    def add_subscription(self, sub):
+        self.subscriptions[sub.id] = sub
+        self.track_subscription(sub)
+
+    def track_subscription(self, sub):
+        heapq.heappush(self._sub_expiries, (sub.expires, sub.id))
+
+    def purge_messages(self):
+        self._reset_messages()
+
+    def purge_subscriptions(self):
+        self.subscriptions.clear()
+        self._sub_expiries = []
+
+    def expire(self, now):
+        """Drops the expired messages, claims and subscriptions
+
+        Heap entries left behind by renewals, or by what was
+        removed already, are skipped.
+        """
+        heap = self._claim_expiries
+        while heap and heap[0][0] <= now:
+            expires, claim_id = heapq.heappop(heap)
+            claim = self.claims.get(claim_id)
+            if claim is not None and claim.expires == expires:
+                self.remove_claim(claim)
+
+        heap = self._expiries
+        while heap and heap[0][0] <= now:
+            expires, seq = heapq.heappop(heap)
+            msg = self._by_seq.get(seq)
+            if msg is not None and msg.expires == expires:
+                self.remove_message(msg)
+
+        heap = self._delays
+        while heap and heap[0][0] <= now:
+            heapq.heappop(heap)
+
+        heap = self._sub_expiries
+        while heap and heap[0][0] <= now:
+            expires, sub_id = heapq.heappop(heap)
+            sub = self.subscriptions.get(sub_id)
+            if sub is not None and sub.expires == expires:
+                del self.subscriptions[sub_id]
+
+        if self._removed > 64 and self._removed * 2 > len(self._seqs):
+            self._seqs = [seq for seq in self._seqs if seq in self._by_seq]
+            self._removed = 0
+
+    def count_claimed(self):
+        return sum(len(claim.messages) for claim in self.claims.values())
+
+    def count_delayed(self):
+        """Counts the messages that aren't available yet
+
+        Must be called right after `expire`, the heap holds the
+        delayed messages only then.
+        """
+        return sum(1 for _available, seq in self._delays
+                   if seq in self._by_seq)
+
+    def is_claimed(self, msg):
+        return msg.claim_id is not None and msg.claim_id in self.claims
+
+    def is_free(self, msg, now):
+        return msg.available <= now and not self.is_claimed(msg)
+
+
+class Store:
+    """State of an emulated Zaqar server
+
+    Every public method but `reset` answers the operation of the
+    same name of `zaqarclient.queues.v2.api.V2`. They're called
+    with the lock held and return the status code and the body
+    of the response.
+
+    :param clock: Callable returning the current time, in seconds.
+        Default: `time.time`
+    :type clock: callable
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        """Drops every queue, pool and flavor"""
+        with self.lock:
+            self._projects = {}
+            self._queue_names = {}
+            self._pools = {}
+            self._flavors = {}
+            self._secret = os.urandom(16)
+
+    # Helpers
+
+    def _queues(self, ctx):
+        return self._projects.setdefault(ctx.project, {})
+
+    def _add_queue(self, ctx, name, metadata=None):
+        queue = self._queues(ctx)[name] = _Queue(name, metadata)
+        # Names are kept sorted for `queue_list` to page from its marker.
+        bisect.insort(self._queue_names.setdefault(ctx.project, []), name)
+        return queue
+
+    def _remove_queue(self, ctx, queue):
+        del self._queues(ctx)[queue.name]
+        names = self._queue_names[ctx.project]
+        del names[bisect.bisect_left(names, queue.name)]
+
+    def _get_queue(self, ctx, params, create=False):
+        name = params.get('queue_name')
+        if not isinstance(name, str) or not _QUEUE_NAME.match(name):
+            raise _bad_request('Queue names may not be more than 64 '
+                               'characters long, letters, digits, '
+                               'underscores and dashes only.')
+
+        queues = self._queues(ctx)
+        queue = queues.get(name)
+        if queue is None:
+            if not create:
+                return None
+            # Zaqar creates queues lazily,
+            # i.e: when the first message is posted.
+            queue = self._add_queue(ctx, name)
+        queue.expire(ctx.now)
+        return queue
+
+    def _require_queue(self, ctx, params):
+        queue = self._get_queue(ctx, params)
+        if queue is None:
+            raise _not_found('Queue %s does not exist.' %
+                             params.get('queue_name'))
+        return queue
+
+    def _queue_path(self, ctx, queue):
+        return '%s/queues/%s' % (ctx.base, queue.name)
+
+    def _format_message(self, ctx, queue, msg, claimed=False):
+        href = '%s/messages/%s' % (self._queue_path(ctx, queue), msg.id)
+        formatted = {'id': msg.id,
+                     'ttl': msg.ttl,
+                     'age': int(ctx.now - msg.created),
+                     'body': msg.body,
+                     'claim_count': msg.claim_count}
+        if claimed and queue.is_claimed(msg):
+            href += '?claim_id=%s' % msg.claim_id
+            formatted['claim_id'] = msg.claim_id
+        formatted['href'] = href
+        return formatted
+
+    def _validate_metadata(self, metadata):
+        if not isinstance(metadata, dict):
+            raise _bad_request('Queue metadata must be an object.')
+
+        for key, bounds in (('_default_message_ttl', _MESSAGE_TTL),
+                            ('_default_message_delay', _MESSAGE_DELAY)):
+            if key in metadata:
+                _as_int(metadata[key], key, bounds)
+
+        flavor = metadata.get('_flavor')
+        if flavor is not None and flavor not in self._flavors:
+            raise _bad_request('Flavor %s does not exist.' % flavor)
+
+    # Queues
+
+    def queue_list(self, ctx, params, body):
+        limit = _limit(params)
+        marker = params.get('marker') or ''
+        detailed = _as_bool(params.get('detailed', False))
+
+        queues = self._queues(ctx)
+        names = self._queue_names.get(ctx.project, [])
+        start = bisect.bisect_right(names, marker)
+        page = []
+        for name in names[start:start + limit]:
+            queue = {'name': name,
+                     'href': '%s/queues/%s' % (ctx.base, name)}
+            if detailed:
+                queue['metadata'] = dict(queues[name].metadata)
+            page.append(queue)
+
+        result = {'queues': page, 'links': []}
+        if page:
+            result['links'] = _link('%s/queues' % ctx.base,
+                                    marker=page[-1]['name'], limit=limit,
+                                    detailed=detailed or None)
+        if _as_bool(params.get('with_count', False)):
+            result['count'] = len(queues)
+        return 200, result
+
+    def queue_create(self, ctx, params, body):
+        metadata = body or {}
+        self._validate_metadata(metadata)
+
+        if self._get_queue(ctx, params) is not None:
+            return 204, None
+        self._add_queue(ctx, params['queue_name'], dict(metadata))
+        return 201, None
+
+    def queue_get(self, ctx, params, body):
+        queue = self._require_queue(ctx, params)
+        metadata = dict(_DEFAULT_QUEUE_METADATA)
+        metadata.update(queue.metadata)
+        return 200, metadata
+
+    def queue_exists(self, ctx, params, body):
+        self._require_queue(ctx, params)
+        return 204, None
+
+    def queue_update(self, ctx, params, body):
+        queue = self._require_queue(ctx, params)
+        if not isinstance(body, list):
+            raise _bad_request('The request body must be a JSON patch.')
+
+        metadata = dict(queue.metadata)
+        for change in body:
+            path = change.get('path', '') if isinstance(change, dict) else ''
+            if not path.startswith('/metadata/'):
+                raise _bad_request('Only metadata may be changed.')
+            key = path[len('/metadata/'):]
+
+            op = change.get('op')
+            if op in ('add', 'replace'):
+                if 'value' not in change:
+                    raise _bad_request('Missing value for %s.' % key)
+                metadata[key] = change['value']
+            elif op == 'remove':
+                metadata.pop(key, None)
+            else:
+                raise _bad_request('Unsupported patch operation: %s.' % op)
+
+        self._validate_metadata(metadata)
+        queue.metadata = metadata
+        return self.queue_get(ctx, params, None)
+
+    def queue_delete(self, ctx, params, body):
+        queue = self._get_queue(ctx, params)
+        if queue is not None:
+            self._remove_queue(ctx, queue)
+        return 204, None
+
+    def queue_get_stats(self, ctx, params, body):
+        queue = self._get_queue(ctx, params)
+        if queue is None or not queue.messages:
+            return 200, {'messages': {'free': 0, 'claimed': 0, 'total': 0}}
+
+        total = len(queue.messages)
+        claimed = queue.count_claimed()
+        # Claims are only made on available messages, hence a
+        # message is either claimed, delayed or free.
+        free = total - claimed - queue.count_delayed()
+        stats = {'free': free, 'claimed': claimed, 'total': total}
+        for key, msg in (('oldest', queue.oldest()),
+                         ('newest', queue.newest())):
+            stats[key] = {'id': msg.id,
+                          'age': int(ctx.now - msg.created),
+                          'created': _isotime(msg.created)}
+        return 200, {'messages': stats}
+
+    def queue_purge(self, ctx, params, body):
+        queue = self._require_queue(ctx, params)
+        types = (body or {}).get('resource_types') or _PURGE_TYPES
+        for resource_type in types:
+            if resource_type not in _PURGE_TYPES:
+                raise _bad_request('Unknown resource type: %s.' %
+                                   resource_type)
+
+        if 'messages' in types:
+            queue.purge_messages()
+        if 'subscriptions' in types:
+            queue.purge_subscriptions()
+        return 204, None
+
+    # Messages
+
+    def _require_client_id(self, ctx):
+        if not ctx.client_id:
+            raise _bad_request('The Client-ID header is required.')
+
+    def message_list(self, ctx, params, body):
+        self._require_client_id(ctx)
+        if 'ids' in params:
+            return self.message_get_many(ctx, params, body)
+
+        limit = _limit(params)
+        marker = _as_int(params.get('marker') or 0, 'marker')
+        echo = _as_bool(params.get('echo', False))
+        include_claimed = _as_bool(params.get('include_claimed', False))
+
+        queue = self._get_queue(ctx, params)
+        page = []
+        for msg in (queue.iter_messages(marker) if queue else ()):
+            if (msg.available > ctx.now or
+                    (not echo and msg.client_id == ctx.client_id) or
+                    (not include_claimed and queue.is_claimed(msg))):
+                continue
+            page.append(msg)
+            if len(page) == limit:
+                break
+
+        if not page:
+            return 200, {'messages': [], 'links': []}
+
+        path = '%s/messages' % self._queue_path(ctx, queue)
+        return 200, {
+            'messages': [self._format_message(ctx, queue, msg)
+                         for msg in page],
+            'links': _link(path, marker=page[-1].seq, limit=limit,
+                           echo=echo or None,
+                           include_claimed=include_claimed or None),
+        }
+
+    def message_post(self, ctx, params, body):
+        self._require_client_id(ctx)
+        messages = body.get('messages') if isinstance(body, dict) else None
+        if not isinstance(messages, list) or not messages:
+            raise _bad_request('No messages were found in the request body.')
+
+        queue = self._get_queue(ctx, params, create=True)
+        default_ttl = queue.get_option('_default_message_ttl')
+        default_delay = queue.get_option('_default_message_delay')
+
+        posted = []
+        for message in messages:
+            if not isinstance(message, dict) or 'body' not in message:
+                raise _bad_request('Messages must have a body.')
+            posted.append((
+                message['body'],
+                _as_int(message.get('ttl', default_ttl), 'ttl',
+                        _MESSAGE_TTL),
+                _as_int(message.get('delay', default_delay), 'delay',
+                        _MESSAGE_DELAY)))
+
+        resources = []
+        path = '%s/messages' % self._queue_path(ctx, queue)
+        for msg_body, ttl, delay in posted:
+            msg = queue.add_message(msg_body, ttl, delay, ctx.client_id,
+                                    ctx.now)
+            resources.append('%s/%s' % (path, msg.id))
+        return 201, {'resources': resources}
+
+    def message_get(self, ctx, params, body):
+        queue = self._get_queue(ctx, params)
+        msg = queue and queue.messages.get(params.get('message_id'))
+        if msg is None:
+            raise _not_found('Message %s does not exist.' %
+                             params.get('message_id'))
+        return 200, self._format_message(ctx, queue, msg)
+
+    def message_get_many(self, ctx, params, body):
+        ids = _as_list(params.get('ids'))
+        if len(ids) > _MAX_LIMIT:
+            raise _bad_request('No more than %d messages may be '
+                               'requested at once.' % _MAX_LIMIT)
+
+        queue = self._get_queue(ctx, params)
+        found = [queue.messages[msg_id] for msg_id in ids
+                 if queue and msg_id in queue.messages]
+        if not found:
+            raise _not_found('None of the messages exist.')
+        return 200, {'messages': [self._format_message(ctx, queue, msg)
+                                  for msg in found]}
+
+    def message_delete(self, ctx, params, body):
+        queue = self._get_queue(ctx, params)
+        msg = queue and queue.messages.get(params.get('message_id'))
+        if msg is None:
+            return 204, None
+
+        claim_id = params.get('claim_id')
+        if queue.is_claimed(msg):
+            if claim_id != msg.claim_id:
+                raise errors.ForbiddenError(
+                    title='Unable to delete',
+                    description='The message is claimed by another claim.')
+        elif claim_id:
+            raise errors.ForbiddenError(
+                title='Unable to delete',
+                description='The message is not claimed.')
+
+        queue.remove_message(msg)
+        return 204, None
+
+    def message_delete_many(self, ctx, params, body):
+        ids = _as_list(params.get('ids'))
+        if len(ids) > _MAX_LIMIT:
+            raise _bad_request('No more than %d messages may be '
+                               'deleted at once.' % _MAX_LIMIT)
+
+        queue = self._get_queue(ctx, params)
+        for msg_id in ids:
+            msg = queue and queue.messages.get(msg_id)
+            if msg is not None:
+                queue.remove_message(msg)
+        return 204, None
+
+    def message_pop(self, ctx, params, body):
+        count = _as_int(params.get('pop'), 'pop', (1, _MAX_LIMIT))
+
+        queue = self._get_queue(ctx, params)
+        popped = []
+        for msg in (queue.iter_messages() if queue else ()):
+            if queue.is_free(msg, ctx.now):
+                popped.append(msg)
+                if len(popped) == count:
+                    break
+
+        result = []
+        for msg in popped:
+            queue.remove_message(msg)
+            result.append({'id': msg.id,
+                           'ttl': msg.ttl,
+                           'age': int(ctx.now - msg.created),
+                           'body': msg.body,
+                           'claim_count': msg.claim_count})
+        return 200, {'messages': result}
+
+    # Claims
+
+    def _claim_options(self, body, ttl=None, grace=None):
+        body = body or {}
+        if not isinstance(body, dict):
+            raise _bad_request('The request body must be an object.')
+
+        if body.get('ttl') is not None:
+            ttl = _as_int(body['ttl'], 'ttl', _CLAIM_TTL)
+        if body.get('grace') is not None:
+            grace = _as_int(body['grace'], 'grace', _CLAIM_GRACE)
+        return ttl, grace
+
+    def _require_claim(self, ctx, params):
+        queue = self._require_queue(ctx, params)
+        claim = queue.claims.get(params.get('claim_id'))
+        if claim is None:
+            raise _not_found('Claim %s does not exist.' %
+                             params.get('claim_id'))
+        return queue, claim
+
+    def _dead_letter(self, ctx, queue, msg):
+        target = queue.get_option('_dead_letter_queue')
+        if not target:
+            return False
+
+        dead = self._get_queue(ctx, {'queue_name': target}, create=True)
+        ttl = queue.get_option('_dead_letter_queue_messages_ttl') or msg.ttl
+        moved = dead.add_message(msg.body, ttl, 0, msg.client_id, ctx.now)
+        moved.claim_count = msg.claim_count
+        queue.remove_message(msg)
+        return True
+
+    def claim_create(self, ctx, params, body):
+        limit = _limit(params)
+        ttl, grace = self._claim_options(body, _DEFAULT_CLAIM_TTL,
+                                         _DEFAULT_CLAIM_GRACE)
+
+        queue = self._get_queue(ctx, params)
+        if queue is None:
+            return 204, None
+
+        max_claims = queue.get_option('_max_claim_count')
+        claimable = []
+        for msg in queue.iter_messages():
+            if not queue.is_free(msg, ctx.now):
+                continue
+            if (max_claims and msg.claim_count >= max_claims and
+                    self._dead_letter(ctx, queue, msg)):
+                continue
+            claimable.append(msg)
+            if len(claimable) == limit:
+                break
+
+        if not claimable:
+            return 204, None
+
+        claim = _Claim(ttl, grace, ctx.now)
+        queue.add_claim(claim, claimable)
+        return 201, {'messages': [
+            self._format_message(ctx, queue, msg, claimed=True)
+            for msg in claimable]}
+
+    def claim_get(self, ctx, params, body):
+        queue, claim = self._require_claim(ctx, params)
+        return 200, {
+            'id': claim.id,
+            'href': '%s/claims/%s' % (self._queue_path(ctx, queue),
+                                      claim.id),
+            'age': int(ctx.now - claim.created),
+            'ttl': claim.ttl,
+            'grace': claim.grace,
+            'messages': [self._format_message(ctx, queue, msg, claimed=True)
+                         for msg in claim.messages.values()],
+        }
+
+    def claim_update(self, ctx, params, body):
+        queue, claim = self._require_claim(ctx, params)
+        ttl, grace = self._claim_options(body, claim.ttl, claim.grace)
+        queue.renew_claim(claim, ttl, grace, ctx.now)
+        return 204, None
+
+    def claim_delete(self, ctx, params, body):
+        queue = self._get_queue(ctx, params)
+        claim = queue and queue.claims.get(params.get('claim_id'))
+        if claim is not None:
+            queue.remove_claim(claim)
+        return 204, None
+
+    # Subscriptions
+
+    def _format_subscription(self, ctx, queue, sub):
+        return {'id': sub.id,
+                'source': queue.name,
+                'subscriber': sub.subscriber,
+                'ttl': sub.ttl,
+                'age': int(ctx.now - sub.created),
+                'options': dict(sub.options),
+                'confirmed': False}
+
+    def _subscription_data(self, body, sub=None):
+        if not isinstance(body, dict) or (sub is not None and not body):
+            raise _bad_request('The request body must be an object.')
+
+        unknown = set(body) - {'subscriber', 'ttl', 'options'}
+        if unknown:
+            raise _bad_request('Unknown fields: %s.' %
+                               ', '.join(sorted(unknown)))
+
+        subscriber = body.get('subscriber', sub and sub.subscriber)
+        if not isinstance(subscriber, str) or not subscriber:
+            raise _bad_request('A subscriber is required.')
+        ttl = _as_int(body.get('ttl', sub.ttl if sub else 3600), 'ttl',
+                      (1, 2 ** 31 - 1))
+        options = body.get('options', sub.options if sub else {})
+        if not isinstance(options, dict):
+            raise _bad_request('Subscription options must be an object.')
+        return subscriber, ttl, options
+
+    def _require_subscription(self, ctx, params):
+        queue = self._require_queue(ctx, params)
+        sub = queue.subscriptions.get(params.get('subscription_id'))
+        if sub is None:
+            raise _not_found('Subscription %s does not exist.' %
+                             params.get('subscription_id'))
+        return queue, sub
+
+    def subscription_list(self, ctx, params, body):
+        limit = _limit(params)
+        marker = params.get('marker')
+
+        queue = self._get_queue(ctx, params)
+        subs = list(queue.subscriptions.values()) if queue else []
+        if marker:
+            ids = [sub.id for sub in subs]
+            subs = subs[ids.index(marker) + 1:] if marker in ids else []
+        page = subs[:limit]
+
+        result = {'subscriptions': [self._format_subscription(ctx, queue,
+                                                              sub)
+                                    for sub in page],
+                  'links': []}
+        if page:
+            result['links'] = _link(
+                '%s/subscriptions' % self._queue_path(ctx, queue),
+                marker=page[-1].id, limit=limit)
+        return 200, result
+
+    def subscription_create(self, ctx, params, body):
+        queue = self._get_queue(ctx, params, create=True)
+        subscriber, ttl, options = self._subscription_data(body)
+
+        # Like Zaqar, subscribing the same subscriber
+        # again gives the existing subscription back.
+        for sub in queue.subscriptions.values():
+            if sub.subscriber == subscriber:
+                return 201, {'subscription_id': sub.id}
+
+        sub = _Subscription(subscriber, ttl, options, ctx.now)
+        queue.add_subscription(sub)
+        return 201, {'subscription_id': sub.id}
+
+    def subscription_get(self, ctx, params, body):
+        queue, sub = self._require_subscription(ctx, params)
+        return 200, self._format_subscription(ctx, queue, sub)
+
+    def subscription_update(self, ctx, params, body):
+        queue, sub = self._require_subscription(ctx, params)
+        subscriber, ttl, options = self._subscription_data(body, sub)
+        for other in queue.subscriptions.values():
+            if other is not sub and other.subscriber == subscriber:
+                raise errors.ConflictError(
+                    title='Unable to update subscription',
+                    description='The subscriber already subscribed.')
+
+        sub.subscriber, sub.ttl, sub.options = subscriber, ttl, options
+        queue.track_subscription(sub)
+        return 204, None
+
+    def subscription_delete(self, ctx, params, body):
+        queue = self._get_queue(ctx, params)
+        if queue is not None:
+            queue.subscriptions.pop(params.get('subscription_id'), None)
+        return 204, None
+
+    # Pools and flavors
+
+    def _format_pool(self, ctx, name, detailed=True):
+        pool = self._pools[name]
+        formatted = {'name': name,
+                     'href': '%s/pools/%s' % (ctx.base, name),
+                     'uri': pool['uri'],
+                     'weight': pool['weight'],
+                     'flavor': pool['flavor']}
+        if detailed:
+            formatted['options'] = dict(pool['options'])
+        return formatted
+
+    def _require_pool(self, params):
+        name = params.get('pool_name')
+        if name not in self._pools:
+            raise _not_found('Pool %s does not exist.' % name)
+        return name
+
+    def _pool_data(self, body, pool=None):
+        if not isinstance(body, dict) or (pool is not None and not body):
+            raise _bad_request('The request body must be an object.')
+
+        data = dict(pool or {'flavor': None, 'options': {}})
+        data.update(body)
+        if not isinstance(data.get('uri'), str) or not data['uri']:
+            raise _bad_request('A pool uri is required.')
+        data['weight'] = _as_int(data.get('weight'), 'weight',
+                                 (0, 2 ** 31 - 1))
+        if not isinstance(data.get('options') or {}, dict):
+            raise _bad_request('Pool options must be an object.')
+        data['options'] = data.get('options') or {}
+        return data
+
+    def pool_list(self, ctx, params, body):
+        limit = _limit(params)
+        marker = params.get('marker') or ''
+        detailed = _as_bool(params.get('detailed', False))
+
+        names = sorted(name for name in self._pools if name > marker)
+        page = [self._format_pool(ctx, name, detailed)
+                for name in names[:limit]]
+        result = {'pools': page, 'links': []}
+        if page:
+            result['links'] = _link('%s/pools' % ctx.base,
+                                    marker=page[-1]['name'], limit=limit,
+                                    detailed=detailed or None)
+        return 200, result
+
+    def pool_create(self, ctx, params, body):
+        # Like Zaqar, PUT replaces existing pools.
+        self._pools[params.get('pool_name')] = self._pool_data(body)
+        return 201, None
+
+    def pool_get(self, ctx, params, body):
+        return 200, self._format_pool(ctx, self._require_pool(params))
+
+    def pool_update(self, ctx, params, body):
+        name = self._require_pool(params)
+        self._pools[name] = self._pool_data(body, self._pools[name])
+        return 200, self._format_pool(ctx, name)
+
+    def pool_delete(self, ctx, params, body):
+        self._pools.pop(params.get('pool_name'), None)
+        return 204, None
+
+    def _format_flavor(self, ctx, name, detailed=True):
+        formatted = {'name': name,
+                     'href': '%s/flavors/%s' % (ctx.base, name),
+                     'pool_list': sorted(
+                         pool for pool, data in self._pools.items()
+                         if data['flavor'] == name)}
+        if detailed:
+            formatted['capabilities'] = dict(
+                self._flavors[name]['capabilities'])
+        return formatted
+
+    def _require_flavor(self, params):
+        name = params.get('flavor_name')
+        if name not in self._flavors:
+            raise _not_found('Flavor %s does not exist.' % name)
+        return name
+
+    def _assign_pools(self, name, pool_list):
+        if not isinstance(pool_list, list) or not pool_list:
+            raise _bad_request('A flavor needs a list of pools.')
+        missing = [pool for pool in pool_list if pool not in self._pools]
+        if missing:
+            raise _bad_request('Pools %s do not exist.' %
+                               ', '.join(missing))
+
+        for pool, data in self._pools.items():
+            if pool in pool_list:
+                data['flavor'] = name
+            elif data['flavor'] == name:
+                data['flavor'] = None
+
+    def flavor_list(self, ctx, params, body):
+        limit = _limit(params)
+        marker = params.get('marker') or ''
+        detailed = _as_bool(params.get('detailed', False))
+
+        names = sorted(name for name in self._flavors if name > marker)
+        page = [self._format_flavor(ctx, name, detailed)
+                for name in names[:limit]]
+        result = {'flavors': page, 'links': []}
+        if page:
+            result['links'] = _link('%s/flavors' % ctx.base,
+                                    marker=page[-1]['name'], limit=limit,
+                                    detailed=detailed or None)
+        return 200, result
+
+    def flavor_create(self, ctx, params, body):
+        if not isinstance(body, dict):
+            raise _bad_request('The request body must be an object.')
+        name = params.get('flavor_name')
+        self._assign_pools(name, body.get('pool_list'))
+        self._flavors[name] = {'capabilities': body.get('capabilities') or {}}
+        return 201, None
+
+    def flavor_get(self, ctx, params, body):
+        return 200, self._format_flavor(ctx, self._require_flavor(params))
+
+    def flavor_update(self, ctx, params, body):
+        name = self._require_flavor(params)
+        if not isinstance(body, dict) or not body:
+            raise _bad_request('The request body must be an object.')
+        if 'pool_list' in body:
+            self._assign_pools(name, body['pool_list'])
+        if 'capabilities' in body:
+            self._flavors[name]['capabilities'] = body['capabilities'] or {}
+        return 200, self._format_flavor(ctx, name)
+
+    def flavor_delete(self, ctx, params, body):
+        if self._flavors.pop(params.get('flavor_name'), None) is not None:
+            for data in self._pools.values():
+                if data['flavor'] == params['flavor_name']:
+                    data['flavor'] = None
+        return 204, None
+
+    # Misc
+
+    def signed_url_create(self, ctx, params, body):
+        self._require_queue(ctx, params)
+        body = body or {}
+
+        paths = body.get('paths') or list(_SIGNED_URL_PATHS)
+        methods = body.get('methods') or ['GET']
+        if not set(paths) <= set(_SIGNED_URL_PATHS):
+            raise _bad_request('Paths must be a subset of %s.' %
+                               ', '.join(_SIGNED_URL_PATHS))
+        if not set(methods) <= set(_SIGNED_URL_METHODS):
+            raise _bad_request('Methods must be a subset of %s.' %
+                               ', '.join(_SIGNED_URL_METHODS))
+
+        project = body.get('project_id') or ctx.project
+        expires = body.get('expires') or _isotime(ctx.now + 86400)
+        paths = ['%s/queues/%s/%s' % (ctx.base, params['queue_name'], path)
+                 for path in sorted(paths)]
+        methods = sorted(methods)
+        payload = '\n'.join([str(project), expires] + methods + paths)
+        signature = hmac.new(self._secret, payload.encode('utf-8'),
+                             hashlib.sha256).hexdigest()
+        return 200, {'signature': signature,
+                     'expires': expires,
+                     'paths': paths,
+                     'methods': methods,
+                     'project': project}
+
+    def ping(self, ctx, params, body):
+        return 204, None
+
+    def health(self, ctx, params, body):
+        return 200, {'catalog_reachable': True,
+                     'storage_reachable': True,
+                     'operation_status': {}}
+
+    def homedoc(self, ctx, params, body):
+        return 200, {'resources': {
+            'rel/%s' % operation: {
+                'href-template': '%s/%s' % (ctx.base, schema.get('ref', '')),
+                'hints': {'allow': [schema.get('method', 'GET')]},
+            }
+            for operation, schema in ctx.api.schema.items()}}
+
+
+@functools.lru_cache(maxsize=None)
+def _routes(api_cls):
+    """Returns the patterns of the GET routes of `api_cls`
+
+    Routes shared by several operations, i.e: `message_get_many`,
+    belong to the first operation declared for them.
+    """
+    routes = {}
+    for operation, schema in api_cls.schema.items():
+        if schema.get('method', 'GET') != 'GET':
+            continue
+        pattern = re.sub(r'\\{(\w+)\\}', r'(?P<\1>[^/]+)',
+                         re.escape(schema.get('ref', '')))
+        routes.setdefault(pattern, operation)
+    return [(re.compile(pattern + '$'), operation)
+            for pattern, operation in routes.items()]
+
+
+class MemoryTransport(base.Transport):
+    """Zaqar transport answering requests from memory.
+
+    See `zaqarclient.transport.memory`. Requests are encoded and
+    decoded like they'd be on the wire, hence the client behaves
+    as it would against a server, but nothing is sent.
+    """
+
+    def _resolve(self, request):
+        """Returns the operation and the params of `request`"""
+        # Like on the wire, params
+        # set to None are not sent.
+        params = {key: value for key, value in request.params.items()
+                  if value is not None}
+        if request.operation:
+            request.api.get_schema(request.operation)
+            return request.operation, params
+
+        # Requests following links, see
+        # `zaqarclient.queues.v2.client.Client.follow`.
+        path, _sep, query = request.ref.partition('?')
+        path = api.compile_ref(path, request.api.label).template
+        params.update(urllib.parse.parse_qsl(query))
+
+        for pattern, operation in _routes(type(request.api)):
+            match = pattern.match(path)
+            if match:
+                params.update({key: urllib.parse.unquote(value)
+                               for key, value in match.groupdict().items()})
+                return operation, params
+        raise _not_found('No resource at %s.' % request.ref)
+
+    def send(self, request):
+        if deadline.expired(request.deadline):
+            raise zaqar_errors.DeadlineExceeded(request.operation)
+
+        operation, params = self._resolve(request)
+        body = None
+        if request.content:
+            try:
+                body = self.codec.loads(request.content)
+            except ValueError:
+                raise _bad_request('The request body is not valid JSON.')
+
+        store = get_store(urllib.parse.urlparse(request.endpoint).netloc)
+        ctx = _Context(request.api, request.headers.get('X-Project-Id'),
+                       request.headers.get('Client-ID'), None)
+        with store.lock:
+            ctx.now = store.clock()
+            status, result = getattr(store, operation)(ctx, params, body)
+
+        content = b'' if result is None else self.codec.dumps(result)
+        return response.Response(request, content, status_code=status,
+                                 codec=self.codec)
@@ -14,14 +14,79 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
+import threading
+
 from stevedore import driver
 
 from zaqarclient import auth
+from zaqarclient.common import codec as jsoncodec
 from zaqarclient import errors
+from zaqarclient.transport import deadline
+
+# API instances are stateless, they
+# are resolved through stevedore once per process
+# and shared by all the requests.
+_APIS = {}
+_APIS_LOCK = threading.Lock()
+
+
+def get_api(name):
+    """Loads the API `name` from the `zaqarclient.api` namespace
+
+    The API is loaded once and cached for the lifetime of
+    the process.
+
+    :param name: The API entry point, i.e: 'queues.v2'
+    :type name: str
+
+    :returns: An `Api` instance
+    :rtype: `zaqarclient.transport.api.Api`
+    """
+    try:
+        return _APIS[name]
+    except KeyError:
+        pass
+
+    with _APIS_LOCK:
+        if name not in _APIS:
+            try:
+                namespace = 'zaqarclient.api'
+                mgr = driver.DriverManager(namespace,
+                                           name,
+                                           invoke_on_load=True)
+            except RuntimeError as ex:
+                raise errors.DriverLoadFailure(name, ex)
+            _APIS[name] = mgr.driver
+    return _APIS[name]
+
+
+def project_headers(auth_opts):
+    """Returns the project headers to send along with requests
+
+    :param auth_opts: Auth parameters
+    :type auth_opts: `dict`
+
+    :rtype: `dict`
+    """
+    headers = {}
+    option = auth_opts.get('options', {})
+    # TODO(wangxiyuan): To keep backwards compatibility, we leave
+    # "os_project_id" here. Remove it in the next release.
+    project_id = option.get('os_project_id', option.get('project_id'))
+
+    # Let's add project id header, only if it will have non-empty value.
+    if project_id:
+        headers['X-Project-Id'] = project_id
 
+    # In case of noauth backend and no specified project id, the default
+    # project id will be added as header.
+    elif auth_opts.get("backend") == "noauth":
+        headers['X-Project-Id'] = "fake_project_id_for_noauth"
+    return headers
 
-def prepare_request(auth_opts=None, data=None, **kwargs):
+
+def prepare_request(auth_opts=None, data=None, auth_backend=None,
+                    static_headers=None, codec=None, **kwargs):
     """Prepares a request
 
     This method takes care of authentication
@@ -35,33 +100,38 @@ def prepare_request(auth_opts=None, data=None, **kwargs):
     :param data: Optional data to send along with the
         request. If data is not None, it'll be serialized.
     :type data: Any primitive type that is json-serializable.
+    :param auth_backend: Auth backend to use instead of loading
+        a new one from `auth_opts`. Reusing the backend keeps the
+        credentials it caches.
+    :type auth_backend: `zaqarclient.auth.base.AuthBackend`
+    :param static_headers: Prebuilt headers stamped on the
+        request after authenticating it. Defaults to the
+        `project_headers` of `auth_opts`.
+    :type static_headers: `dict`
+    :param codec: JSON codec, or its name, used to serialize
+        `data`. See `zaqarclient.common.codec`.
+    :type codec: str
     :param kwargs: Anything accepted by `Request`
 
     :returns: A `Request` instance ready to be sent.
     :rtype: `Request`
     """
 
+    auth_opts = auth_opts or {}
+
     req = Request(**kwargs)
-    auth_backend = auth.get_backend(**(auth_opts or {}))
+    req.deadline = deadline.current()
+    if auth_backend is None:
+        auth_backend = auth.get_backend(**auth_opts)
     req = auth_backend.authenticate(kwargs.get('api'), req)
+    req.auth_backend = auth_backend
 
-    option = auth_opts.get('options', {})
-    # TODO(wangxiyuan): To keep backwards compatibility, we leave
-    # "os_project_id" here. Remove it in the next release.
-    project_id = option.get('os_project_id', option.get('project_id'))
-
-    # Let's add project id header, only if it will have non-empty value.
-    if project_id:
-        req.headers['X-Project-Id'] = project_id
-
-    # In case of noauth backend and no specified project id, the default
-    # project id will be added as header.
-    if ('X-Project-Id' not in req.headers and
-            auth_opts.get("backend") == "noauth"):
-        req.headers['X-Project-Id'] = "fake_project_id_for_noauth"
+    if static_headers is None:
+        static_headers = project_headers(auth_opts)
+    req.headers.update(static_headers)
 
     if data is not None:
-        req.content = json.dumps(data)
+        req.content = jsoncodec.get_codec(codec).dumps(data)
     return req
 
 
@@ -93,11 +163,16 @@ class Request:
     :type cert: str
     :param session: Keystone session
     :type session: keystone session object
+    :param stream: If the response body should be read
+        incrementally, see `response.StreamingResponse`.
+        Default: False
+    :type stream: bool
     """
 
     def __init__(self, endpoint='', operation='',
                  ref='', content=None, params=None,
-                 headers=None, api=None, verify=True, cert=None, session=None):
+                 headers=None, api=None, verify=True, cert=None, session=None,
+                 stream=False):
 
         self._api = None
         # ensure that some values like "v2.0" could work as "v2"
@@ -116,20 +191,38 @@ class Request:
         self.verify = verify
         self.cert = cert
         self.session = session
+        self.stream = stream
+        self.auth_backend = None
+        # Absolute `time.monotonic` deadline,
+        # see `zaqarclient.transport.deadline`.
+        self.deadline = None
+        # Endpoint hedged copies of this request
+        # are sent to, see `zaqarclient.transport.hedge`.
+        self.hedge_endpoint = None
+        self._api_version = api
 
     @property
     def api(self):
         if not self._api and self._api_mod:
-            try:
-                namespace = 'zaqarclient.api'
-                mgr = driver.DriverManager(namespace,
-                                           self._api_mod,
-                                           invoke_on_load=True)
-                self._api = mgr.driver
-            except RuntimeError as ex:
-                raise errors.DriverLoadFailure(self._api_mod, ex)
+            self._api = get_api(self._api_mod)
         return self._api
 
+    def reauthenticate(self):
+        """Authenticates this request again
+
+        The cached credentials of the auth backend that
+        authenticated this request are dropped first.
+
+        :returns: False if the request wasn't authenticated
+            by an auth backend, True otherwise.
+        """
+        if self.auth_backend is None:
+            return False
+
+        self.auth_backend.invalidate()
+        self.auth_backend.authenticate(self._api_version, self)
+        return True
+
     def validate(self):
         """Validation shortcut
 
@@ -13,13 +13,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
-
 from oslo_log import log as logging
 
+from zaqarclient.common import codec as jsoncodec
+from zaqarclient.common import jsonstream
+
 
 LOG = logging.getLogger(__name__)
 
+_NOT_DECODED = object()
+
 
 class Response:
     """Common response class for Zaqarclient.
@@ -31,30 +34,159 @@ class Response:
     :param request: The request sent to the server.
     :type: `zaqarclient.transport.request.Request`
     :param content: Response's content
-    :type: str
+    :type: bytes or str
     :param headers: Optional headers returned in the response.
     :type: dict
     :param status_code: Optional status_code returned in the response.
     :type: `int`
+    :param codec: Optional JSON codec used to decode `content`.
+    :type: `zaqarclient.common.codec.JsonCodec`
+    :param deserialized: Optional body already decoded by the
+        transport. `content` is then only encoded if it's
+        accessed. Pass `content=None` along with it.
+    :type: Any JSON-serializable type.
     """
 
-    __slots__ = ('request', 'content', 'headers', 'status_code',
-                 '_deserialized')
+    __slots__ = ('request', '_content', 'headers', 'status_code',
+                 'codec', '_deserialized')
 
-    def __init__(self, request, content, headers=None, status_code=None):
+    def __init__(self, request, content, headers=None, status_code=None,
+                 codec=None, deserialized=_NOT_DECODED):
         self.request = request
-        self.content = content
+        self._content = content
         self.headers = headers or {}
         self.status_code = status_code
+        self.codec = codec or jsoncodec.get_codec()
+
+        self._deserialized = deserialized
+
+    @property
+    def content(self):
+        if (self._content is None and
+                self._deserialized not in (_NOT_DECODED, None)):
+            self._content = self.codec.dumps(self._deserialized)
+        return self._content
 
-        self._deserialized = None
+    @content.setter
+    def content(self, value):
+        self._content = value
+        self._deserialized = _NOT_DECODED
 
     @property
     def deserialized_content(self):
-        try:
-            if not self._deserialized and self.content:
-                self._deserialized = json.loads(self.content)
+        if self._deserialized is not _NOT_DECODED:
             return self._deserialized
+
+        try:
+            if self.content:
+                self._deserialized = self.codec.loads(self.content)
+                return self._deserialized
         except ValueError as ex:
             LOG.warning("Response is not a JSON object.: %s", ex)
         return None
+
+    def iter_records(self, key):
+        """Iterates over the records listed under `key`
+
+        :param key: Key of the list of records, i.e: 'messages'
+        :type key: str
+
+        :rtype: `RecordIterator`
+        """
+        content = self.deserialized_content or {}
+        extra = {k: v for k, v in content.items() if k != key}
+        return RecordIterator(iter(content.get(key) or []), extra)
+
+
+class StreamingResponse(Response):
+    """Response whose body is read as it's consumed
+
+    Records are decoded one at a time by `iter_records`, which
+    bounds the memory used to the size of a single record rather
+    than the one of the whole body::
+
+        resp = transport.send(request)
+        records = resp.iter_records('messages')
+        for msg in records:
+            ...
+        next_page = records.links
+
+    Accessing `content` or `deserialized_content` reads the
+    whole body instead.
+
+    :param chunks: Iterable of the body's `bytes` chunks.
+    :type chunks: iterable
+    :param close: Optional callable releasing the connection.
+    :type close: callable
+    """
+
+    __slots__ = ('_chunks', '_close')
+
+    def __init__(self, request, chunks, headers=None, status_code=None,
+                 codec=None, close=None):
+        self._chunks = chunks
+        self._close = close
+        super().__init__(request, None, headers=headers,
+                         status_code=status_code, codec=codec)
+
+    @property
+    def content(self):
+        if self._content is None and self._chunks is not None:
+            chunks, self._chunks = self._chunks, None
+            try:
+                self._content = b''.join(chunks)
+            finally:
+                self.close()
+        return self._content
+
+    @content.setter
+    def content(self, value):
+        self._content = value
+
+    def iter_records(self, key):
+        if self._chunks is None:
+            return super().iter_records(key)
+
+        chunks, self._chunks = self._chunks, None
+        extra = {}
+        return RecordIterator(jsonstream.iter_items(chunks, key, extra),
+                              extra, close=self.close)
+
+    def close(self):
+        """Releases the connection the body is read from."""
+        self._chunks = None
+        if self._close is not None:
+            close, self._close = self._close, None
+            close()
+
+
+class RecordIterator:
+    """Iterator over the records of a listing
+
+    The other keys of the listing, i.e: `links`, are available
+    in `extra` once the records have been consumed.
+    """
+
+    def __init__(self, records, extra, close=None):
+        self._records = records
+        self._close = close
+        self.extra = extra
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._records)
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def links(self):
+        return self.extra.get('links', [])
+
+    def close(self):
+        if self._close is not None:
+            close, self._close = self._close, None
+            close()
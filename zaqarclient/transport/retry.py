@@ -0,0 +1,229 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Retries of requests that failed because of the server or the network.
+
+Retries are disabled by default. They're enabled through the
+`retry_opts` section of the options, i.e::
+
+    conf = {
+        'retry_opts': {
+            'max_retries': 3,
+            'backoff': 0.1,
+            'max_backoff': 10,
+        }
+    }
+
+Only idempotent operations are retried, see
+`zaqarclient.transport.api.Api.is_idempotent`.
+"""
+
+import asyncio
+import email.utils
+import random
+import threading
+import time
+
+from oslo_log import log as logging
+
+from zaqarclient.transport import errors
+
+LOG = logging.getLogger(__name__)
+
+
+def _retry_after(headers):
+    """Returns the seconds to wait from a Retry-After header"""
+    if not headers:
+        return None
+
+    value = headers.get('Retry-After')
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - time.time())
+
+
+class RetryBudget:
+    """Token bucket capping the share of requests that are retries
+
+    Every failed attempt takes a token out of the bucket and every
+    successful one puts `ratio` tokens back. Retries are allowed
+    while more than half of the bucket is left, hence a fleet of
+    clients stops retrying, rather than piling up on a struggling
+    cluster, once most of its requests fail.
+
+    :param max_tokens: Size of the bucket.
+    :type max_tokens: int
+    :param ratio: Tokens put back by a successful request.
+    :type ratio: float
+    """
+
+    def __init__(self, max_tokens=10, ratio=0.1):
+        self.max_tokens = float(max_tokens)
+        self.ratio = ratio
+        self._tokens = self.max_tokens
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self):
+        return self._tokens
+
+    def on_success(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def on_failure(self):
+        with self._lock:
+            self._tokens = max(0.0, self._tokens - 1)
+
+    def can_retry(self):
+        return self._tokens > self.max_tokens / 2
+
+
+class RetryPolicy:
+    """Decides whether, and when, failed requests are sent again
+
+    Requests are retried when the server answers with one of the
+    `retry_on` status codes or when the connection to the server
+    fails. The wait between attempts grows exponentially from
+    `backoff` up to `max_backoff` seconds and is fully jittered.
+    A `Retry-After` header sent by the server is honored instead,
+    unless it asks to wait longer than `max_backoff`, in which
+    case the request is not retried.
+
+    :param max_retries: Maximum number of retries per request.
+        Default: 0, retries are disabled.
+    :type max_retries: int
+    :param backoff: Base of the exponential backoff, in seconds.
+    :type backoff: float
+    :param max_backoff: Maximum wait between attempts, in seconds.
+    :type max_backoff: float
+    :param retry_on: HTTP status codes worth retrying.
+    :type retry_on: iterable
+    :param budget_tokens: Size of the `RetryBudget`.
+    :type budget_tokens: int
+    :param budget_ratio: Tokens earned by a successful request.
+    :type budget_ratio: float
+    """
+
+    def __init__(self, max_retries=0, backoff=0.1, max_backoff=10.0,
+                 retry_on=(500, 502, 503, 504), budget_tokens=10,
+                 budget_ratio=0.1):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_on = frozenset(retry_on)
+        self.budget = RetryBudget(budget_tokens, budget_ratio)
+
+    def is_retryable(self, ex, connection_errors=()):
+        if isinstance(ex, errors.TransportError):
+            return ex.code in self.retry_on
+        return isinstance(ex, connection_errors)
+
+    def get_backoff(self, attempt):
+        """Returns the jittered wait before retry number `attempt`"""
+        cap = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return random.uniform(0, cap)
+
+    def get_delay(self, ex, attempt, idempotent, connection_errors=(),
+                  deadline=None):
+        """Returns the seconds to wait before retrying
+
+        :param ex: The error the last attempt failed with.
+        :type ex: Exception
+        :param attempt: Number of retries done so far.
+        :type attempt: int
+        :param idempotent: Whether the request can be safely
+            sent more than once.
+        :type idempotent: bool
+        :param connection_errors: Exception types raised by the
+            transport when the connection fails.
+        :type connection_errors: tuple
+        :param deadline: The request's deadline. Requests aren't
+            retried if it'd be over before the next attempt.
+        :type deadline: float
+
+        :returns: The delay, or None if the request must not
+            be retried.
+        """
+        if not self.is_retryable(ex, connection_errors):
+            return None
+
+        self.budget.on_failure()
+        if (not idempotent or attempt >= self.max_retries or
+                not self.budget.can_retry()):
+            return None
+
+        delay = _retry_after(getattr(ex, 'headers', None))
+        if delay is None:
+            delay = self.get_backoff(attempt)
+        elif delay > self.max_backoff:
+            return None
+
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    def call(self, func, request, idempotent, connection_errors=()):
+        """Calls `func(request)`, retrying it according to this policy"""
+        if not self.max_retries:
+            return func(request)
+
+        attempt = 0
+        while True:
+            try:
+                result = func(request)
+            except Exception as ex:
+                delay = self.get_delay(ex, attempt, idempotent,
+                                       connection_errors, request.deadline)
+                if delay is None:
+                    raise
+                LOG.debug('Retrying %s in %.2fs: %s',
+                          request.operation, delay, ex)
+                time.sleep(delay)
+                attempt += 1
+            else:
+                self.budget.on_success()
+                return result
+
+    async def call_async(self, func, request, idempotent,
+                         connection_errors=()):
+        """Coroutine flavour of `call`, `func` must be a coroutine"""
+        if not self.max_retries:
+            return await func(request)
+
+        attempt = 0
+        while True:
+            try:
+                result = await func(request)
+            except Exception as ex:
+                delay = self.get_delay(ex, attempt, idempotent,
+                                       connection_errors, request.deadline)
+                if delay is None:
+                    raise
+                LOG.debug('Retrying %s in %.2fs: %s',
+                          request.operation, delay, ex)
+                await asyncio.sleep(delay)
+                attempt += 1
+            else:
+                self.budget.on_success()
+                return result
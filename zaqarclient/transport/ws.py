@@ -12,30 +12,294 @@
 #   License for the specific language governing permissions and limitations
 #   under the License.
 #
-import json
+
+import collections
+from concurrent import futures
+import functools
+import queue
+import threading
+import time
 
 from oslo_log import log as logging
 from oslo_utils import importutils
 from oslo_utils import uuidutils
 
+from zaqarclient.common import codec as jsoncodec
+from zaqarclient import errors
 from zaqarclient.transport import base
+from zaqarclient.transport import deadline
 from zaqarclient.transport import request
 from zaqarclient.transport import response
+from zaqarclient.transport import retry
 
 websocket = importutils.try_import('websocket')
 
 LOG = logging.getLogger(__name__)
 
+# Zaqar echoes the request, headers included,
+# in its responses. This header ties them back together.
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+
+class _Connection:
+    """A websocket shared by every request in flight
+
+    Frames are sent by the callers' threads and read by a background
+    thread, which hands the responses over to the requests waiting
+    for them and the other frames to `on_unsolicited`.
+
+    When `ping_interval` is set, the server is pinged once nothing
+    was read from it for that long. The connection is deemed lost
+    if nothing, not even the pong, comes within `ping_timeout`
+    seconds.
+
+    :param ws: The connected websocket.
+    :type ws: `websocket.WebSocket`
+    :param loads: Callable decoding the frames.
+    :type loads: callable
+    :param on_unsolicited: Called with the decoded frames that are
+        not a response to a request.
+    :type on_unsolicited: callable
+    :param on_lost: Called with the error once the connection
+        is lost, unless it was closed with `close`.
+    :type on_lost: callable
+    :param ping_interval: Seconds without reading anything before
+        pinging the server. Default: None, never ping.
+    :type ping_interval: float
+    :param ping_timeout: Seconds to wait for the pong.
+    :type ping_timeout: float
+    """
+
+    def __init__(self, ws, loads, on_unsolicited, on_lost=None,
+                 ping_interval=None, ping_timeout=10.0):
+        self.ws = ws
+        self.loads = loads
+        self.closed = False
+        self._on_unsolicited = on_unsolicited
+        self._on_lost = on_lost
+        self._ping_interval = ping_interval
+        self._ping_timeout = ping_timeout
+        self._pending = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._alive = threading.Event()
+
+        now = time.monotonic()
+        self._last_read = now
+        self._mark = now
+        self._idle = 0.0
+        self._busy = 0.0
+        self._requests = 0
+        self._pings = 0
+
+        self._reader = threading.Thread(target=self._read_loop,
+                                        name='zaqarclient-ws-reader',
+                                        daemon=True)
+        self._reader.start()
+        if ping_interval:
+            threading.Thread(target=self._heartbeat,
+                             name='zaqarclient-ws-heartbeat',
+                             daemon=True).start()
+
+    def _account(self):
+        # Called with the lock held, before the
+        # pending requests change. The connection is busy while
+        # any request waits for its response.
+        now = time.monotonic()
+        if self._pending:
+            self._busy += now - self._mark
+        else:
+            self._idle += now - self._mark
+        self._mark = now
+
+    def stats(self):
+        """Returns the usage of the connection
+
+        `idle` and `busy` are the seconds spent without and with
+        requests waiting for their responses.
+
+        :rtype: dict
+        """
+        with self._lock:
+            self._account()
+            return {'idle': self._idle,
+                    'busy': self._busy,
+                    'requests': self._requests,
+                    'pings': self._pings}
+
+    def submit(self, request_id, frame, opcode=None):
+        """Sends `frame` and returns a future for its response
+
+        :param opcode: The frame's opcode, text by default.
+        :type opcode: int
+
+        :rtype: `concurrent.futures.Future`
+        """
+        future = futures.Future()
+        with self._lock:
+            if self.closed:
+                raise websocket.WebSocketConnectionClosedException(
+                    'The websocket connection is closed')
+            self._account()
+            self._pending[request_id] = future
+            self._requests += 1
+
+        try:
+            with self._send_lock:
+                if opcode is None:
+                    self.ws.send(frame)
+                else:
+                    self.ws.send(frame, opcode=opcode)
+        except Exception:
+            self.forget(request_id)
+            raise
+        return future
+
+    def forget(self, request_id):
+        """Stops waiting for the response to `request_id`"""
+        with self._lock:
+            self._account()
+            self._pending.pop(request_id, None)
+
+    @staticmethod
+    def _request_id(frame):
+        request = frame.get('request')
+        for headers in (frame.get('headers'),
+                        isinstance(request, dict) and request.get('headers')):
+            if isinstance(headers, dict) and REQUEST_ID_HEADER in headers:
+                return headers[REQUEST_ID_HEADER]
+        return None
+
+    @staticmethod
+    def _is_response(frame):
+        headers = frame.get('headers')
+        return 'request' in frame or (isinstance(headers, dict) and
+                                      'status' in headers)
+
+    def _dispatch(self, frame):
+        request_id = None
+        if isinstance(frame, dict):
+            request_id = self._request_id(frame)
+
+        future = None
+        with self._lock:
+            self._account()
+            if request_id is not None:
+                future = self._pending.pop(request_id, None)
+            elif (self._pending and isinstance(frame, dict) and
+                    self._is_response(frame)):
+                # Servers that don't echo the request
+                # answer in order, match the oldest request.
+                _request_id, future = self._pending.popitem(last=False)
+
+        if future is not None:
+            if not future.done():
+                future.set_result(frame)
+        elif request_id is not None:
+            LOG.debug('Dropping the late response to request %s', request_id)
+        else:
+            try:
+                self._on_unsolicited(frame)
+            except Exception:
+                LOG.exception('Failed to handle an unsolicited frame')
+
+    def _recv(self):
+        while True:
+            opcode, data = self.ws.recv_data(control_frame=True)
+            self._last_read = time.monotonic()
+            self._alive.set()
+            if opcode == websocket.ABNF.OPCODE_TEXT:
+                return data.decode('utf-8') if isinstance(
+                    data, bytes) else data
+            if opcode == websocket.ABNF.OPCODE_BINARY:
+                return data
+            if opcode == websocket.ABNF.OPCODE_CLOSE:
+                raise websocket.WebSocketConnectionClosedException(
+                    'The websocket connection was closed by the server')
+            # Pings are answered by the websocket
+            # itself, pongs only tell the server is alive.
+
+    def _read_loop(self):
+        while True:
+            try:
+                data = self._recv()
+            except Exception as ex:
+                self._fail(ex)
+                return
+
+            try:
+                frame = self.loads(data)
+            except ValueError:
+                LOG.warning('Dropping an undecodable websocket frame')
+                continue
+            self._dispatch(frame)
+
+    def _heartbeat(self):
+        while not self._stopped.wait(self._ping_interval):
+            if time.monotonic() - self._last_read < self._ping_interval:
+                continue
+
+            self._alive.clear()
+            try:
+                with self._send_lock:
+                    self.ws.ping()
+                self._pings += 1
+            except Exception as ex:
+                self._lose(ex)
+                return
+
+            if not self._alive.wait(self._ping_timeout):
+                if self._stopped.is_set():
+                    return
+                LOG.warning('The websocket server did not answer a ping '
+                            'within %.2fs', self._ping_timeout)
+                self._lose(websocket.WebSocketTimeoutException(
+                    'The websocket server did not answer a ping'))
+                return
+
+    def _lose(self, ex):
+        self._fail(ex)
+        try:
+            self.ws.close()
+        except Exception:
+            LOG.debug('Failed to close a dead websocket', exc_info=True)
+
+    def _fail(self, ex):
+        self._stopped.set()
+        with self._lock:
+            lost = not self.closed
+            self.closed = True
+            self._account()
+            pending = list(self._pending.values())
+            self._pending.clear()
+
+        for future in pending:
+            if not future.done():
+                future.set_exception(ex)
+
+        if lost:
+            LOG.debug('Websocket connection lost: %s', ex)
+            if self._on_lost is not None:
+                self._on_lost(ex)
+
+    def close(self):
+        self._stopped.set()
+        with self._lock:
+            self.closed = True
+        # The reader fails the
+        # pending requests once `recv` raises.
+        self.ws.close()
+
 
 class WebsocketTransport(base.Transport):
 
     """Zaqar websocket transport.
 
-    *NOTE:* Zaqar's websocket interface does not yet appear to work
-    well with parameters. Until it does the websocket transport may not
-    integrate with all of zaqarclients higherlevel request. Even so...
-    websockets today is still quite usable and use of the transport
-    via lower level API's in zaqarclient work quite nicely. Example:
+    Requests' params are sent in the body of the frames, the way
+    Zaqar's websocket API expects them, so the transport works with
+    both the lower level API and `zaqarclient.queues.v2.client`.
+    Example:
 
        conf = {
             'auth_opts': {
@@ -54,68 +318,394 @@ class WebsocketTransport(base.Transport):
                                   content=json.dumps({'queue_name': 'foo'}))
             resp = ws.send(req)
 
+    A single connection is shared by every thread sending requests
+    through the transport, with many requests in flight at once.
+    Responses are matched to their request by the `X-Request-ID`
+    header Zaqar echoes back. Frames that answer no request, like
+    the messages pushed to subscribers, are handed to the handler
+    set with `set_unsolicited_handler` or queued for `recv`. The
+    queue's size comes from the `ws_opts` section of the options,
+    i.e: `{'ws_opts': {'max_unsolicited': 1000}}`.
+
+    Frames are JSON text frames unless the `binary` key of `ws_opts`
+    is set, in which case they're MessagePack binary frames, which
+    Zaqar answers in kind. This requires the msgpack library.
+
+    Lost connections are established again, and authenticated, by
+    the next request. Connecting again is attempted
+    `reconnect_attempts` times with a jittered exponential backoff
+    starting at `reconnect_backoff` seconds, up to
+    `max_reconnect_backoff`. Idempotent requests in flight when the
+    connection was lost are sent again through the new one, up to
+    `max_replays` times. Callables added with `add_connect_hook` run
+    every time a connection is established, i.e: to subscribe to
+    queues again. When there are any, lost connections are
+    established again right away, in the background.
+
+    Idle connections are kept alive by pinging the server every
+    `ping_interval` seconds, load balancers and proxies would close
+    them otherwise. Connections whose server doesn't answer within
+    `ping_timeout` seconds are deemed lost. Pings are disabled by
+    default::
+
+        conf = {
+            'ws_opts': {
+                'reconnect_attempts': 3,
+                'reconnect_backoff': 0.5,
+                'max_reconnect_backoff': 30,
+                'max_replays': 1,
+                'ping_interval': 20,
+                'ping_timeout': 10,
+            }
+        }
     """
     def __init__(self, options):
         if not websocket:
             raise RuntimeError('The websocket-client library is not installed')
 
         super().__init__(options)
+        self.connection_errors = (websocket.WebSocketException, OSError)
         option = options['auth_opts']['options']
         # TODO(wangxiyuan): To keep backwards compatibility, we leave
         # "os_project_id" here. Remove it in the next release.
         self._project_id = option.get('os_project_id',
                                       option.get('project_id'))
         self._token = options['auth_opts']['options']['os_auth_token']
-        self._websocket_client_id = None
-        self._ws = None
+        # The id is kept across reconnections,
+        # the server sees the same client.
+        self._websocket_client_id = uuidutils.generate_uuid()
+        self._conn = None
+        self._endpoint = None
+        self._connect_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+        ws_opts = options.get('ws_opts', {})
+        self._frame_codec = None
+        self._opcode = None
+        if ws_opts.get('binary', False):
+            self._frame_codec = jsoncodec.MsgpackCodec()
+            self._opcode = websocket.ABNF.OPCODE_BINARY
+
+        self._reconnect = retry.RetryPolicy(
+            max_retries=ws_opts.get('reconnect_attempts', 3),
+            backoff=ws_opts.get('reconnect_backoff', 0.5),
+            max_backoff=ws_opts.get('max_reconnect_backoff', 30.0))
+        self._max_replays = ws_opts.get('max_replays', 1)
+        self._ping_interval = ws_opts.get('ping_interval')
+        self._ping_timeout = ws_opts.get('ping_timeout', 10.0)
+        self._connections = 0
+
+        self._unsolicited = queue.Queue(
+            maxsize=ws_opts.get('max_unsolicited', 1000))
+        self._unsolicited_handler = None
+        self._connect_hooks = []
+        self._disconnect_hooks = []
+
+    def add_connect_hook(self, hook):
+        """Adds a callable run on every new connection
+
+        Hooks run once the connection is authenticated and before
+        any other request is sent through it. They're called with
+        a callable sending a request through the new connection
+        and returning its response. A failing hook fails the
+        connection.
 
-    def _init_client(self, endpoint):
+        :param hook: The callable to run.
+        :type hook: callable
+        """
+        self._connect_hooks.append(hook)
+
+    def add_disconnect_hook(self, hook):
+        """Adds a callable run when the connection is lost
+
+        Hooks are called with the error from the thread reading
+        the websocket. They're not called when the connection is
+        closed with `cleanup`.
+
+        :param hook: The callable to run.
+        :type hook: callable
+        """
+        self._disconnect_hooks.append(hook)
+
+    def _on_lost(self, ex):
+        for hook in self._disconnect_hooks:
+            try:
+                hook(ex)
+            except Exception:
+                LOG.exception('Failed to run a disconnect hook')
+
+        if self._connect_hooks and self._endpoint is not None:
+            threading.Thread(target=self._reconnect_loop,
+                             args=(self._stopped,),
+                             name='zaqarclient-ws-reconnect',
+                             daemon=True).start()
+
+    def _reconnect_loop(self, stopped):
+        attempt = 0
+        while not stopped.is_set():
+            try:
+                self.connect(self._endpoint)
+                return
+            except Exception as ex:
+                LOG.warning('Failed to reconnect to %s: %s',
+                            self._endpoint, ex)
+            stopped.wait(self._reconnect.get_backoff(attempt))
+            attempt += 1
+
+    def set_unsolicited_handler(self, handler):
+        """Sets the callable the unsolicited frames are handed to
+
+        The handler is called from the thread reading the
+        websocket and must not block. Frames go back to the
+        `recv` queue when it's None.
+
+        :param handler: Callable taking the decoded frame.
+        :type handler: callable
+        """
+        self._unsolicited_handler = handler
+
+    def _on_unsolicited(self, frame):
+        handler = self._unsolicited_handler
+        if handler is not None:
+            handler(frame)
+            return
+
+        try:
+            self._unsolicited.put_nowait(frame)
+        except queue.Full:
+            LOG.warning('Dropping an unsolicited websocket frame, '
+                        'the queue is full')
+
+    def _init_client(self, endpoint, timeout=None):
         """Initialize a websocket transport client.
 
         :param endpoint: The websocket endpoint. Example: ws://127.0.0.1:9000/.
                          Required.
         :type endpoint: string
-        """
-        self._websocket_client_id = uuidutils.generate_uuid()
+        :param timeout: Connect timeout in seconds.
+        :type timeout: float
 
+        :returns: The authenticated connection.
+        :rtype: `_Connection`
+        """
         LOG.debug('Instantiating messaging websocket client: %s', endpoint)
-        self._ws = self._create_connection(endpoint)
+        ws = self._create_connection(endpoint, timeout=timeout)
+        # The reader waits for frames as long as
+        # the connection is open, requests time out on their own.
+        ws.settimeout(None)
+        conn = _Connection(ws, self._loads, self._on_unsolicited,
+                           self._on_lost, self._ping_interval,
+                           self._ping_timeout)
 
         auth_req = request.Request(endpoint, 'authenticate',
                                    headers={'X-Auth-Token': self._token})
-        self.send(auth_req)
+        try:
+            self._request(conn, auth_req)
+            for hook in self._connect_hooks:
+                hook(functools.partial(self._request, conn))
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _create_connection(self, endpoint, timeout=None):
+        return websocket.create_connection(endpoint, timeout=timeout)
+
+    def _get_connection(self, endpoint, timeout=None, until=None):
+        conn = self._conn
+        if conn is not None and not conn.closed:
+            return conn
+
+        with self._connect_lock:
+            if self._conn is None or self._conn.closed:
+                self._conn = self._connect(endpoint, timeout, until)
+            return self._conn
+
+    def _connect(self, endpoint, timeout, until=None):
+        # Only reconnections are retried, failing
+        # to connect in the first place is likely a setup issue.
+        attempts = 0 if self._endpoint is None else self._reconnect.max_retries
+        attempt = 0
+        while True:
+            try:
+                conn = self._init_client(endpoint, timeout)
+            except self.connection_errors as ex:
+                delay = self._reconnect.get_backoff(attempt)
+                if (attempt >= attempts or
+                        (until is not None and
+                         time.monotonic() + delay >= until)):
+                    raise
+                LOG.debug('Reconnecting to %s in %.2fs: %s',
+                          endpoint, delay, ex)
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            self._stopped = threading.Event()
+            self._endpoint = endpoint
+            self._connections += 1
+            return conn
 
-    def _create_connection(self, endpoint):
-        return websocket.create_connection(endpoint)
+    def connect(self, endpoint):
+        """Connects to `endpoint` unless already connected
+
+        :param endpoint: The websocket endpoint.
+        :type endpoint: str
+        """
+        connect, _read = self.get_timeout(request.Request(endpoint))
+        self._get_connection(endpoint, connect)
 
     def send(self, request):
-        if not self._ws:
-            self._init_client(request.endpoint)
+        return self.circuit_breakers.call(self._send, request,
+                                          self.connection_errors)
+
+    def _is_idempotent(self, request):
+        return bool(request.api and request.operation and
+                    request.api.is_idempotent(request.operation))
+
+    def _send(self, request):
+        replays = 0
+        while True:
+            connect, _read = self.get_timeout(request)
+            conn = self._get_connection(request.endpoint, connect,
+                                        request.deadline)
+            try:
+                return self._request(conn, request)
+            except self.connection_errors:
+                # Timeouts leave the connection open,
+                # only requests lost along with it are sent again.
+                if (not conn.closed or replays >= self._max_replays or
+                        not self._is_idempotent(request)):
+                    raise
+                replays += 1
+                LOG.debug('Sending %s again, the connection was lost',
+                          request.operation)
+
+    def _loads(self, data):
+        # Text frames are read as `str`,
+        # binary ones as `bytes`.
+        if self._frame_codec is not None and isinstance(data, bytes):
+            return self._frame_codec.loads(data)
+        return self.codec.loads(data)
+
+    @staticmethod
+    def _params(request, ws_format):
+        names = ws_format.get('params', {})
+        params = {}
+        for key, value in request.params.items():
+            if isinstance(value, (set, tuple)):
+                value = list(value)
+            params[names.get(key, key)] = value
+        return params
+
+    def _decoded_body(self, request, params, body_key):
+        if not request.content:
+            return params or None
+
+        content = self.codec.loads(request.content)
+        if body_key is not None:
+            params[body_key] = content
+        elif isinstance(content, dict):
+            params.update(content)
+        else:
+            if params:
+                LOG.warning('Dropping the params of %s, its body is '
+                            'not an object', request.operation)
+            return content
+        return params
+
+    def _spliced_body(self, request, params, body_key):
+        content = request.content
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        if not content:
+            return self.codec.dumps(params) if params else None
+
+        encoded = self.codec.dumps(params)
+        if body_key is not None:
+            return b''.join((encoded[:-1], b',' if params else b'',
+                             self.codec.dumps(body_key), b':', content,
+                             b'}'))
+        if not params:
+            return content
+
+        content = content.strip()
+        if content[:1] != b'{':
+            LOG.warning('Dropping the params of %s, its body is '
+                        'not an object', request.operation)
+            return content
+
+        members = content[1:-1].strip()
+        if not members:
+            return encoded
+        return b''.join((encoded[:-1], b',', members, b'}'))
+
+    def _envelope(self, request, headers):
+        """Wraps the request in a websocket frame
+
+        Zaqar's websocket API takes the request's params in the
+        body, along with its content, see `Api.get_ws_format`. The
+        content is already serialized, it's spliced into the body
+        rather than decoded and serialized again. Binary frames
+        can't embed JSON, their content is decoded.
+        """
+        ws_format = {}
+        if request.api and request.operation:
+            ws_format = request.api.get_ws_format(request.operation)
+        params = self._params(request, ws_format)
+        body_key = ws_format.get('body')
+
+        msg = {'action': ws_format.get('action', request.operation),
+               'headers': headers}
+        if self._frame_codec is not None:
+            body = self._decoded_body(request, params, body_key)
+            if body is not None:
+                msg['body'] = body
+            return self._frame_codec.dumps(msg)
+
+        frame = self.codec.dumps(msg)
+        body = self._spliced_body(request, params, body_key)
+        if body is None:
+            return frame
+        return b''.join((frame[:-1], b',"body":', body, b'}'))
+
+    def _request(self, conn, request):
+        _connect, read = self.get_timeout(request)
+        request_id = uuidutils.generate_uuid()
 
         headers = request.headers.copy()
         headers.update({
             'Client-ID': self._websocket_client_id,
-            'X-Project-ID': self._project_id
+            'X-Project-ID': self._project_id,
+            REQUEST_ID_HEADER: request_id,
         })
 
-        msg = {'action': request.operation, 'headers': headers}
-        if request.content:
-            msg['body'] = json.loads(request.content)
-        # NOTE(dprince): Zaqar websockets do not yet seem to support params?!
-        # Users of this protocol will need to send everything in the body.
-        if request.params:
-            LOG.warning('Websocket transport does not yet support params.')
-        self._ws.send(json.dumps(msg))
-        ret = self.recv()
-
-        resp = response.Response(request, json.dumps(ret.get('body', '')),
+        future = conn.submit(request_id, self._envelope(request, headers),
+                             self._opcode)
+        try:
+            ret = future.result(timeout=read)
+        except futures.TimeoutError:
+            # The response, if it ever
+            # comes, is dropped by the reader.
+            conn.forget(request_id)
+            if deadline.expired(request.deadline):
+                raise errors.DeadlineExceeded(request.operation)
+            raise websocket.WebSocketTimeoutException(
+                'Timed out waiting for the response to %s' %
+                request.operation)
+
+        # The frame was decoded by the reader,
+        # hand the body over as is rather than encoding it back.
+        resp = response.Response(request, None,
                                  headers=ret['headers'],
-                                 status_code=int(ret['headers']['status']))
+                                 status_code=int(ret['headers']['status']),
+                                 codec=self.codec,
+                                 deserialized=ret.get('body'))
 
         if resp.status_code in self.http_to_zaqar:
             kwargs = {}
             try:
-                error_body = json.loads(resp.content)
+                error_body = resp.deserialized_content
                 kwargs['title'] = 'Websocket Transport Error'
                 kwargs['description'] = error_body['error']
             except Exception:
@@ -124,13 +714,44 @@ class WebsocketTransport(base.Transport):
 
         return resp
 
-    def recv(self):
-        return json.loads(self._ws.recv())
+    def recv(self, timeout=None):
+        """Returns the next unsolicited frame
+
+        :param timeout: Seconds to wait for a frame. Default:
+            None, wait until one comes.
+        :type timeout: float
+
+        :raises: `queue.Empty` if no frame came in time.
+        """
+        return self._unsolicited.get(timeout=timeout)
+
+    def stats(self):
+        """Returns the usage of the current connection
+
+        `idle` and `busy` are the seconds the connection spent
+        without and with requests waiting for their responses,
+        `requests` and `pings` the number of them it sent and
+        `connections` the number of connections established so
+        far, reconnections included.
+
+        :rtype: dict
+        """
+        conn = self._conn
+        if conn is None:
+            stats = {'idle': 0.0, 'busy': 0.0, 'requests': 0, 'pings': 0}
+        else:
+            stats = conn.stats()
+        stats['connected'] = conn is not None and not conn.closed
+        stats['connections'] = self._connections
+        return stats
 
     def cleanup(self):
-        if self._ws:
-            self._ws.close()
-            self._ws = None
+        super().cleanup()
+        self._stopped.set()
+        with self._connect_lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
 
     def __enter__(self):
         """Return self to allow usage as a context manager"""